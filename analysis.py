@@ -1,144 +1,718 @@
-def get_next_game(player_games, total_meetings, combos):
+import numpy as np
+import random
+import time
+import os
+from concurrent import futures
+
+# Increase whenever the schedule generated for a number of players and games per player changes, so cached schedules
+# from older versions are no longer used
+SCHEDULE_ALGORITHM_VERSION = 1
+
+
+class ScheduleState:
     """
-    Helper function for generate_new_schedule to avoid repeat code
+    Incrementally maintained state of a schedule being generated by generate_new_schedule. Players are referred to by
+    their index in the player ID list, and every statistic used by the tiebreak order is kept per player (or per pair
+    of players) and updated when a game is appended, so choosing the next game never rescans the schedule
     """
-    player_games[combos[0][0]] += 1
-    player_games[combos[0][1]] += 1
-    total_meetings[combos[0]] += 1
-    return combos[0]
+    def __init__(self, num_players, rng=None):
+        """
+        :param num_players: Number of players in the schedule
+        :param rng: random.Random used to break ties left after every tiebreak, or None to take the first in player
+        order
+        """
+        self.num_players = num_players
+        self.rng = rng
+        self.games = []
+        self.player_games = [0] * num_players
+        self.last_home = [None] * num_players
+        self.last_away = [None] * num_players
+        self.last_played = [None] * num_players
+        # Meetings between opponents on given sides, and game number of last meeting between each pair of opponents
+        self.sided_meetings = [[0] * num_players for _ in range(num_players)]
+        self.last_meeting = {}
+        # Number of home/away pairings with each (total meetings, sided meetings) key, used to find the lowest key
+        self.meeting_key_counts = {(0, 0): num_players * (num_players - 1)}
+        self.min_meeting_key = (0, 0)
+        # Pairings with the lowest meeting key, by home player (rows) and by away player (columns)
+        self.rows = []
+        self.cols = []
+        self._rebuild_min_meeting_pairings()
+        # Players grouped by number of games already played
+        self.game_count_players = {0: set(range(num_players))}
 
+    def _meeting_key(self, home, away):
+        sided = self.sided_meetings[home][away]
+        return sided + self.sided_meetings[away][home], sided
 
-def generate_new_schedule(games_per_player, player_ids):
-    # Generate all possible pairings of home/away
-    game_combos = []
-    for home in player_ids:
-        for away in player_ids:
-            if home != away:
-                game_combos.append((home, away))
-    # Keep track of schedule in a game array and each player's number of games played in a player games array
-    games = []
-    player_games = {id_: 0 for id_ in player_ids}
-    total_meetings = {(home, away): 0 for home in player_ids for away in player_ids}
-    # Keep adding games until all players have played at least the given number of games
-    while player_games[min(player_games, key=player_games.get)] < games_per_player:
-
-        # Loop through game combos to find next game according to following order
-        # Lowest meetings between opponents
-        # Lowest meetings between opponents on given sides
-        # Lowest games already played
-        # Most games since home/away players were home/away - maximum of two
-        # Most games since home/away player was home/away - minimum of two
-        # Most games since home/away player played - maximum of two
-        # Most games since home/away player played - minimum of two
-        # Most games since last meeting between opponents
-
-        # Keep combos with lowest total meetings between opponents
-        remaining_combos = game_combos.copy()
-        combos_total_meetings = [total_meetings[combo] + total_meetings[combo[::-1]]
-                                 for combo in remaining_combos]
-        min_total_meetings = min(combos_total_meetings)
-        remaining_combos = [remaining_combos[combo] for combo in range(len(remaining_combos))
-                            if combos_total_meetings[combo] == min_total_meetings]
-
-        # Keep combos with lowest total meetings between opponents on given sides
-        combos_total_meetings = [total_meetings[combo] for combo in remaining_combos]
-        min_total_meetings = min(combos_total_meetings)
-        next_combos = [remaining_combos[combo] for combo in range(len(remaining_combos))
-                       if combos_total_meetings[combo] == min_total_meetings]
-        if len(next_combos) > 1:
-            remaining_combos = next_combos[:]
-        elif len(next_combos) == 1:
-            games.append(get_next_game(player_games, total_meetings, next_combos))
-            continue
-
-        # Keep combos with lowest total games already played
-        combos_games_played = [player_games[combo[0]] + player_games[combo[1]] for combo in remaining_combos]
-        min_games_played = min(combos_games_played)
-        next_combos = [remaining_combos[combo] for combo in range(len(remaining_combos))
-                       if combos_games_played[combo] == min_games_played]
-        if len(next_combos) > 1:
-            remaining_combos = next_combos[:]
-        elif len(next_combos) == 1:
-            games.append(get_next_game(player_games, total_meetings, next_combos))
-            continue
+    def _rebuild_min_meeting_pairings(self):
+        self.rows = [set() for _ in range(self.num_players)]
+        self.cols = [set() for _ in range(self.num_players)]
+        for home in range(self.num_players):
+            for away in range(self.num_players):
+                if home != away and self._meeting_key(home, away) == self.min_meeting_key:
+                    self.rows[home].add(away)
+                    self.cols[away].add(home)
+
+    def _change_meeting_key(self, home, away, old_key):
+        self.meeting_key_counts[old_key] -= 1
+        new_key = self._meeting_key(home, away)
+        self.meeting_key_counts[new_key] = self.meeting_key_counts.get(new_key, 0) + 1
+        if old_key == self.min_meeting_key:
+            self.rows[home].discard(away)
+            self.cols[away].discard(home)
+
+    def append_game(self, home, away):
+        """
+        Add a game to the end of the schedule and update all statistics affected by it
+        :param home: Index of home player
+        :param away: Index of away player
+        """
+        game_number = len(self.games)
+        # Meeting keys can only increase, so pairings never need to be added back to the lowest key pairings
+        old_home_away_key = self._meeting_key(home, away)
+        old_away_home_key = self._meeting_key(away, home)
+        self.sided_meetings[home][away] += 1
+        self._change_meeting_key(home, away, old_home_away_key)
+        self._change_meeting_key(away, home, old_away_home_key)
+        if self.meeting_key_counts[self.min_meeting_key] == 0:
+            self.meeting_key_counts = {key: count for key, count in self.meeting_key_counts.items() if count > 0}
+            self.min_meeting_key = min(self.meeting_key_counts)
+            self._rebuild_min_meeting_pairings()
+        # Move both players up one games played group
+        for player in (home, away):
+            self.game_count_players[self.player_games[player]].discard(player)
+            if len(self.game_count_players[self.player_games[player]]) == 0:
+                del self.game_count_players[self.player_games[player]]
+            self.player_games[player] += 1
+            self.game_count_players.setdefault(self.player_games[player], set()).add(player)
+            self.last_played[player] = game_number
+        self.last_home[home] = game_number
+        self.last_away[away] = game_number
+        self.last_meeting[(min(home, away), max(home, away))] = game_number
+        self.games.append((home, away))
+
+    def get_fewest_games_played(self):
+        return min(self.game_count_players)
+
+    def _has_away(self, home, aways):
+        row = self.rows[home]
+        if len(row) < len(aways):
+            return any(away in aways for away in row)
+        return any(away in row for away in aways)
+
+    def _has_home(self, away, homes):
+        col = self.cols[away]
+        if len(col) < len(homes):
+            return any(home in homes for home in col)
+        return any(home in col for home in homes)
+
+    def _is_block_valid(self, block):
+        return any(self._has_away(home, block[1]) for home in block[0])
+
+    def _block_pairs(self, block):
+        return [(home, away) for home in block[0] for away in self.rows[home] if away in block[1]]
+
+    def _best_block_value(self, blocks, home_values, away_values):
+        # Highest value of home player (or away player) that has at least one valid opponent in its block
+        best = -1
+        for homes, aways in blocks:
+            best = max(best, self._best_player_value(homes, home_values, aways, self._has_away))
+            best = max(best, self._best_player_value(aways, away_values, homes, self._has_home))
+        return best
+
+    @staticmethod
+    def _best_player_value(players, values, opponents, has_opponent):
+        # The highest valued player almost always has an opponent, so only sort when it doesn't
+        player = max(players, key=values.__getitem__)
+        if has_opponent(player, opponents):
+            return values[player]
+        for player in sorted(players, key=values.__getitem__, reverse=True):
+            if has_opponent(player, opponents):
+                return values[player]
+        return -1
+
+    def _ties_at_max_value(self, blocks, home_values, away_values, best, best_players):
+        # Pairings whose larger value equals best, along with their smaller value. Values count games since the
+        # player's last game, so only the players of that game (best_players) can have it and the pairings are listed
+        # directly
+        ties = []
+        for homes, aways in blocks:
+            for player in set(best_players):
+                if player in homes and home_values[player] == best:
+                    ties += [((player, away), away_values[away]) for away in self.rows[player]
+                             if away_values[away] <= best and away in aways]
+                if player in aways and away_values[player] == best:
+                    # Skip pairings already added with the home player also at best
+                    ties += [((home, player), home_values[home]) for home in self.cols[player]
+                             if home_values[home] < best and home in homes]
+        return [tie[0] for tie in ties], [tie[1] for tie in ties]
+
+    def get_next_game(self):
+        """
+        Choose the next game according to the tiebreak order documented in generate_new_schedule
+        :return: Tuple of (home index, away index) of next game
+        """
+        num_games = len(self.games)
+        # Games since each player was home/away. Like the original backwards search, this stops counting once every
+        # player has been found home or every player has been found away, leaving the rest uncounted (-1)
+        oldest_home = -1 if None in self.last_home else min(self.last_home)
+        oldest_away = -1 if None in self.last_away else min(self.last_away)
+        cutoff = max(oldest_home, oldest_away, 0)
+        games_since_home = [-1 if last is None or last < cutoff else num_games - last for last in self.last_home]
+        games_since_away = [-1 if last is None or last < cutoff else num_games - last for last in self.last_away]
+        games_since_played = [-1 if last is None else num_games - last for last in self.last_played]
+
+        # Lowest meetings between opponents, then on given sides, are already the pairings in rows/cols
+        # Keep combos with lowest total games already played. Candidates are kept as blocks of (homes, aways) sets
+        blocks = []
+        game_counts = sorted(self.game_count_players)
+        for total in sorted({home + away for home in game_counts for away in game_counts}):
+            blocks = [(self.game_count_players[home], self.game_count_players[total - home])
+                      for home in game_counts if total - home in self.game_count_players]
+            blocks = [block for block in blocks if self._is_block_valid(block)]
+            if len(blocks) > 0:
+                break
+        pairs = None
 
         # Keep combos with most games since home/away players were home/away - maximum of two players
-        player_games_since_last_home = [-1] * len(player_ids)
-        player_games_since_last_away = [-1] * len(player_ids)
-        game_counter = len(games) - 1
-        while min(player_games_since_last_home) == -1 and min(player_games_since_last_away) == -1 and game_counter >= 0:
-            if player_games_since_last_home[player_ids.index(games[game_counter][0])] == -1:
-                player_games_since_last_home[player_ids.index(games[game_counter][0])] = len(games) - game_counter
-            if player_games_since_last_away[player_ids.index(games[game_counter][1])] == -1:
-                player_games_since_last_away[player_ids.index(games[game_counter][1])] = len(games) - game_counter
-            game_counter -= 1
-        combos_games_since_last_max = [max(player_games_since_last_home[player_ids.index(combo[0])],
-                                           player_games_since_last_away[player_ids.index(combo[1])])
-                                       for combo in remaining_combos]
-        max_games_since_last = -1 if -1 in combos_games_since_last_max else max(combos_games_since_last_max)
-        next_combos = [remaining_combos[combo] for combo in range(len(remaining_combos))
-                       if combos_games_since_last_max[combo] == max_games_since_last]
-        if len(next_combos) > 1:
-            remaining_combos = next_combos[:]
-        elif len(next_combos) == 1:
-            games.append(get_next_game(player_games, total_meetings, next_combos))
-            continue
-
-        # Keep combos with most games since home/away players were home/away - minimum of two players
-        combos_games_since_last_min = [min(player_games_since_last_home[player_ids.index(combo[0])],
-                                           player_games_since_last_away[player_ids.index(combo[1])])
-                                       for combo in remaining_combos]
-        max_games_since_last = -1 if -1 in combos_games_since_last_min else max(combos_games_since_last_min)
-        next_combos = [remaining_combos[combo] for combo in range(len(remaining_combos))
-                       if combos_games_since_last_min[combo] == max_games_since_last]
-        if len(next_combos) > 1:
-            remaining_combos = next_combos[:]
-        elif len(next_combos) == 1:
-            games.append(get_next_game(player_games, total_meetings, next_combos))
-            continue
+        never_blocks = [({home for home in homes if games_since_home[home] == -1},
+                         {away for away in aways if games_since_away[away] == -1}) for homes, aways in blocks]
+        never_blocks = [block for block in never_blocks if self._is_block_valid(block)]
+        if len(never_blocks) > 0:
+            # Minimum of two players is also uncounted for every remaining combo
+            blocks = never_blocks
+        else:
+            best = self._best_block_value(blocks, games_since_home, games_since_away)
+            pairs, pair_mins = self._ties_at_max_value(blocks, games_since_home, games_since_away, best,
+                                                       self.games[num_games - best])
+            if len(pairs) == 1:
+                return pairs[0]
+            # Keep combos with most games since home/away players were home/away - minimum of two players
+            pairs = keep_best_combos(pairs, pair_mins)
+            if len(pairs) == 1:
+                return pairs[0]
 
         # Keep combos with most games since last played - maximum of two players
-        player_games_since_last = [-1] * len(player_ids)
-        game_counter = len(games) - 1
-        while min(player_games_since_last) == -1 and game_counter >= 0:
-            for i in range(2):
-                if player_games_since_last[player_ids.index(games[game_counter][i])] == -1:
-                    player_games_since_last[player_ids.index(games[game_counter][i])] = len(games) - game_counter
-            game_counter -= 1
-        combos_games_since_last_max = [max(player_games_since_last[player_ids.index(combo[0])],
-                                           player_games_since_last[player_ids.index(combo[1])])
-                                       for combo in remaining_combos]
-        max_games_since_last = -1 if -1 in combos_games_since_last_max else max(combos_games_since_last_max)
-        next_combos = [remaining_combos[combo] for combo in range(len(remaining_combos))
-                       if combos_games_since_last_max[combo] == max_games_since_last]
-        if len(next_combos) > 1:
-            remaining_combos = next_combos[:]
-        elif len(next_combos) == 1:
-            games.append(get_next_game(player_games, total_meetings, next_combos))
-            continue
-
-        # Keep combos with player that has most games since last played - minimum of two players
-        combos_games_since_last_min = [min(player_games_since_last[player_ids.index(combo[0])],
-                                           player_games_since_last[player_ids.index(combo[1])])
-                                       for combo in remaining_combos]
-        max_games_since_last = -1 if -1 in combos_games_since_last_min else max(combos_games_since_last_min)
-        next_combos = [remaining_combos[combo] for combo in range(len(remaining_combos))
-                       if combos_games_since_last_min[combo] == max_games_since_last]
-        if len(next_combos) > 1:
-            remaining_combos = next_combos[:]
-        elif len(next_combos) == 1:
-            games.append(get_next_game(player_games, total_meetings, next_combos))
-            continue
-
-        # Keep combos with most games since opponents last played each other
-        reversed_games = games[::-1]
-        combos_games_since_last = [min(reversed_games.index(combo), reversed_games.index(combo[::-1]))
-                                   if (combo in reversed_games or combo[::-1] in reversed_games) else -1
-                                   for combo in remaining_combos]
-        max_games_since_last = -1 if -1 in combos_games_since_last else max(combos_games_since_last)
-        remaining_combos = [remaining_combos[combo] for combo in range(len(remaining_combos))
-                            if combos_games_since_last[combo] == max_games_since_last]
-
-        # Add random game if still no tiebreakers have been broken
-        games.append(get_next_game(player_games, total_meetings, remaining_combos))
-    return games
+        if pairs is None:
+            never_blocks = [({home for home in homes if games_since_played[home] == -1},
+                             {away for away in aways if games_since_played[away] == -1}) for homes, aways in blocks]
+            never_blocks = [block for block in never_blocks if self._is_block_valid(block)]
+            if len(never_blocks) > 0:
+                blocks = never_blocks
+            else:
+                best = self._best_block_value(blocks, games_since_played, games_since_played)
+                pairs, pair_mins = self._ties_at_max_value(blocks, games_since_played, games_since_played, best,
+                                                           self.games[num_games - best])
+        else:
+            pairs = keep_best_combos(pairs, [max(games_since_played[home], games_since_played[away])
+                                             for home, away in pairs])
+            pair_mins = [min(games_since_played[home], games_since_played[away]) for home, away in pairs]
+        if pairs is not None:
+            if len(pairs) == 1:
+                return pairs[0]
+            # Keep combos with player that has most games since last played - minimum of two players
+            pairs = keep_best_combos(pairs, pair_mins)
+            if len(pairs) == 1:
+                return pairs[0]
+
+        # Keep combos with most games since opponents last played each other. If opponents have never met, all combos
+        # are tied
+        if pairs is None and self.min_meeting_key[0] > 0:
+            pairs = [pair for block in blocks for pair in self._block_pairs(block)]
+        if pairs is not None and self.min_meeting_key[0] > 0:
+            pairs = keep_best_combos(pairs, [num_games - 1 - self.last_meeting.get((min(pair), max(pair)), num_games)
+                                             for pair in pairs])
+        if pairs is not None:
+            return min(pairs) if self.rng is None else self.rng.choice(sorted(pairs))
+
+        # Add random game if told to and still no tiebreakers have been broken
+        if self.rng is not None:
+            homes, aways = self.rng.choice(blocks)
+            home = self.rng.choice(sorted(home for home in homes if self._has_away(home, aways)))
+            return home, self.rng.choice(sorted(away for away in self.rows[home] if away in aways))
+
+        # Otherwise add first game in player order
+        best_pair = None
+        for homes, aways in blocks:
+            for home in sorted(homes):
+                if best_pair is not None and home > best_pair[0]:
+                    break
+                valid_aways = [away for away in self.rows[home] if away in aways]
+                if len(valid_aways) > 0:
+                    if best_pair is None or (home, min(valid_aways)) < best_pair:
+                        best_pair = (home, min(valid_aways))
+                    break
+        return best_pair
+
+
+# Scales of meeting counts in VectorizedScheduleState.meeting_games_key, leaving room for games played below them
+MEETINGS_KEY_SCALE = 1 << 42
+SIDED_MEETINGS_KEY_SCALE = 1 << 21
+
+
+class VectorizedScheduleState:
+    """
+    Same schedule state as ScheduleState, but with every home/away pairing stored as integer index arrays so each
+    tiebreak criterion is computed as a NumPy array expression over the remaining pairings
+    """
+    def __init__(self, num_players, rng=None):
+        """
+        :param num_players: Number of players in the schedule
+        :param rng: random.Random used to break ties left after every tiebreak, or None to take the first in player
+        order
+        """
+        self.num_players = num_players
+        self.rng = rng
+        self.games = []
+        self.player_games = np.zeros(num_players, dtype=np.int64)
+        # Game number of last home/away/played game of each player, -1 if never
+        self.last_home = np.full(num_players, -1, dtype=np.int64)
+        self.last_away = np.full(num_players, -1, dtype=np.int64)
+        self.last_played = np.full(num_players, -1, dtype=np.int64)
+        # All home/away pairings in player order, and the index of each pairing with sides swapped
+        homes, aways = np.nonzero(~np.eye(num_players, dtype=bool))
+        self.pair_home = homes
+        self.pair_away = aways
+        pair_index = np.full((num_players, num_players), -1, dtype=np.int64)
+        pair_index[homes, aways] = np.arange(len(homes))
+        self.pair_index = pair_index
+        self.pair_reverse = pair_index[aways, homes]
+        self.last_meeting = np.full(len(homes), -1, dtype=np.int64)
+        # Pairings each player is part of
+        self.player_pairs = [np.flatnonzero((homes == player) | (aways == player)) for player in range(num_players)]
+        # Meetings between opponents, meetings on given sides and total games played of each pairing, packed into one
+        # key so the first three criteria need a single comparison
+        self.meeting_games_key = np.zeros(len(homes), dtype=np.int64)
+
+    def append_game(self, home, away):
+        """
+        Add a game to the end of the schedule and update all statistics affected by it
+        :param home: Index of home player
+        :param away: Index of away player
+        """
+        game_number = len(self.games)
+        pair = self.pair_index[home, away]
+        self.meeting_games_key[pair] += MEETINGS_KEY_SCALE + SIDED_MEETINGS_KEY_SCALE
+        self.meeting_games_key[self.pair_reverse[pair]] += MEETINGS_KEY_SCALE
+        self.meeting_games_key[self.player_pairs[home]] += 1
+        self.meeting_games_key[self.player_pairs[away]] += 1
+        self.last_meeting[pair] = game_number
+        self.last_meeting[self.pair_reverse[pair]] = game_number
+        self.player_games[[home, away]] += 1
+        self.last_played[[home, away]] = game_number
+        self.last_home[home] = game_number
+        self.last_away[away] = game_number
+        self.games.append((home, away))
+
+    def get_fewest_games_played(self):
+        return self.player_games.min()
+
+    def get_next_game(self):
+        """
+        Choose the next game according to the tiebreak order documented in generate_new_schedule with a lexicographic
+        argmin over the tiebreak criteria. Each criterion is only computed for pairings still tied on all previous ones
+        :return: Tuple of (home index, away index) of next game
+        """
+        num_games = len(self.games)
+        oldest_home = -1 if (self.last_home == -1).any() else self.last_home.min()
+        oldest_away = -1 if (self.last_away == -1).any() else self.last_away.min()
+        cutoff = max(oldest_home, oldest_away, 0)
+        games_since_home = np.where(self.last_home < cutoff, -1, num_games - self.last_home)
+        games_since_away = np.where(self.last_away < cutoff, -1, num_games - self.last_away)
+        games_since_played = np.where(self.last_played == -1, -1, num_games - self.last_played)
+        criteria = (
+            # Lowest meetings between opponents, then on given sides, then lowest games already played
+            lambda pairs: self.meeting_games_key[pairs],
+            # Most games since home/away players were home/away - maximum of two players
+            lambda pairs: most_games_key(np.maximum(games_since_home[self.pair_home[pairs]],
+                                                    games_since_away[self.pair_away[pairs]]), num_games),
+            # Most games since home/away players were home/away - minimum of two players
+            lambda pairs: most_games_key(np.minimum(games_since_home[self.pair_home[pairs]],
+                                                    games_since_away[self.pair_away[pairs]]), num_games),
+            # Most games since last played - maximum of two players
+            lambda pairs: most_games_key(np.maximum(games_since_played[self.pair_home[pairs]],
+                                                    games_since_played[self.pair_away[pairs]]), num_games),
+            # Most games since last played - minimum of two players
+            lambda pairs: most_games_key(np.minimum(games_since_played[self.pair_home[pairs]],
+                                                    games_since_played[self.pair_away[pairs]]), num_games),
+            # Most games since opponents last played each other
+            lambda pairs: most_games_key(np.where(self.last_meeting[pairs] == -1, -1,
+                                                  num_games - 1 - self.last_meeting[pairs]), num_games)
+        )
+        # Pairings are in player order, so the first pairing left is the first pairing in player order
+        pair = lexicographic_argmin(len(self.pair_home), criteria, self.rng)
+        return int(self.pair_home[pair]), int(self.pair_away[pair])
+
+
+def most_games_key(games_since, num_games):
+    """
+    Convert games since an event to a key where lower is better, with -1 (not counted) being best
+    :param games_since: Array of games since an event, or -1 if not counted
+    :param num_games: Number of games in schedule, larger than any games since an event
+    :return: Array of keys
+    """
+    return np.where(games_since == -1, -1, num_games - games_since)
+
+
+def lexicographic_argmin(num_items, criteria, rng=None):
+    """
+    Find the first item with the lowest criteria, comparing by each criterion in order. Each criterion is only evaluated
+    for items still tied on all previous criteria
+    :param num_items: Number of items to choose from
+    :param criteria: Functions returning an array of criterion values for an array of item indices (or a slice)
+    :param rng: random.Random used to choose between items tied on all criteria, or None to take the first
+    :return: Index of first (or random) item with the lowest criteria
+    """
+    # First criterion is evaluated over all items with a slice to avoid copying them
+    values = criteria[0](slice(0, num_items))
+    items = np.flatnonzero(values == values.min())
+    for criterion in criteria[1:]:
+        if len(items) == 1:
+            break
+        values = criterion(items)
+        items = items[values == values.min()]
+    return items[0] if rng is None else items[rng.randrange(len(items))]
+
+
+def keep_best_combos(combos, combo_values):
+    """
+    Keep the combos with the best value, where a value of -1 (not counted) is best and a higher value is otherwise
+    better
+    :param combos: List of combos
+    :param combo_values: Value of each combo
+    :return: List of combos with the best value
+    """
+    best_value = -1 if -1 in combo_values else max(combo_values)
+    return [combos[combo] for combo in range(len(combos)) if combo_values[combo] == best_value]
+
+
+def generate_new_schedule(games_per_player, player_ids, vectorized=False, seed=None, round_robin=False,
+                          b_check_round_robin=False):
+    """
+    Generate a schedule with generate_new_schedule_games and return it all at once
+    :param games_per_player: Minimum number of games each player plays
+    :param player_ids: List of player IDs to schedule
+    :param vectorized: Whether to compute tiebreaks with NumPy arrays over all pairings instead of incrementally
+    :param seed: Seed for random choice between games tied after every tiebreak, or None to take the first pairing
+    :param round_robin: Whether to build full round robin shapes directly with generate_round_robin_games
+    :param b_check_round_robin: Whether to check a directly built round robin with check_round_robin_priorities
+    :return: List of (home player ID, away player ID) tuples in order of games
+    """
+    return list(generate_new_schedule_games(games_per_player, player_ids, vectorized, seed, round_robin,
+                                            b_check_round_robin))
+
+
+def generate_new_schedule_games(games_per_player, player_ids, vectorized=False, seed=None, round_robin=False,
+                                b_check_round_robin=False):
+    """
+    Generate a schedule where every player plays at least the given number of games. Each next game is chosen from all
+    home/away pairings according to the following order:
+    Lowest meetings between opponents
+    Lowest meetings between opponents on given sides
+    Lowest games already played
+    Most games since home/away players were home/away - maximum of two
+    Most games since home/away player was home/away - minimum of two
+    Most games since home/away player played - maximum of two
+    Most games since home/away player played - minimum of two
+    Most games since last meeting between opponents
+    First pairing in player order, or a random pairing if a seed is given
+    If told to, full round robin shapes are instead built directly by generate_round_robin_games, which meets the first
+    three priorities but gives a different order of games
+    :param games_per_player: Minimum number of games each player plays
+    :param player_ids: List of player IDs to schedule
+    :param vectorized: Whether to compute tiebreaks with NumPy arrays over all pairings instead of incrementally
+    :param seed: Seed for random choice between games tied after every tiebreak, or None to take the first pairing
+    :param round_robin: Whether to build full round robin shapes directly with generate_round_robin_games
+    :param b_check_round_robin: Whether to check a directly built round robin with check_round_robin_priorities,
+    generating the schedule normally if the check fails
+    :return: Generator of (home player ID, away player ID) tuples in order of games, yielded as each game is chosen
+    """
+    if round_robin and is_round_robin_shape(games_per_player, len(player_ids)):
+        if not b_check_round_robin:
+            yield from generate_round_robin_games(games_per_player, player_ids)
+            return
+        schedule = list(generate_round_robin_games(games_per_player, player_ids))
+        if check_round_robin_priorities(schedule, games_per_player, player_ids):
+            yield from schedule
+            return
+    rng = None if seed is None else random.Random(seed)
+    state = VectorizedScheduleState(len(player_ids), rng) if vectorized else ScheduleState(len(player_ids), rng)
+    # Keep adding games until all players have played at least the given number of games
+    while state.get_fewest_games_played() < games_per_player:
+        home, away = state.get_next_game()
+        state.append_game(home, away)
+        yield player_ids[home], player_ids[away]
+
+
+def is_round_robin_shape(games_per_player, num_players):
+    """
+    Check if every player can play every other player the same number of times
+    :param games_per_player: Minimum number of games each player plays
+    :param num_players: Number of players in schedule
+    :return: Whether games per player is a positive multiple of the number of opponents
+    """
+    return num_players >= 2 and games_per_player > 0 and games_per_player % (num_players - 1) == 0
+
+
+def generate_round_robin_games(games_per_player, player_ids):
+    """
+    Build a schedule of full round robins directly with the circle method. Each player stays in place or rotates one
+    spot every round and plays the player across from them, sitting out against an empty spot for odd player counts.
+    Home/away alternates between rounds for the fixed player and between spots for the rest, and every other round
+    robin swaps home and away. Takes time linear in the number of games
+    :param games_per_player: Minimum number of games each player plays, a multiple of the number of opponents
+    :param player_ids: List of player IDs to schedule
+    :return: Generator of (home player ID, away player ID) tuples in order of games
+    """
+    spots = list(player_ids) + ([None] if len(player_ids) % 2 == 1 else [])
+    for round_robin in range(games_per_player // (len(player_ids) - 1)):
+        round_spots = spots[:]
+        for round_ in range(len(spots) - 1):
+            for spot in range(len(spots) // 2):
+                first, second = round_spots[spot], round_spots[len(spots) - 1 - spot]
+                if first is None or second is None:
+                    continue
+                b_first_home = (round_ % 2 == 0) if spot == 0 else (spot % 2 == 1)
+                if round_robin % 2 == 1:
+                    b_first_home = not b_first_home
+                yield (first, second) if b_first_home else (second, first)
+            # Keep first spot in place and rotate the rest
+            round_spots = [round_spots[0], round_spots[-1]] + round_spots[1:-1]
+
+
+def check_round_robin_priorities(schedule, games_per_player, player_ids):
+    """
+    Check a round robin schedule meets the same priorities as generate_new_schedule before its recency tiebreaks:
+    Every pair of opponents meets once in each round robin
+    Meetings between opponents on given sides never differ by more than one
+    Games already played by players never differ by more than two, since the player sitting out a round with an odd
+    number of players falls behind until their next game
+    Every player plays exactly the given number of games
+    :param schedule: List of (home player ID, away player ID) tuples in order of games
+    :param games_per_player: Number of games each player should play
+    :param player_ids: List of player IDs in schedule
+    :return: Whether schedule meets all priorities
+    """
+    num_pairs = len(player_ids) * (len(player_ids) - 1) // 2
+    if len(schedule) != num_pairs * games_per_player // (len(player_ids) - 1):
+        return False
+    sided_meetings = {}
+    player_games = {id_: 0 for id_ in player_ids}
+    game_count_players = {0: len(player_ids)}
+    for game in range(len(schedule)):
+        home, away = schedule[game]
+        if home not in player_games or away not in player_games or home == away:
+            return False
+        # Each round robin must be made up of every pair of opponents
+        if game % num_pairs == 0 and len({frozenset(pair) for pair in schedule[game:game + num_pairs]}) != num_pairs:
+            return False
+        sided_meetings[(home, away)] = sided_meetings.get((home, away), 0) + 1
+        if sided_meetings[(home, away)] - sided_meetings.get((away, home), 0) > 1:
+            return False
+        for player in (home, away):
+            game_count_players[player_games[player]] -= 1
+            if game_count_players[player_games[player]] == 0:
+                del game_count_players[player_games[player]]
+            player_games[player] += 1
+            game_count_players[player_games[player]] = game_count_players.get(player_games[player], 0) + 1
+        if max(game_count_players) - min(game_count_players) > 2:
+            return False
+    return all(games == games_per_player for games in player_games.values())
+
+
+def score_schedule_fairness(schedule):
+    """
+    Measure how fair a schedule is for its players
+    :param schedule: List of (home player ID, away player ID) tuples in order of games
+    :return: Dictionary of fairness metrics, where lower is fairer for every metric:
+    home_away_imbalance - Largest difference between a player's home and away games
+    max_side_streak - Most home (or away) games in a row for a player
+    max_consecutive_games - Most games a player plays back-to-back
+    max_rest_gap - Most games in a row a player sits out between two of their games
+    rematch_closeness - Negative of fewest games between two meetings of the same opponents
+    """
+    home_away_balance = {}
+    side_streaks = {}
+    consecutive_games = {}
+    last_played = {}
+    last_meeting = {}
+    metrics = {'home_away_imbalance': 0, 'max_side_streak': 0, 'max_consecutive_games': 0, 'max_rest_gap': 0,
+               'rematch_closeness': -len(schedule)}
+    for game in range(len(schedule)):
+        for player, side in ((schedule[game][0], 1), (schedule[game][1], -1)):
+            home_away_balance[player] = home_away_balance.get(player, 0) + side
+            streak_side, streak = side_streaks.get(player, (side, 0))
+            side_streaks[player] = (side, streak + 1 if streak_side == side else 1)
+            consecutive_games[player] = consecutive_games.get(player, 0) + 1 if last_played.get(player) == game - 1 \
+                else 1
+            if player in last_played:
+                metrics['max_rest_gap'] = max(metrics['max_rest_gap'], game - last_played[player] - 1)
+            last_played[player] = game
+            metrics['max_side_streak'] = max(metrics['max_side_streak'], side_streaks[player][1])
+            metrics['max_consecutive_games'] = max(metrics['max_consecutive_games'], consecutive_games[player])
+        opponents = frozenset(schedule[game])
+        if opponents in last_meeting:
+            metrics['rematch_closeness'] = max(metrics['rematch_closeness'], last_meeting[opponents] - game)
+        last_meeting[opponents] = game
+    metrics['home_away_imbalance'] = max([abs(balance) for balance in home_away_balance.values()], default=0)
+    return metrics
+
+
+def get_fairness_score(schedule):
+    """
+    Score a schedule by its fairness metrics in order of importance, so a lower score is a fairer schedule
+    :param schedule: List of (home player ID, away player ID) tuples in order of games
+    :return: Tuple of fairness metrics to compare scores with
+    """
+    metrics = score_schedule_fairness(schedule)
+    return (metrics['home_away_imbalance'], metrics['max_side_streak'], metrics['max_consecutive_games'],
+            metrics['max_rest_gap'], metrics['rematch_closeness'])
+
+
+def get_priority_spreads(schedule):
+    """
+    Measure how far a schedule strays from the first priorities of generate_new_schedule anywhere in it. Only the order
+    of games is measured, so schedules with the same games can be compared
+    :param schedule: List of (home player ID, away player ID) tuples in order of games
+    :return: Tuple of the largest differences, after any game, between meetings of two pairs of opponents, between a
+    pair's meetings on each side, and between games played by two players
+    """
+    def count_change(counts, old_count):
+        # Move one item from a count to the next count, keeping only counts that some item has
+        counts[old_count] -= 1
+        if counts[old_count] == 0:
+            del counts[old_count]
+        counts[old_count + 1] = counts.get(old_count + 1, 0) + 1
+
+    players = {player for game in schedule for player in game}
+    meetings = {}
+    meeting_counts = {0: len(players) * (len(players) - 1) // 2}
+    sided_meetings = {}
+    player_games = dict.fromkeys(players, 0)
+    game_counts = {0: len(players)}
+    meeting_spread, sided_spread, games_spread = 0, 0, 0
+    for home, away in schedule:
+        opponents = frozenset((home, away))
+        count_change(meeting_counts, meetings.get(opponents, 0))
+        meetings[opponents] = meetings.get(opponents, 0) + 1
+        sided_meetings[(home, away)] = sided_meetings.get((home, away), 0) + 1
+        for player in (home, away):
+            count_change(game_counts, player_games[player])
+            player_games[player] += 1
+        meeting_spread = max(meeting_spread, max(meeting_counts) - min(meeting_counts))
+        sided_spread = max(sided_spread, abs(sided_meetings[(home, away)] - sided_meetings.get((away, home), 0)))
+        games_spread = max(games_spread, max(game_counts) - min(game_counts))
+    return meeting_spread, sided_spread, games_spread
+
+
+def is_within_spreads(spreads, max_spreads):
+    """
+    :param spreads: Priority spreads from get_priority_spreads
+    :param max_spreads: Priority spreads not to go over
+    :return: Whether no spread is larger than its maximum
+    """
+    return all(spread <= max_spread for spread, max_spread in zip(spreads, max_spreads))
+
+
+def generate_scored_schedule(games_per_player, player_ids, seed, deadline=None):
+    """
+    Generate a schedule and score its fairness. Used as a worker for search_fair_schedule
+    :param games_per_player: Minimum number of games each player plays
+    :param player_ids: List of player IDs to schedule
+    :param seed: Seed for random tiebreaks and a search for a fairer order of games, or None for the deterministic
+    schedule as generated
+    :param deadline: time.time() at which a seeded schedule stops being searched, or is given up on if it's still being
+    generated, or None for no deadline
+    :return: Tuple of fairness score, priority spreads and schedule, or None if schedule was given up on
+    """
+    if seed is None:
+        schedule = generate_new_schedule(games_per_player, player_ids)
+        return get_fairness_score(schedule), get_priority_spreads(schedule), schedule
+    # Workers check the deadline themselves, so none are left running once the search is over
+    schedule = []
+    for game in generate_new_schedule_games(games_per_player, player_ids, seed=seed):
+        if deadline is not None and time.time() >= deadline:
+            return None
+        schedule.append(game)
+    score, schedule = improve_schedule_fairness(schedule, random.Random(seed), deadline)
+    return score, get_priority_spreads(schedule), schedule
+
+
+def improve_schedule_fairness(schedule, rng, deadline=None, max_swaps=None):
+    """
+    Search for a fairer order of a schedule's games by swapping random pairs of games. A swap is kept if it doesn't
+    make the fairness score worse and doesn't make any priority spread of the schedule larger, so the order still meets
+    the priorities the schedule was generated with
+    :param schedule: List of (home player ID, away player ID) tuples in order of games
+    :param rng: random.Random used to choose games to swap
+    :param deadline: time.time() at which to stop searching, or None to only stop after max_swaps
+    :param max_swaps: Number of swaps to try, or None to keep trying until the deadline
+    :return: Tuple of fairness score and fairest schedule found
+    """
+    schedule = list(schedule)
+    score = get_fairness_score(schedule)
+    max_spreads = get_priority_spreads(schedule)
+    swaps = 0
+    while len(schedule) > 1 and (max_swaps is None or swaps < max_swaps) and \
+            (deadline is None or time.time() < deadline):
+        first, second = rng.sample(range(len(schedule)), 2)
+        schedule[first], schedule[second] = schedule[second], schedule[first]
+        swapped_score = get_fairness_score(schedule)
+        # Equal scores are kept too, so the search can move across orders that are just as fair
+        if swapped_score <= score and is_within_spreads(get_priority_spreads(schedule), max_spreads):
+            score = swapped_score
+        else:
+            schedule[first], schedule[second] = schedule[second], schedule[first]
+        swaps += 1
+    return score, schedule
+
+
+def search_fair_schedule(games_per_player, player_ids, time_budget_s, num_workers=None):
+    """
+    Generate candidate schedules with seeded random tiebreaks on a pool of processes, search each for a fairer order of
+    its games, and keep the fairest one. Only candidates whose priority spreads are no larger than the deterministic
+    schedule's are kept, so the result meets the schedule priorities at least as well. The deterministic schedule is
+    always a candidate, so it's waited for even past the time budget. Every other candidate stops at the end of the
+    time budget
+    :param games_per_player: Minimum number of games each player plays
+    :param player_ids: List of player IDs to schedule
+    :param time_budget_s: Wall-clock time in seconds to spend searching
+    :param num_workers: Number of worker processes, or None to use every core
+    :return: Fairest schedule found, as a list of (home player ID, away player ID) tuples in order of games
+    """
+    deadline = time.monotonic() + time_budget_s
+    # Workers are other processes, so they're given the deadline by the wall clock
+    worker_deadline = time.time() + time_budget_s
+    num_workers = os.cpu_count() if num_workers is None else num_workers
+    # Candidates are only compared once the deterministic schedule's spreads are known
+    deterministic_result = None
+    seeded_results = []
+    executor = futures.ProcessPoolExecutor(num_workers)
+    try:
+        # Keep every worker busy with a new seed until time runs out
+        deterministic_future = executor.submit(generate_scored_schedule, games_per_player, player_ids, None)
+        pending = {deterministic_future}
+        next_seed = 0
+        while True:
+            while len(pending) < num_workers and time.monotonic() < deadline:
+                pending.add(executor.submit(generate_scored_schedule, games_per_player, player_ids, next_seed,
+                                            worker_deadline))
+                next_seed += 1
+            if len(pending) == 0:
+                break
+            # Seeded candidates return at their deadline with the fairest order they found, so they're always waited for
+            done, pending = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if future is deterministic_future:
+                    deterministic_result = result
+                elif result is not None:
+                    seeded_results.append(result)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+    best_score, max_spreads, best_schedule = deterministic_result
+    for score, spreads, schedule in seeded_results:
+        if score < best_score and is_within_spreads(spreads, max_spreads):
+            best_score, best_schedule = score, schedule
+    return best_schedule
@@ -0,0 +1,177 @@
+"""
+Benchmark and golden output check for analysis.generate_new_schedule. Times schedule generation over a grid of player
+counts and games per player, records peak memory, checks generated schedules against the stored golden schedules and
+writes everything to a JSON results file that can be compared between releases. Can also time database work on a
+temporary SQLite file. Runs fully offline
+Usage: python benchmark.py [--vectorized] [--database] [--output FILE] [--update-golden]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import analysis
+
+PLAYER_COUNTS = (10, 25, 50, 100, 150)
+GAMES_PER_PLAYER = (10, 30, 60)
+GOLDEN_SCHEDULES_FILE = 'golden_schedules.json'
+DEFAULT_RESULTS_FILE = 'benchmark_results.json'
+LOOKUP_REPEATS = 100  # Number of times to run lookups in database benchmarks, to time them more precisely
+
+
+def benchmark_schedule(num_players, games_per_player, vectorized=False):
+    """
+    Time generation of one schedule, then generate it again while tracing memory to find its peak memory use
+    :param num_players: Number of players in schedule
+    :param games_per_player: Minimum number of games each player plays
+    :param vectorized: Whether to use the vectorized schedule generator
+    :return: Dictionary of benchmark results
+    """
+    player_ids = list(range(1, num_players + 1))
+    start_time = time.perf_counter()
+    schedule = analysis.generate_new_schedule(games_per_player, player_ids, vectorized)
+    seconds = time.perf_counter() - start_time
+    # Memory is traced in a separate run since tracing slows down generation
+    tracemalloc.start()
+    analysis.generate_new_schedule(games_per_player, player_ids, vectorized)
+    peak_memory_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'players': num_players,
+        'games_per_player': games_per_player,
+        'games': len(schedule),
+        'seconds': seconds,
+        'peak_memory_bytes': peak_memory_bytes
+    }
+
+
+def benchmark_database(num_players, games_per_player, directory):
+    """
+    Time saving a season schedule, looking up the next unplayed game and recording a game result on a new SQLite file
+    :param num_players: Number of players in season
+    :param games_per_player: Minimum number of games each player plays
+    :param directory: Directory to create database file in
+    :return: Dictionary of benchmark results
+    """
+    # Imported here so schedule benchmarks don't need the database's dependencies
+    from database import PPPLDatabase
+    db = PPPLDatabase()
+    db.connect_file(os.path.join(directory, 'benchmark_{}_{}.sqlite3'.format(num_players, games_per_player)),
+                    b_reset_schema=True)
+    for player in range(num_players):
+        db.insert_player('player{}'.format(player))
+    player_ids = [db.get_player_id('player{}'.format(player)) for player in range(num_players)]
+    schedule = analysis.generate_new_schedule(games_per_player, player_ids)
+    start_time = time.perf_counter()
+    db.insert_season_schedule(datetime.date(2000, 1, 1), schedule)
+    insert_seconds = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    for _ in range(LOOKUP_REPEATS):
+        next_game = db.get_next_unplayed_game_details()
+    lookup_seconds = (time.perf_counter() - start_time) / LOOKUP_REPEATS
+    player_game = {'footwear': 'shoes', 'differential': 0, 'knockovers': 0, 'own_cups': 0, 'aces': 0,
+                   'serve_breaks': 0, 'penalty_shots_made': 0, 'penalty_shots_attempted': 0, 'penalties_committed': 0}
+    start_time = time.perf_counter()
+    db.insert_game_result(next_game[0], player_game, player_game)
+    submit_seconds = time.perf_counter() - start_time
+    db.disconnect_server()
+    return {
+        'players': num_players,
+        'games_per_player': games_per_player,
+        'games': len(schedule),
+        'insert_schedule_seconds': insert_seconds,
+        'next_game_lookup_seconds': lookup_seconds,
+        'submit_game_seconds': submit_seconds
+    }
+
+
+def check_golden_schedules(vectorized=False, golden_file=GOLDEN_SCHEDULES_FILE):
+    """
+    Generate every golden schedule again and compare with the stored schedule
+    :param vectorized: Whether to use the vectorized schedule generator
+    :param golden_file: JSON file of golden schedules
+    :return: Tuple of number of schedules checked and list of (players, games per player) of mismatched schedules
+    """
+    with open(golden_file) as file:
+        golden_schedules = json.load(file)
+    mismatches = []
+    for golden in golden_schedules:
+        schedule = analysis.generate_new_schedule(golden['games_per_player'], golden['player_ids'], vectorized)
+        if [list(game) for game in schedule] != golden['schedule']:
+            mismatches.append((len(golden['player_ids']), golden['games_per_player']))
+    return len(golden_schedules), mismatches
+
+
+def update_golden_schedules(golden_file=GOLDEN_SCHEDULES_FILE):
+    """
+    Regenerate every golden schedule with the current generator. Only use when the schedule is meant to change
+    :param golden_file: JSON file of golden schedules
+    """
+    with open(golden_file) as file:
+        golden_schedules = json.load(file)
+    for golden in golden_schedules:
+        golden['schedule'] = [list(game) for game in
+                              analysis.generate_new_schedule(golden['games_per_player'], golden['player_ids'])]
+    write_golden_schedules(golden_schedules, golden_file)
+
+
+def write_golden_schedules(golden_schedules, golden_file=GOLDEN_SCHEDULES_FILE):
+    # One schedule per line keeps changes to the file readable
+    with open(golden_file, 'w') as file:
+        file.write('[\n' + ',\n'.join(json.dumps(golden) for golden in golden_schedules) + '\n]\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark and check analysis.generate_new_schedule')
+    parser.add_argument('--vectorized', action='store_true', help='use the vectorized schedule generator')
+    parser.add_argument('--database', action='store_true',
+                        help='also time database work on a temporary SQLite file')
+    parser.add_argument('--output', default=DEFAULT_RESULTS_FILE, help='JSON file to write results to')
+    parser.add_argument('--update-golden', action='store_true',
+                        help='regenerate golden schedules with the current generator instead of benchmarking')
+    args = parser.parse_args()
+    if args.update_golden:
+        update_golden_schedules()
+        return 0
+
+    num_checked, mismatches = check_golden_schedules(args.vectorized)
+    print('Golden schedules: {} checked, {} mismatched'.format(num_checked, len(mismatches)))
+    for num_players, games_per_player in mismatches:
+        print('\tMismatch: {} players, {} games per player'.format(num_players, games_per_player))
+    results = []
+    for num_players in PLAYER_COUNTS:
+        for games_per_player in GAMES_PER_PLAYER:
+            result = benchmark_schedule(num_players, games_per_player, args.vectorized)
+            print('{players:>5} players {games_per_player:>4} games/player: {games:>6} games in {seconds:.3f} s, '
+                  'peak memory {peak_memory_bytes} B'.format(**result))
+            results.append(result)
+    database_results = []
+    if args.database:
+        with tempfile.TemporaryDirectory() as directory:
+            for num_players in PLAYER_COUNTS:
+                for games_per_player in GAMES_PER_PLAYER:
+                    result = benchmark_database(num_players, games_per_player, directory)
+                    print('{players:>5} players {games_per_player:>4} games/player: {games:>6} games saved in '
+                          '{insert_schedule_seconds:.3f} s, next game lookup {next_game_lookup_seconds:.6f} s, '
+                          'game submitted in {submit_game_seconds:.6f} s'.format(**result))
+                    database_results.append(result)
+    with open(args.output, 'w') as file:
+        json.dump({
+            'timestamp': datetime.datetime.now().isoformat(),
+            'python_version': platform.python_version(),
+            'platform': platform.platform(),
+            'vectorized': args.vectorized,
+            'golden_checked': num_checked,
+            'golden_mismatches': mismatches,
+            'results': results,
+            'database_results': database_results
+        }, file, indent=4)
+    return 1 if len(mismatches) > 0 else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,604 @@
-import mysql.connector
 import error_reporting
+from event_bus import ChangeEventBus
+from storage_backends import MySQLBackend, SQLiteBackend, DEFAULT_SQLITE_FILE
+import ratings
 import sys
+import threading
+import time
 from enum import Enum, auto
 
 
+CONNECTION_IDLE_CHECK_SECONDS = 60  # Connections idle longer than this are checked before being used again
+PLAYER_IMAGE_CHUNK_BYTES = 1024 * 1024  # Images are read in pieces of this size so no single result is too large
+
+
+# Every statement run with parameters, prepared once per connection and run by name. Prepared cursors only reuse a
+# statement when given the same query string object again, so queries must always come from here
+QUERIES = {
+    'insert_player': """
+        insert into player (name, logo, headshot, logo_thumbnail, headshot_thumbnail)
+        values (%s, %s, %s, %s, %s)
+    """,
+    'insert_role': """
+        insert into role (role_name)
+        values (%s)
+    """,
+    'insert_player_role': """
+        insert into player_role (player_id, role_id)
+        values (
+            (
+                select player_id
+                from player
+                where name = %s
+            ),
+            (
+                select role_id
+                from role
+                where role_name = %s
+            )
+        )
+    """,
+    'insert_player_game': """
+        insert into player_game (
+            player_id,
+            game_id,
+            footwear_id,
+            differential,
+            knockovers,
+            own_cups,
+            aces,
+            serve_breaks,
+            penalty_shots_made,
+            penalty_shots_attempted,
+            penalties_committed
+        )
+        values (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """,
+    'insert_footwear': """
+        insert into footwear (footwear_name)
+        values (%s)
+    """,
+    'insert_game_result_footwear': """
+        insert into footwear (footwear_name)
+        values (%s), (%s)
+        on duplicate key update footwear_id = footwear_id
+    """,
+    'insert_game_result_player_games': """
+        insert into player_game (
+            player_id,
+            game_id,
+            footwear_id,
+            differential,
+            knockovers,
+            own_cups,
+            aces,
+            serve_breaks,
+            penalty_shots_made,
+            penalty_shots_attempted,
+            penalties_committed
+        )
+        values
+            (
+                (
+                    select home_player_id
+                    from game
+                    where game_id = %s
+                ),
+                %s,
+                (
+                    select footwear_id
+                    from footwear
+                    where footwear_name = %s
+                ),
+                %s, %s, %s, %s, %s, %s, %s, %s
+            ),
+            (
+                (
+                    select away_player_id
+                    from game
+                    where game_id = %s
+                ),
+                %s,
+                (
+                    select footwear_id
+                    from footwear
+                    where footwear_name = %s
+                ),
+                %s, %s, %s, %s, %s, %s, %s, %s
+            )
+    """,
+    'insert_season': """
+        insert into season (start_date, postseason_start_game, end_date)
+        values (%s, %s, %s)
+    """,
+    'insert_game': """
+        insert into game (season, game_number, home_player_id, away_player_id)
+        values (%s, %s, %s, %s)
+    """,
+    'update_season_postseason_start_game': """
+        update season
+        set postseason_start_game = %s
+        where start_date = %s
+    """,
+    'is_player_in_db': """
+        select exists (
+            select 1
+            from player
+            where name_key = lower(%s)
+        )
+    """,
+    'is_role_in_db': """
+        select exists (
+            select 1
+            from role
+            where role_name_key = lower(%s)
+        )
+    """,
+    'get_player_names': """
+        select name
+        from player
+    """,
+    'get_role_names': """
+        select role_name
+        from role
+    """,
+    'get_season_start_dates': """
+        select start_date
+        from season
+    """,
+    'get_footwear_names': """
+        select footwear_name
+        from footwear
+    """,
+    'get_footwear_id': """
+        select footwear_id
+        from footwear
+        where footwear_name = %s
+        limit 1
+    """,
+    'get_player_id': """
+        select player_id
+        from player
+        where name = %s
+        limit 1
+    """,
+    'get_player_details': """
+        select
+            name,
+            player_id
+        from player
+        where name = %s
+        limit 1
+    """,
+    'get_player_image_sizes': """
+        select
+            length(logo),
+            length(headshot),
+            length(logo_thumbnail),
+            length(headshot_thumbnail)
+        from player
+        where player_id = %s
+    """,
+    'get_player_logo_chunk': """
+        select substring(logo, %s, %s)
+        from player
+        where player_id = %s
+    """,
+    'get_player_headshot_chunk': """
+        select substring(headshot, %s, %s)
+        from player
+        where player_id = %s
+    """,
+    'get_player_logo_thumbnail_chunk': """
+        select substring(logo_thumbnail, %s, %s)
+        from player
+        where player_id = %s
+    """,
+    'get_player_headshot_thumbnail_chunk': """
+        select substring(headshot_thumbnail, %s, %s)
+        from player
+        where player_id = %s
+    """,
+    'update_player_logo_thumbnail': """
+        update player
+        set logo_thumbnail = %s
+        where player_id = %s
+    """,
+    'update_player_headshot_thumbnail': """
+        update player
+        set headshot_thumbnail = %s
+        where player_id = %s
+    """,
+    'get_next_unplayed_game_details': """
+        select
+            g.game_id,
+            g.season,
+            g.game_number,
+            p_home.name as 'home_player_name',
+            p_away.name as 'away_player_name'
+        from game g
+        inner join player p_home on (g.home_player_id = p_home.player_id)
+        inner join player p_away on (g.away_player_id = p_away.player_id)
+        where g.played = false
+        order by g.season, g.game_number
+        limit 1
+    """,
+    'update_game_played': """
+        update game
+        set played = true
+        where game_id = %s
+    """,
+    'insert_standings': """
+        insert ignore into standing (season, player_id)
+        select season, home_player_id from game where game_id = %s
+        union all
+        select season, away_player_id from game where game_id = %s
+    """,
+    'insert_standing': """
+        insert ignore into standing (season, player_id)
+        select season, %s from game where game_id = %s
+    """,
+    'update_home_standing': """
+        update standing
+        set
+            games_played = games_played + 1,
+            wins = wins + %s,
+            losses = losses + %s,
+            ties = ties + %s,
+            point_differential = point_differential + %s,
+            home_wins = home_wins + %s,
+            home_losses = home_losses + %s,
+            home_ties = home_ties + %s
+        where (season, player_id) = (select season, home_player_id from game where game_id = %s)
+    """,
+    'update_away_standing': """
+        update standing
+        set
+            games_played = games_played + 1,
+            wins = wins + %s,
+            losses = losses + %s,
+            ties = ties + %s,
+            point_differential = point_differential + %s,
+            away_wins = away_wins + %s,
+            away_losses = away_losses + %s,
+            away_ties = away_ties + %s
+        where (season, player_id) = (select season, away_player_id from game where game_id = %s)
+    """,
+    'get_game_player_ids': """
+        select home_player_id, away_player_id
+        from game
+        where game_id = %s
+    """,
+    'delete_standings': """
+        delete from standing
+    """,
+    'rebuild_standings': """
+        insert into standing (season, player_id, games_played, wins, losses, ties, point_differential, home_wins,
+                              home_losses, home_ties, away_wins, away_losses, away_ties)
+        select
+            g.season,
+            pg.player_id,
+            count(*),
+            sum(case when pg.differential > 0 then 1 else 0 end),
+            sum(case when pg.differential < 0 then 1 else 0 end),
+            sum(case when pg.differential = 0 then 1 else 0 end),
+            sum(pg.differential),
+            sum(case when pg.player_id = g.home_player_id and pg.differential > 0 then 1 else 0 end),
+            sum(case when pg.player_id = g.home_player_id and pg.differential < 0 then 1 else 0 end),
+            sum(case when pg.player_id = g.home_player_id and pg.differential = 0 then 1 else 0 end),
+            sum(case when pg.player_id = g.away_player_id and pg.differential > 0 then 1 else 0 end),
+            sum(case when pg.player_id = g.away_player_id and pg.differential < 0 then 1 else 0 end),
+            sum(case when pg.player_id = g.away_player_id and pg.differential = 0 then 1 else 0 end)
+        from player_game pg
+        inner join game g on (pg.game_id = g.game_id)
+        group by g.season, pg.player_id
+    """,
+    'get_standings': """
+        select
+            p.name,
+            s.games_played,
+            s.wins,
+            s.losses,
+            s.ties,
+            s.point_differential,
+            s.home_wins,
+            s.home_losses,
+            s.home_ties,
+            s.away_wins,
+            s.away_losses,
+            s.away_ties
+        from standing s
+        inner join player p on (s.player_id = p.player_id)
+        where s.season = %s
+        order by s.wins desc, s.point_differential desc, p.name
+    """,
+    'get_player_game_totals': """
+        select
+            g.season,
+            pg.player_id,
+            p.name,
+            pg.player_id = g.home_player_id as is_home,
+            f.footwear_name,
+            count(*),
+            sum(pg.differential),
+            sum(pg.knockovers),
+            sum(pg.own_cups),
+            sum(pg.aces),
+            sum(pg.serve_breaks),
+            sum(pg.penalty_shots_made),
+            sum(pg.penalty_shots_attempted),
+            sum(pg.penalties_committed)
+        from player_game pg
+        inner join game g on (pg.game_id = g.game_id)
+        inner join player p on (pg.player_id = p.player_id)
+        inner join footwear f on (pg.footwear_id = f.footwear_id)
+        group by g.season, pg.player_id, p.name, is_home, f.footwear_name
+    """,
+    'count_game_player_games': """
+        select count(*)
+        from player_game
+        where game_id = %s
+    """,
+    'get_game_player_ratings': """
+        select player_id, rating
+        from player_rating
+        where player_id in (%s, %s)
+    """,
+    'update_game_player_ratings': """
+        insert into player_rating (player_id, rating, games_rated)
+        values (%s, %s, 1), (%s, %s, 1)
+        on duplicate key update rating = values(rating), games_rated = games_rated + 1
+    """,
+    'insert_game_rating_history': """
+        insert into rating_history (game_id, player_id, rating_before, rating_after)
+        values (%s, %s, %s, %s), (%s, %s, %s, %s)
+    """,
+    'insert_player_rating': """
+        insert into player_rating (player_id, rating, games_rated)
+        values (%s, %s, %s)
+    """,
+    'insert_rating_history': """
+        insert into rating_history (game_id, player_id, rating_before, rating_after)
+        values (%s, %s, %s, %s)
+    """,
+    'get_rated_games': """
+        select
+            g.game_id,
+            g.home_player_id,
+            g.away_player_id,
+            pg_home.differential
+        from game g
+        inner join player_game pg_home on (g.game_id = pg_home.game_id and g.home_player_id = pg_home.player_id)
+        inner join player_game pg_away on (g.game_id = pg_away.game_id and g.away_player_id = pg_away.player_id)
+        order by g.season, g.game_number
+    """,
+    'delete_rating_history': """
+        delete from rating_history
+    """,
+    'delete_player_ratings': """
+        delete from player_rating
+    """,
+    'delete_rating_parameters': """
+        delete from rating_parameters
+    """,
+    'get_rating_parameters': """
+        select initial_rating, k_factor, rating_scale
+        from rating_parameters
+    """,
+    'insert_rating_parameters': """
+        insert into rating_parameters (initial_rating, k_factor, rating_scale)
+        values (%s, %s, %s)
+    """,
+    'get_player_ratings': """
+        select
+            p.name,
+            coalesce(r.rating, %s) as current_rating,
+            coalesce(r.games_rated, 0)
+        from player p
+        left join player_rating r on (p.player_id = r.player_id)
+        order by current_rating desc, p.name
+    """,
+    'get_player_rating_history': """
+        select
+            g.season,
+            g.game_number,
+            h.rating_before,
+            h.rating_after
+        from rating_history h
+        inner join game g on (h.game_id = g.game_id)
+        where h.player_id = %s
+        order by g.season, g.game_number
+    """,
+    'get_season_game_number_range': """
+        select min(game_number), max(game_number)
+        from game
+        where season = %s
+    """,
+    'get_schedule_page': """
+        select
+            g.game_number,
+            p_away.name,
+            p_home.name,
+            g.played,
+            pg_home.differential
+        from game g
+        inner join player p_home on (g.home_player_id = p_home.player_id)
+        inner join player p_away on (g.away_player_id = p_away.player_id)
+        left join player_game pg_home on (g.game_id = pg_home.game_id and g.home_player_id = pg_home.player_id)
+        where g.season = %s and g.game_number > %s and g.game_number <= %s
+        order by g.game_number
+    """,
+    'is_table_in_db': """
+        select exists (
+            select 1
+            from information_schema.tables
+            where table_schema = database() and table_name = %s
+        )
+    """,
+    'get_schema_version': """
+        select version
+        from schema_version
+    """,
+    'insert_schema_version': """
+        insert into schema_version (version)
+        values (%s)
+    """,
+    'update_schema_version': """
+        update schema_version
+        set version = %s
+    """
+}
+
+# Columns of each table copied by league exports and imports, with their types. Tables only refer to tables before them,
+# so they're imported in this order. Standings and ratings are made again from the imported games instead of copied
+EXPORT_TABLE_COLUMNS = {
+    'role': [('role_id', 'int'), ('role_name', 'text')],
+    'player': [('player_id', 'int'), ('name', 'text'), ('logo', 'blob'), ('headshot', 'blob'),
+               ('logo_thumbnail', 'blob'), ('headshot_thumbnail', 'blob')],
+    'player_role': [('player_id', 'int'), ('role_id', 'int')],
+    'season': [('start_date', 'date'), ('end_date', 'date'), ('postseason_start_game', 'int')],
+    'game': [('game_id', 'int'), ('season', 'date'), ('game_number', 'int'), ('home_player_id', 'int'),
+             ('away_player_id', 'int'), ('played', 'bool')],
+    'footwear': [('footwear_id', 'int'), ('footwear_name', 'text')],
+    'player_game': [('player_id', 'int'), ('game_id', 'int'), ('footwear_id', 'int'), ('differential', 'int'),
+                    ('knockovers', 'int'), ('own_cups', 'int'), ('aces', 'int'), ('serve_breaks', 'int'),
+                    ('penalty_shots_made', 'int'), ('penalty_shots_attempted', 'int'),
+                    ('penalties_committed', 'int')]
+}
+for export_table_name, export_columns in EXPORT_TABLE_COLUMNS.items():
+    export_column_names = ', '.join(column_name for column_name, _ in export_columns)
+    QUERIES['export_' + export_table_name] = 'select {} from {}'.format(export_column_names, export_table_name)
+    QUERIES['import_' + export_table_name] = 'insert into {} ({}) values ({})'.format(
+        export_table_name, export_column_names, ', '.join(['%s'] * len(export_columns)))
+    QUERIES['has_rows_' + export_table_name] = 'select exists (select 1 from {})'.format(export_table_name)
+
+# Changes to the schema made by reset_database_schema, applied in order to bring existing databases up to date without
+# a reset. The schema version is the number of migrations applied, so each migration is a single statement and an
+# interrupted migration continues from where it stopped. Migrations that can't be written the same way for every
+# storage backend give a statement by backend name, or None if a backend doesn't need it. Only ever add migrations to
+# the end
+SCHEMA_MIGRATIONS = [
+    # Each player plays a game once, and the key indexes player games by game
+    {
+        'mysql': 'alter table player_game add primary key (game_id, player_id)',
+        'sqlite': 'create unique index player_game_key on player_game (game_id, player_id)'
+    },
+    {
+        'mysql': 'alter table game add unique index game_season_game_number (season, game_number)',
+        'sqlite': 'create unique index game_season_game_number on game (season, game_number)'
+    },
+    # Whether a game has been played is kept on the game, so the next unplayed game is found from an index instead of
+    # checking every game against player_game
+    'alter table game add column played boolean not null default false',
+    {
+        'mysql': """
+            update game g
+            set played = exists (
+                select 1
+                from player_game pg
+                where pg.game_id = g.game_id
+            )
+        """,
+        'sqlite': """
+            update game
+            set played = exists (
+                select 1
+                from player_game pg
+                where pg.game_id = game.game_id
+            )
+        """
+    },
+    {
+        'mysql': 'alter table game add index game_next_unplayed (played, season, game_number)',
+        'sqlite': 'create index game_next_unplayed on game (played, season, game_number)'
+    },
+    # Replaced by the name key columns added later, since their collation needs MySQL 8.0 and a utf8mb4 table. Databases
+    # that already have it keep it, which is harmless
+    {
+        'mysql': None,
+        'sqlite': None
+    },
+    {
+        'mysql': None,
+        'sqlite': None
+    },
+    # Images resized to the size they're shown at, made when players are inserted
+    'alter table player add column logo_thumbnail mediumblob',
+    'alter table player add column headshot_thumbnail mediumblob',
+    # Standings of each player in each season, kept up to date as games are recorded so they're read without going
+    # through every player game
+    """
+        create table standing (
+            season date not null,
+            player_id int not null,
+            games_played int not null default 0,
+            wins int not null default 0,
+            losses int not null default 0,
+            ties int not null default 0,
+            point_differential int not null default 0,
+            home_wins int not null default 0,
+            home_losses int not null default 0,
+            home_ties int not null default 0,
+            away_wins int not null default 0,
+            away_losses int not null default 0,
+            away_ties int not null default 0,
+            primary key (season, player_id),
+            foreign key (season) references season(start_date),
+            foreign key (player_id) references player(player_id)
+        )
+    """,
+    QUERIES['rebuild_standings'],
+    # Current rating of each player and the ratings each game changed, kept up to date as games are recorded. Ratings
+    # of games recorded before these are filled in by connect_backend, since the rating parameters they were made with
+    # aren't stored yet
+    """
+        create table player_rating (
+            player_id int not null,
+            rating double not null,
+            games_rated int not null,
+            primary key (player_id),
+            foreign key (player_id) references player(player_id)
+        )
+    """,
+    """
+        create table rating_history (
+            game_id int not null,
+            player_id int not null,
+            rating_before double not null,
+            rating_after double not null,
+            primary key (game_id, player_id),
+            foreign key (game_id) references game(game_id),
+            foreign key (player_id) references player(player_id)
+        )
+    """,
+    """
+        create table rating_parameters (
+            initial_rating double not null,
+            k_factor double not null,
+            rating_scale double not null
+        )
+    """,
+    # Lower case names compared exactly, so existence checks ignore case but not accents, like comparing lower() in
+    # Python, and are done by an index. SQLite names already ignore case from when their tables were created
+    {
+        'mysql': """
+            alter table player
+            add column name_key varchar(50) character set utf8mb4 collate utf8mb4_bin as (lower(name)) stored,
+            add index player_name_key (name_key)
+        """,
+        'sqlite': None
+    },
+    {
+        'mysql': """
+            alter table role
+            add column role_name_key varchar(50) character set utf8mb4 collate utf8mb4_bin as (lower(role_name)) stored,
+            add index role_name_key (role_name_key)
+        """,
+        'sqlite': None
+    }
+]
+
+
 class Table(Enum):
     ROLE = auto(),
     PLAYER = auto(),
@@ -11,67 +606,319 @@ class Table(Enum):
     SEASON = auto(),
     GAME = auto(),
     FOOTWEAR = auto(),
-    PLAYER_GAME = auto()
+    PLAYER_GAME = auto(),
+    STANDING = auto(),
+    RATING = auto()
+
+
+class PlayerImage(Enum):
+    LOGO = auto(),
+    HEADSHOT = auto(),
+    LOGO_THUMBNAIL = auto(),
+    HEADSHOT_THUMBNAIL = auto()
+
+
+# Player images in the order of their sizes from the get_player_image_sizes query
+PLAYER_IMAGE_SIZE_ORDER = [PlayerImage.LOGO, PlayerImage.HEADSHOT, PlayerImage.LOGO_THUMBNAIL,
+                           PlayerImage.HEADSHOT_THUMBNAIL]
+# Queries reading a piece of each player image
+PLAYER_IMAGE_CHUNK_QUERIES = {
+    PlayerImage.LOGO: 'get_player_logo_chunk',
+    PlayerImage.HEADSHOT: 'get_player_headshot_chunk',
+    PlayerImage.LOGO_THUMBNAIL: 'get_player_logo_thumbnail_chunk',
+    PlayerImage.HEADSHOT_THUMBNAIL: 'get_player_headshot_thumbnail_chunk'
+}
+# Queries storing each thumbnail
+PLAYER_THUMBNAIL_UPDATE_QUERIES = {
+    PlayerImage.LOGO_THUMBNAIL: 'update_player_logo_thumbnail',
+    PlayerImage.HEADSHOT_THUMBNAIL: 'update_player_headshot_thumbnail'
+}
+
+
+# Lookup queries whose results are cached, and the table whose changes make them out of date
+CACHED_QUERY_TABLES = {
+    'is_player_in_db': Table.PLAYER,
+    'is_role_in_db': Table.ROLE,
+    'get_player_names': Table.PLAYER,
+    'get_player_id': Table.PLAYER,
+    'get_role_names': Table.ROLE,
+    'get_season_start_dates': Table.SEASON,
+    'get_footwear_names': Table.FOOTWEAR,
+    'get_footwear_id': Table.FOOTWEAR
+}
 
 
 class PPPLDatabase:
-    def __init__(self):
-        self.db_connection = None
-        self.db_cursor = None
-        self.insertion_callbacks_dict = {}  # Used to keep track of callbacks to call after an insert/update statement
-        for table in Table:  # Each table successfully inserting may trigger different callbacks
-            self.insertion_callbacks_dict[table] = []
+    def __init__(self, lookup_cache_ttl_s=None):
+        """
+        :param lookup_cache_ttl_s: Seconds after which cached lookups are run again even if their tables didn't change,
+        or None to keep them until their tables change
+        """
+        self.backend = None  # Storage backend connected to
+        self.queries = {}  # Queries from QUERIES written for the connected backend
+        self.thread_connections = threading.local()  # Each thread gets its own connection
+        self.open_connections = []  # All connections opened by threads, so they can be closed on disconnect
+        self.open_connections_lock = threading.Lock()
+        self.query_execution_counts = {name: 0 for name in QUERIES}  # Number of times each query has been run
+        self.query_execution_counts_lock = threading.Lock()
+        self.change_events = ChangeEventBus()  # Notifies listeners of tables changed by inserts/updates
+        self.lookup_cache = {}  # Results of cached queries by query name and parameters, with the time they were run
+        self.lookup_cache_lock = threading.Lock()
+        self.lookup_cache_ttl_s = lookup_cache_ttl_s
+        self.lookup_cache_generation = 0  # Increased on every invalidation, so lookups run before one aren't cached
 
     def connect_server(self, host, user, password, b_reset_schema=False):
         """
-        Connects to MySQL server and keeps connection open until this is called again or the connection is closed
+        Connects to MySQL server and keeps a pool of connections open until this is called again or the connections
+        are closed
         :param host: Host name/IP to connect to
         :param user: User on host to log in with
         :param password: User password
         :param b_reset_schema: Whether schema should be reset upon connection
         """
+        try:
+            backend = MySQLBackend(host, user, password)
+        except Exception:
+            error_reporting.report_error(get_error())
+            return
+        self.connect_backend(backend, b_reset_schema)
+
+    def connect_file(self, path=DEFAULT_SQLITE_FILE, b_reset_schema=False):
+        """
+        Opens a local SQLite database file, which needs no server
+        :param path: Path of database file, which is created if it doesn't exist
+        :param b_reset_schema: Whether schema should be reset upon connection
+        """
+        self.connect_backend(SQLiteBackend(path), b_reset_schema)
+
+    def connect_backend(self, backend, b_reset_schema=False):
+        """
+        Connects to a storage backend, keeping it until this is called again or the connections are closed
+        :param backend: Storage backend from storage_backends
+        :param b_reset_schema: Whether schema should be reset upon connection
+        """
         # If trying to connect to something else, make sure to close previous database first
         self.disconnect_server()
         try:
-            self.db_connection = mysql.connector.connect(host=host, user=user, password=password)
-            self.db_cursor = self.db_connection.cursor()
-            self.db_cursor.execute('use pppl')
-            # Reset schema if told to
-            if b_reset_schema:
-                self.reset_database_schema()
-            # Notify via callbacks that server is now connected and database is available
-            for table in Table:
-                for callback in self.insertion_callbacks_dict[table]:
-                    callback()
+            backend.connect()
+            self.backend = backend
+            self.queries = {name: backend.translate_query(name, query) for name, query in QUERIES.items()}
+            # Reset schema if told to or if there isn't one yet, otherwise bring existing schema up to date
+            if b_reset_schema or not self._is_table_in_db('player'):
+                b_schema_ready = self.reset_database_schema()
+            else:
+                b_schema_ready = self.migrate_schema()
+            # Queries are written for the latest schema, so a database that couldn't be brought up to date isn't used
+            if not b_schema_ready:
+                self.disconnect_server()
+                error_reporting.report_error('Database schema could not be brought up to date, so it was disconnected')
+                return
+            self._replay_ratings_if_out_of_date()
+            # Notify listeners that server is now connected and database is available
+            self._notify_changed(list(Table))
         except Exception:
+            self.disconnect_server()
             error_reporting.report_error(get_error())
             return
 
+    def _is_table_in_db(self, table_name):
+        return self._execute_query('is_table_in_db', (table_name,)).fetchall()[0][0] == 1
+
     def disconnect_server(self):
         """
-        Close connection to MySQL server if the connection is opened
+        Close all connections to the database that are opened
+        """
+        with self.open_connections_lock:
+            for connection in self.open_connections:
+                try:
+                    connection.close()
+                except Exception:
+                    pass  # Connection is already gone
+            self.open_connections = []
+        self.backend = None
+        self.thread_connections = threading.local()
+        self.invalidate_lookup_cache()
+
+    def release_thread_connection(self):
+        """
+        Close the connection of the calling thread, returning it to the pool for MySQL. Threads other than the GUI
+        thread should call this once they are done with the database
+        """
+        connection = getattr(self.thread_connections, 'connection', None)
+        if connection is None:
+            return
+        self.thread_connections.connection = None
+        self.thread_connections.prepared_cursors = {}
+        with self.open_connections_lock:
+            if connection in self.open_connections:
+                self.open_connections.remove(connection)
+        try:
+            connection.close()  # Closing a pooled connection returns it to the pool
+        except Exception:
+            pass  # Connection is already gone
+
+    def _get_connection(self):
+        """
+        Get the connection of the calling thread, opening one if the thread doesn't have one yet. Checks that a
+        connection left idle for a while is still alive, reconnecting it if it isn't
+        :return: Connection to database
+        """
+        if self.backend is None:
+            raise ConnectionError('Not connected to a database')
+        connection = getattr(self.thread_connections, 'connection', None)
+        if connection is None:
+            connection = self.backend.get_connection()
+            with self.open_connections_lock:
+                self.open_connections.append(connection)
+            self.thread_connections.connection = connection
+            self.thread_connections.prepared_cursors = {}
+        elif time.monotonic() - self.thread_connections.last_used > CONNECTION_IDLE_CHECK_SECONDS \
+                and not self.backend.is_in_transaction(connection):
+            if self.backend.check_connection(connection):
+                # Prepared statements don't survive a reconnect, so prepare them again on next use
+                self.thread_connections.prepared_cursors = {}
+        self.thread_connections.last_used = time.monotonic()
+        return connection
+
+    def _run_statement(self, statement):
+        """
+        Run a statement on the calling thread's connection. If the connection was lost outside of a transaction, the
+        statement is run again on a new connection
+        :param statement: Function taking no arguments that runs the statement and returns its cursor
+        :return: Cursor holding results of statement
+        """
+        connection = self._get_connection()
+        try:
+            return statement()
+        except self.backend.connection_errors:
+            # Statements of an unfinished transaction would be lost, so only retry outside of one
+            if self.backend.is_in_transaction(connection):
+                raise
+            self.release_thread_connection()
+            return statement()
+
+    def _count_query(self, name):
+        with self.query_execution_counts_lock:
+            self.query_execution_counts[name] += 1
+
+    def _get_prepared_cursor(self, name):
+        """
+        Get the prepared cursor of a query for the calling thread's connection, preparing the query on first use
+        :param name: Name of query in QUERIES
+        :return: Prepared cursor of query
+        """
+        connection = self._get_connection()
+        prepared_cursors = self.thread_connections.prepared_cursors
+        if name not in prepared_cursors:
+            prepared_cursors[name] = self.backend.get_prepared_cursor(connection)
+        return prepared_cursors[name]
+
+    def _execute_query(self, name, params=()):
+        """
+        Run a query from QUERIES with bound parameters on its prepared statement
+        :param name: Name of query in QUERIES
+        :param params: Parameters of query
+        :return: Cursor holding results of query
+        """
+        self._count_query(name)
+
+        def statement():
+            cursor = self._get_prepared_cursor(name)
+            cursor.execute(self.queries[name], params)
+            return cursor
+        return self._run_statement(statement)
+
+    def _execute_query_many(self, name, params_list):
+        """
+        Run a query from QUERIES for each set of parameters. Uses a regular cursor, since the connector sends it as a
+        single multi-row insert while a prepared cursor would run the statement once per row
+        :param name: Name of query in QUERIES
+        :param params_list: List of parameters of query
+        :return: Cursor of query
+        """
+        self._count_query(name)
+        cursor = self._get_connection().cursor()
+        cursor.executemany(self.queries[name], params_list)
+        return cursor
+
+    def _execute(self, query, params=None):
+        """
+        Run a statement that isn't in QUERIES, like schema changes, on a new cursor. Statements are written for MySQL
+        and translated for the connected backend
+        :param query: Statement to run
+        :param params: Parameters of statement
+        :return: Cursor holding results of statement
+        """
+        def statement():
+            cursor = self._get_connection().cursor()
+            cursor.execute(self.backend.translate_schema(query), () if params is None else params)
+            return cursor
+        return self._run_statement(statement)
+
+    def _execute_cached_query(self, name, params=()):
+        """
+        Run a lookup query from CACHED_QUERY_TABLES, returning its cached result instead if there is one
+        :param name: Name of query in QUERIES
+        :param params: Parameters of query
+        :return: List of result rows
+        """
+        key = (name, params)
+        with self.lookup_cache_lock:
+            if key in self.lookup_cache:
+                raw_result, cached_time = self.lookup_cache[key]
+                if self.lookup_cache_ttl_s is None or time.monotonic() - cached_time < self.lookup_cache_ttl_s:
+                    return raw_result
+            generation = self.lookup_cache_generation
+        raw_result = self._execute_query(name, params).fetchall()
+        with self.lookup_cache_lock:
+            # Result may be stale if the cache was invalidated while the lookup ran, so it's only returned
+            if generation == self.lookup_cache_generation:
+                self.lookup_cache[key] = (raw_result, time.monotonic())
+        return raw_result
+
+    def invalidate_lookup_cache(self, table=None):
+        """
+        Remove cached lookups so they are run again on next use. Called whenever a table changes
+        :param table: Table whose lookups to remove, or None to remove all of them
+        """
+        with self.lookup_cache_lock:
+            self.lookup_cache = {key: value for key, value in self.lookup_cache.items()
+                                 if table is not None and CACHED_QUERY_TABLES[key[0]] != table}
+            self.lookup_cache_generation += 1
+
+    def get_query_execution_counts(self):
+        """
+        :return: Dictionary of number of times each query in QUERIES has been run since this database was created
         """
-        if self.db_connection is not None:
-            self.db_connection.close()
+        with self.query_execution_counts_lock:
+            return dict(self.query_execution_counts)
 
     def reset_database_schema(self):
+        """
+        Drop every table and create them again, then apply all schema migrations
+        :return: Whether schema was reset
+        """
         try:
-            self.db_cursor.execute('create database if not exists pppl')
-            self.db_cursor.execute('drop table if exists player_game')
-            self.db_cursor.execute('drop table if exists footwear')
-            self.db_cursor.execute('drop table if exists game')
-            self.db_cursor.execute('drop table if exists season')
-            self.db_cursor.execute('drop table if exists player_role')
-            self.db_cursor.execute('drop table if exists player')
-            self.db_cursor.execute('drop table if exists role')
-            self.db_cursor.execute("""
+            self._execute('drop table if exists schema_version')
+            self._execute('drop table if exists standing')
+            self._execute('drop table if exists rating_history')
+            self._execute('drop table if exists player_rating')
+            self._execute('drop table if exists rating_parameters')
+            self._execute('drop table if exists player_game')
+            self._execute('drop table if exists footwear')
+            self._execute('drop table if exists game')
+            self._execute('drop table if exists season')
+            self._execute('drop table if exists player_role')
+            self._execute('drop table if exists player')
+            self._execute('drop table if exists role')
+            self._execute("""
                 create table role (
                     role_id int not null unique auto_increment,
                     role_name varchar(50) not null unique,
                     primary key (role_id)
                 )
             """)
-            self.db_cursor.execute("""
+            self._execute("""
                 create table player (
                     player_id int not null unique auto_increment,
                     name varchar(50) not null unique,
@@ -80,7 +927,7 @@ class PPPLDatabase:
                     primary key (player_id)
                 )
             """)
-            self.db_cursor.execute("""
+            self._execute("""
                 create table player_role (
                     player_id int not null,
                     role_id int not null,
@@ -88,7 +935,7 @@ class PPPLDatabase:
                     foreign key (role_id) references role(role_id)
                 )
             """)
-            self.db_cursor.execute("""
+            self._execute("""
                 create table season (
                     start_date date not null unique,
                     end_date date unique,
@@ -96,7 +943,7 @@ class PPPLDatabase:
                     primary key (start_date)
                 )
             """)
-            self.db_cursor.execute("""
+            self._execute("""
                 create table game (
                     game_id int not null unique auto_increment,
                     season date not null,
@@ -109,13 +956,13 @@ class PPPLDatabase:
                     foreign key (away_player_id) references player(player_id)
                 )
             """)
-            self.db_cursor.execute("""
+            self._execute("""
                 create table footwear (
                     footwear_id int not null unique auto_increment,
                     footwear_name varchar(50) not null unique
                 )
             """)
-            self.db_cursor.execute("""
+            self._execute("""
                 create table player_game (
                     player_id int not null,
                     game_id int not null,
@@ -135,205 +982,453 @@ class PPPLDatabase:
             """)
         except Exception:
             error_reporting.report_error(get_error())
+            return False
+        return self.migrate_schema()
+
+    def migrate_schema(self):
+        """
+        Apply schema migrations the database doesn't have yet
+        :return: Whether schema is up to date
+        """
+        try:
+            self._execute('create table if not exists schema_version (version int not null)')
+            raw_result = self._execute_query('get_schema_version').fetchall()
+            if len(raw_result) == 0:
+                # Databases from before migrations have none of them applied
+                version = 0
+                self._execute_query('insert_schema_version', (version,))
+                self._get_connection().commit()
+            else:
+                version = raw_result[0][0]
+            for migration in range(version, len(SCHEMA_MIGRATIONS)):
+                statement = SCHEMA_MIGRATIONS[migration]
+                if isinstance(statement, dict):
+                    statement = statement[self.backend.name]
+                if statement is not None:
+                    self._execute(statement)
+                self._execute_query('update_schema_version', (migration + 1,))
+                self._get_connection().commit()
+        except Exception:
+            self.rollback()
+            error_reporting.report_error(get_error())
+            return False
+        return True
 
     # INSERT INTO
 
     def insert_player(self, name, logo=None, headshot=None):
-        field_str = 'name'
-        values_str = '%s'
-        values = [name]
-        if logo is not None:
-            field_str += ', logo'
-            values_str += ',%s'
-            values.append(logo)
-        if headshot is not None:
-            field_str += ', headshot'
-            values_str += ',%s'
-            values.append(headshot)
-        try:
-            self.db_cursor.execute(
-                'insert into player (' + field_str + ') values (' + values_str + ')', tuple(values))
-            self.db_connection.commit()
+        """
+        :param name: Name of player
+        :param logo: Logo image file contents, or None if player has no logo
+        :param headshot: Headshot image file contents, or None if player has no headshot
+        :return: Whether player was inserted, which they aren't if an image can't be read
+        """
+        # Imported here so PIL is only loaded once it's needed
+        import player_images
+        try:
+            # Thumbnails are made once here so showing players never has to resize their images. Making them also
+            # checks images are valid before anything is inserted
+            logo_thumbnail = player_images.make_thumbnail(logo)
+            headshot_thumbnail = player_images.make_thumbnail(headshot)
         except Exception:
+            error_reporting.report_error('Player image could not be read\n\t' + get_error())
+            return False
+        try:
+            self._execute_query('insert_player', (name, logo, headshot, logo_thumbnail, headshot_thumbnail))
+            self._get_connection().commit()
+        except Exception:
+            self.rollback()
             error_reporting.report_error(get_error())
-            return
-        # Perform callbacks upon successful insertion of player
-        for callback in self.insertion_callbacks_dict[Table.PLAYER]:
-            callback()
+            return False
+        # Notify listeners of successful insertion of player
+        self._notify_changed([Table.PLAYER])
+        return True
 
     def insert_role(self, role_name):
         try:
-            self.db_cursor.execute(
-                "insert into role (role_name) values ('" + role_name + "')")
-            self.db_connection.commit()
-        except mysql.connector.IntegrityError:
+            self._execute_query('insert_role', (role_name,))
+            self._get_connection().commit()
+        except self.backend.IntegrityError:
             pass  # Ignore if role already exists
         except Exception:
             error_reporting.report_error(get_error())
             return
-        # Perform callbacks upon successful insertion of role
-        for callback in self.insertion_callbacks_dict[Table.ROLE]:
-            callback()
+        # Notify listeners of successful insertion of role
+        self._notify_changed([Table.ROLE])
 
     def insert_player_role(self, player_name, role_name):
         try:
-            self.db_cursor.execute("""
-                insert into player_role (
-                    player_id,
-                    role_id
-                ) 
-                values (
-                    (
-                        select player_id
-                        from player
-                        where name = '""" + player_name + """'
-                    ),
-                    (
-                        select role_id
-                        from role
-                        where role_name = '""" + role_name + """'
-                    )
-                )
-            """)
-            self.db_connection.commit()
+            self._execute_query('insert_player_role', (player_name, role_name))
+            self._get_connection().commit()
         except Exception:
             error_reporting.report_error(get_error())
             return
-        # Perform callbacks upon successful insertion of role
-        for callback in self.insertion_callbacks_dict[Table.PLAYER_ROLE]:
-            callback()
+        # Notify listeners of successful insertion of role
+        self._notify_changed([Table.PLAYER_ROLE])
 
     def insert_player_game(self, player_id, game_id, footwear_id, differential, knockovers, own_cups, aces,
                            serve_breaks, penalty_shots_made, penalty_shots_attempted, penalties_committed):
         try:
-            self.db_cursor.execute("""
-                insert into player_game (
-                    player_id,
-                    game_id,
-                    footwear_id,
-                    differential,
-                    knockovers,
-                    own_cups,
-                    aces,
-                    serve_breaks,
-                    penalty_shots_made,
-                    penalty_shots_attempted,
-                    penalties_committed
-                )
-                values (""" +
-                    str(player_id) + ',' +
-                    str(game_id) + ',' +
-                    str(footwear_id) + ',' +
-                    str(differential) + ',' +
-                    str(knockovers) + ',' +
-                    str(own_cups) + ',' +
-                    str(aces) + ',' +
-                    str(serve_breaks) + ',' +
-                    str(penalty_shots_made) + ',' +
-                    str(penalty_shots_attempted) + ',' +
-                    str(penalties_committed) + """
-                )"""
-            )
-            self.db_connection.commit()
+            self._execute_query('insert_player_game', (
+                player_id, game_id, footwear_id, differential, knockovers, own_cups, aces, serve_breaks,
+                penalty_shots_made, penalty_shots_attempted, penalties_committed))
+            self._execute_query('update_game_played', (game_id,))
+            home_player_id, away_player_id = self._execute_query('get_game_player_ids', (game_id,)).fetchall()[0]
+            # Only the recorded player gets a standing, like when standings are rebuilt from player games
+            self._execute_query('insert_standing', (player_id, game_id))
+            self._update_standing(game_id, player_id == home_player_id, differential)
+            # Game is rated once both players' games are recorded
+            if self._execute_query('count_game_player_games', (game_id,)).fetchall()[0][0] == 2:
+                self._update_ratings(game_id, home_player_id, away_player_id,
+                                     int(differential) if player_id == home_player_id else -int(differential))
+            self._get_connection().commit()
         except Exception:
+            self.rollback()
             error_reporting.report_error(get_error())
             return
-        # Perform callbacks upon successful insertion of player game
-        for callback in self.insertion_callbacks_dict[Table.PLAYER_GAME]:
-            callback()
+        # Notify listeners of successful insertion of player game
+        self._notify_changed([Table.PLAYER_GAME, Table.STANDING, Table.RATING])
+
+    def insert_game_result(self, game_id, home_player_game, away_player_game):
+        """
+        Record both players' stats for a game in a single transaction, inserting their footwear if it's new
+        :param game_id: ID of game played
+        :param home_player_game: Dictionary of home player's footwear name and stats, with keys footwear and the stat
+        parameters of insert_player_game
+        :param away_player_game: Same as home_player_game for the away player
+        :return: Whether game result was recorded
+        """
+        params = []
+        for player_game in (home_player_game, away_player_game):
+            params += [game_id, game_id, player_game['footwear'], player_game['differential'],
+                       player_game['knockovers'], player_game['own_cups'], player_game['aces'],
+                       player_game['serve_breaks'], player_game['penalty_shots_made'],
+                       player_game['penalty_shots_attempted'], player_game['penalties_committed']]
+        try:
+            self._execute_query('insert_game_result_footwear', (home_player_game['footwear'],
+                                                                away_player_game['footwear']))
+            self._execute_query('insert_game_result_player_games', tuple(params))
+            self._execute_query('update_game_played', (game_id,))
+            self._execute_query('insert_standings', (game_id, game_id))
+            self._update_standing(game_id, True, home_player_game['differential'])
+            self._update_standing(game_id, False, away_player_game['differential'])
+            home_player_id, away_player_id = self._execute_query('get_game_player_ids', (game_id,)).fetchall()[0]
+            self._update_ratings(game_id, home_player_id, away_player_id, home_player_game['differential'])
+            self._get_connection().commit()
+        except Exception:
+            self.rollback()
+            error_reporting.report_error(get_error())
+            return False
+        # Notify listeners of the whole game result at once
+        self._notify_changed([Table.FOOTWEAR, Table.PLAYER_GAME, Table.STANDING, Table.RATING])
+        return True
+
+    def _update_standing(self, game_id, b_home, differential):
+        """
+        Add a player's game to their standing, which must already exist. Doesn't commit
+        :param game_id: ID of game played
+        :param b_home: Whether player was the home player
+        :param differential: Player's point differential, positive for a win, negative for a loss and 0 for a tie
+        """
+        differential = int(differential)
+        win = 1 if differential > 0 else 0
+        loss = 1 if differential < 0 else 0
+        tie = 1 if differential == 0 else 0
+        self._execute_query('update_home_standing' if b_home else 'update_away_standing',
+                            (win, loss, tie, differential, win, loss, tie, game_id))
+
+    def _update_ratings(self, game_id, home_player_id, away_player_id, home_differential):
+        """
+        Rate a game from its players' current ratings, which takes the same time however many games came before it.
+        Both ratings are read in one statement and written in one statement each, so rating a game takes few round
+        trips. Doesn't commit
+        :param game_id: ID of game played
+        :param home_player_id: ID of home player
+        :param away_player_id: ID of away player
+        :param home_differential: Home player's point differential, so negative if away player won
+        """
+        # Players who haven't been rated yet have no rating stored
+        cursor = self._execute_query('get_game_player_ratings', (home_player_id, away_player_id))
+        player_ratings = dict(cursor.fetchall())
+        home_rating_before = player_ratings.get(home_player_id, ratings.INITIAL_RATING)
+        away_rating_before = player_ratings.get(away_player_id, ratings.INITIAL_RATING)
+        _, k_factor, rating_scale = ratings.get_rating_parameters()
+        home_rating_after, away_rating_after = ratings.rate_game(home_rating_before, away_rating_before,
+                                                                 int(home_differential), k_factor, rating_scale)
+        self._execute_query('update_game_player_ratings', (home_player_id, float(home_rating_after), away_player_id,
+                                                          float(away_rating_after)))
+        self._execute_query('insert_game_rating_history', (
+            game_id, home_player_id, float(home_rating_before), float(home_rating_after),
+            game_id, away_player_id, float(away_rating_before), float(away_rating_after)))
+
+    def replay_ratings(self):
+        """
+        Rate every recorded game again from scratch with the current rating parameters
+        :return: Whether ratings were replayed
+        """
+        try:
+            self._replay_ratings()
+            self._get_connection().commit()
+        except Exception:
+            self.rollback()
+            error_reporting.report_error(get_error())
+            return False
+        self._notify_changed([Table.RATING])
+        return True
+
+    def _replay_ratings(self):
+        # Imported here so NumPy is only loaded once ratings are replayed
+        import numpy as np
+        games = self._execute_query('get_rated_games').fetchall()
+        # Players are numbered from 0 so their ratings can be held in an array
+        game_player_ids = np.array([game[1:3] for game in games], dtype=np.int64).reshape(-1, 2)
+        player_ids, player_indexes = np.unique(game_player_ids, return_inverse=True)
+        player_indexes = player_indexes.reshape(-1, 2)
+        home_differentials = np.array([game[3] for game in games], dtype=np.int64)
+        player_ratings, home_before, away_before, home_after, away_after = ratings.replay_games(
+            player_indexes[:, 0], player_indexes[:, 1], home_differentials, len(player_ids),
+            *ratings.get_rating_parameters())
+        games_rated = np.bincount(player_indexes.ravel(), minlength=len(player_ids))
+        self._execute_query('delete_rating_history')
+        self._execute_query('delete_player_ratings')
+        self._execute_query('delete_rating_parameters')
+        if len(games) > 0:
+            game_ids = [game[0] for game in games]
+            self._execute_query_many('insert_rating_history', list(zip(
+                game_ids, game_player_ids[:, 0].tolist(), home_before.tolist(), home_after.tolist())) + list(zip(
+                game_ids, game_player_ids[:, 1].tolist(), away_before.tolist(), away_after.tolist())))
+            self._execute_query_many('insert_player_rating', list(zip(
+                player_ids.tolist(), player_ratings.tolist(), games_rated.tolist())))
+        self._execute_query('insert_rating_parameters', ratings.get_rating_parameters())
+
+    def _replay_ratings_if_out_of_date(self):
+        """
+        Replay ratings if they were made with different rating parameters, or weren't made yet
+        """
+        raw_result = self._execute_query('get_rating_parameters').fetchall()
+        if len(raw_result) == 0 or tuple(raw_result[0]) != ratings.get_rating_parameters():
+            self.replay_ratings()
+
+    def rebuild_standings(self):
+        """
+        Calculate all standings again from recorded player games, repairing any that are out of date
+        :return: Whether standings were rebuilt
+        """
+        try:
+            self._execute_query('delete_standings')
+            self._execute_query('rebuild_standings')
+            self._get_connection().commit()
+        except Exception:
+            self.rollback()
+            error_reporting.report_error(get_error())
+            return False
+        self._notify_changed([Table.STANDING])
+        return True
 
     def insert_footwear(self, footwear_name):
         try:
-            self.db_cursor.execute("""
-                insert into footwear (footwear_name)
-                values ('""" + footwear_name + """')
-            """)
-            self.db_connection.commit()
-        except mysql.connector.IntegrityError:
+            self._execute_query('insert_footwear', (footwear_name,))
+            self._get_connection().commit()
+        except self.backend.IntegrityError:
             pass  # Ignore if trying to insert an existing footwear
         except Exception:
             error_reporting.report_error(get_error())
-        # Perform callbacks upon successful insertion of footwear
-        for callback in self.insertion_callbacks_dict[Table.FOOTWEAR]:
-            callback()
+        # Notify listeners of successful insertion of footwear
+        self._notify_changed([Table.FOOTWEAR])
 
-    def insert_season(self, start_date, postseason_start_game, end_date=None):
+    def insert_season(self, start_date, postseason_start_game, end_date=None, b_commit=True):
         try:
-            self.db_cursor.execute("""
-                insert into season (start_date, postseason_start_game""" +
-                                   (""", end_date""" if end_date is not None else '') + """)
-                values (
-                    '""" + start_date.strftime('%Y-%m-%d') + "'," +
-                    str(postseason_start_game) +
-                    (", '" + end_date.strftime('%Y-%m-%d') + "'" if end_date is not None else '') +
-                """)
-            """)
-            self.db_connection.commit()
+            self._execute_query('insert_season', (start_date, postseason_start_game, end_date))
+            if not b_commit:
+                return True
+            self._get_connection().commit()
         except Exception:
+            self.rollback()
             error_reporting.report_error(get_error())
-            return
-        # Perform callbacks upon successful insertion of player game
-        for callback in self.insertion_callbacks_dict[Table.SEASON]:
-            callback()
+            return False
+        # Notify listeners of successful insertion of player game
+        self._notify_changed([Table.SEASON])
+        return True
 
     def insert_game(self, season, game_number, home_player_id, away_player_id):
         try:
-            self.db_cursor.execute("""
-                insert into game (season, game_number, home_player_id, away_player_id)
-                values (
-                    '""" + season.strftime('%Y-%m-%d') + "'," +
-                    str(game_number) + ',' +
-                    str(home_player_id) + ',' +
-                    str(away_player_id) + """
-                )
-            """)
-            self.db_connection.commit()
+            self._execute_query('insert_game', (season, game_number, home_player_id, away_player_id))
+            self._get_connection().commit()
         except Exception:
             error_reporting.report_error(get_error())
             return
-        # Perform callbacks upon successful insertion of player game
-        for callback in self.insertion_callbacks_dict[Table.GAME]:
-            callback()
+        # Notify listeners of successful insertion of player game
+        self._notify_changed([Table.GAME])
     
+    def insert_games(self, season, first_game_number, games, b_commit=True):
+        try:
+            # The connector sends an executemany insert as a single multi-row insert statement
+            self._execute_query_many('insert_game', [(season, first_game_number + game, games[game][0], games[game][1])
+                                                     for game in range(len(games))])
+            if not b_commit:
+                return True
+            self._get_connection().commit()
+        except Exception:
+            self.rollback()
+            error_reporting.report_error(get_error())
+            return False
+        # Notify listeners once for the whole batch of games
+        self._notify_changed([Table.GAME])
+        return True
+
+    def insert_season_schedule(self, start_date, games, batch_size=1000, on_progress=None):
+        """
+        Insert a season and all of its games in a single transaction, notifying listeners once
+        :param start_date: Start date of season
+        :param games: Iterable of (home player ID, away player ID) tuples in order of games. Games from a generator are
+        inserted in batches while it generates the rest
+        :param batch_size: Maximum number of games to insert in one statement
+        :param on_progress: Function taking the number of games inserted so far, called after each batch is inserted
+        :return: Whether season was inserted
+        """
+        if not self.start_season_schedule(start_date):
+            return False
+        num_games = 0
+        batch = []
+        try:
+            for game in games:
+                batch.append(game)
+                if len(batch) == batch_size:
+                    if not self.insert_games(start_date, num_games + 1, batch, b_commit=False):
+                        return False
+                    num_games += len(batch)
+                    batch = []
+                    if on_progress is not None:
+                        on_progress(num_games)
+        except Exception:
+            # Schedule couldn't be generated, so the season is removed along with the games saved so far
+            self.rollback()
+            error_reporting.report_error(get_error())
+            return False
+        if len(batch) > 0:
+            if not self.insert_games(start_date, num_games + 1, batch, b_commit=False):
+                return False
+            num_games += len(batch)
+            if on_progress is not None:
+                on_progress(num_games)
+        return self.finish_season_schedule(start_date, num_games)
+
+    def start_season_schedule(self, start_date):
+        """
+        Insert a season without committing, so its games can be inserted in the same transaction with insert_games.
+        Finish the season with finish_season_schedule once all of its games are inserted
+        :param start_date: Start date of season
+        :return: Whether season was inserted
+        """
+        # Postseason starts after the last game, which isn't known until all games are inserted
+        return self.insert_season(start_date, 1, b_commit=False)
+
+    def finish_season_schedule(self, start_date, num_games):
+        """
+        Start the postseason of a season started with start_season_schedule after its last game, then commit the season
+        and its games, notifying listeners once
+        :param start_date: Start date of season
+        :param num_games: Number of games inserted in season
+        :return: Whether season was committed
+        """
+        if not self.update_season_postseason_start_game(start_date, num_games + 1, b_commit=False):
+            return False
+        return self.commit([Table.SEASON, Table.GAME])
+
+    # UPDATE
+
+    def update_season_postseason_start_game(self, start_date, postseason_start_game, b_commit=True):
+        try:
+            self._execute_query('update_season_postseason_start_game', (postseason_start_game, start_date))
+            if not b_commit:
+                return True
+            self._get_connection().commit()
+        except Exception:
+            self.rollback()
+            error_reporting.report_error(get_error())
+            return False
+        # Notify listeners of successful update of season
+        self._notify_changed([Table.SEASON])
+        return True
+
+    def update_player_thumbnail(self, player_id, thumbnail, thumbnail_bytes):
+        """
+        Store a thumbnail made after the player was inserted. Thumbnails only repeat player images, so listeners
+        aren't notified
+        :param player_id: ID of player
+        :param thumbnail: PlayerImage.LOGO_THUMBNAIL or PlayerImage.HEADSHOT_THUMBNAIL
+        :param thumbnail_bytes: Thumbnail file contents
+        """
+        try:
+            self._execute_query(PLAYER_THUMBNAIL_UPDATE_QUERIES[thumbnail], (thumbnail_bytes, player_id))
+            self._get_connection().commit()
+        except Exception:
+            self.rollback()
+            error_reporting.report_error(get_error())
+
+    # TRANSACTIONS
+
+    def commit(self, tables):
+        """
+        Commit statements run without committing, then notify listeners of the changed tables
+        :param tables: Tables changed by the statements
+        :return: Whether commit succeeded
+        """
+        try:
+            self._get_connection().commit()
+        except Exception:
+            self.rollback()
+            error_reporting.report_error(get_error())
+            return False
+        self._notify_changed(tables)
+        return True
+
+    def rollback(self):
+        """
+        Undo statements run since the last commit. Cached lookups are removed since they may have read the undone
+        statements
+        """
+        try:
+            self._get_connection().rollback()
+        except Exception:
+            pass  # Nothing to undo if the connection is gone
+        self.invalidate_lookup_cache()
+
     # SELECT RETURNING BOOLEAN
 
     def is_player_in_db(self, player_name):
         try:
-            self.db_cursor.execute("""
-                select name
-                from player
-            """)
-            raw_result = self.db_cursor.fetchall()
-            if len(raw_result) == 0:
-                return False
-            result = [row[0].lower() for row in raw_result]
-            return player_name.lower() in result
+            if self._execute_cached_query('is_player_in_db', (player_name,))[0][0] == 1:
+                return True
+            return self._is_name_in_names(player_name, 'get_player_names')
         except Exception:
             error_reporting.report_error(get_error())
 
     def is_role_in_db(self, role_name):
         try:
-            self.db_cursor.execute("""
-                select role_name
-                from role
-            """)
-            raw_result = self.db_cursor.fetchall()
-            if len(raw_result) == 0:
-                return False
-            result = [row[0].lower() for row in raw_result]
-            return role_name.lower() in result
+            if self._execute_cached_query('is_role_in_db', (role_name,))[0][0] == 1:
+                return True
+            return self._is_name_in_names(role_name, 'get_role_names')
         except Exception:
             error_reporting.report_error(get_error())
 
+    def _is_name_in_names(self, name, names_query):
+        """
+        Check for a name the backend's existence check may have missed by comparing it to every name in Python
+        :param name: Name to check
+        :param names_query: Cached query of all names to compare it to
+        :return: Whether a name equal to it ignoring case exists
+        """
+        # Only backends whose case folding is limited to ASCII can miss names, and only names that aren't ASCII
+        if self.backend.b_unicode_case_folding or name.isascii():
+            return False
+        return name.lower() in [row[0].lower() for row in self._execute_cached_query(names_query)]
+
     # SELECT RETURNING ONE FIELD
 
     def get_player_names(self):
         try:
-            self.db_cursor.execute("""
-                select name
-                from player
-            """)
-            raw_result = self.db_cursor.fetchall()
+            raw_result = self._execute_cached_query('get_player_names')
             if len(raw_result) == 0:
                 return []
             result = [row[0].lower() for row in raw_result]
@@ -343,11 +1438,7 @@ class PPPLDatabase:
 
     def get_role_names(self):
         try:
-            self.db_cursor.execute("""
-                select role_name
-                from role
-            """)
-            raw_result = self.db_cursor.fetchall()
+            raw_result = self._execute_cached_query('get_role_names')
             if len(raw_result) == 0:
                 return []
             result = [row[0].lower() for row in raw_result]
@@ -357,11 +1448,7 @@ class PPPLDatabase:
 
     def get_season_start_dates(self):
         try:
-            self.db_cursor.execute("""
-                select start_date
-                from season
-            """)
-            raw_result = self.db_cursor.fetchall()
+            raw_result = self._execute_cached_query('get_season_start_dates')
             if len(raw_result) == 0:
                 return []
             result = [row[0] for row in raw_result]
@@ -371,11 +1458,7 @@ class PPPLDatabase:
 
     def get_footwear_names(self):
         try:
-            self.db_cursor.execute("""
-                select footwear_name
-                from footwear
-            """)
-            raw_result = self.db_cursor.fetchall()
+            raw_result = self._execute_cached_query('get_footwear_names')
             if len(raw_result) == 0:
                 return []
             result = [row[0] for row in raw_result]
@@ -385,13 +1468,7 @@ class PPPLDatabase:
 
     def get_footwear_id(self, footwear_name):
         try:
-            self.db_cursor.execute("""
-                select footwear_id
-                from footwear
-                where footwear_name = '""" + footwear_name + """'
-                limit 1
-            """)
-            raw_result = self.db_cursor.fetchall()
+            raw_result = self._execute_cached_query('get_footwear_id', (footwear_name,))
             if len(raw_result) == 0:
                 return -1
             return raw_result[0][0]
@@ -400,13 +1477,7 @@ class PPPLDatabase:
 
     def get_player_id(self, player_name):
         try:
-            self.db_cursor.execute("""
-                select player_id
-                from player
-                where name = '""" + player_name + """'
-                limit 1
-            """)
-            raw_result = self.db_cursor.fetchall()
+            raw_result = self._execute_cached_query('get_player_id', (player_name,))
             if len(raw_result) == 0:
                 return -1
             return raw_result[0][0]
@@ -417,54 +1488,192 @@ class PPPLDatabase:
 
     def get_player_details(self, player_name):
         try:
-            self.db_cursor.execute("""
-                select
-                    name,
-                    logo,
-                    headshot,
-                    player_id
-                from player
-                where name='""" + player_name + """'
-                limit 1
-            """)
-            raw_result = self.db_cursor.fetchall()
+            cursor = self._execute_query('get_player_details', (player_name,))
+            raw_result = cursor.fetchall()
             if len(raw_result) == 0:
                 return []
             return raw_result[0]
         except Exception:
             error_reporting.report_error(get_error())
 
+    def get_player_image(self, player_id, image):
+        """
+        Read a player image in chunks, so images are only transferred when they are shown
+        :param player_id: ID of player
+        :param image: PlayerImage to read
+        :return: Image file contents as a bytearray, or None if player has no such image
+        """
+        try:
+            raw_result = self._execute_query('get_player_image_sizes', (player_id,)).fetchall()
+            if len(raw_result) == 0:
+                return None
+            image_size = raw_result[0][PLAYER_IMAGE_SIZE_ORDER.index(image)]
+            if image_size is None:
+                return None
+            image_bytes = bytearray(image_size)
+            for start in range(0, image_size, PLAYER_IMAGE_CHUNK_BYTES):
+                # Substring positions start at 1
+                chunk = self._execute_query(PLAYER_IMAGE_CHUNK_QUERIES[image],
+                                            (start + 1, PLAYER_IMAGE_CHUNK_BYTES, player_id)).fetchall()[0][0]
+                image_bytes[start:start + len(chunk)] = chunk
+            return image_bytes
+        except Exception:
+            error_reporting.report_error(get_error())
+
     def get_next_unplayed_game_details(self):
         try:
-            self.db_cursor.execute("""
-                select 
-                    g.game_id,
-                    g.season,
-                    g.game_number,
-                    p_home.name as 'home_player_name',
-                    p_away.name as 'away_player_name'
-                from game g
-                inner join player p_home on (g.home_player_id = p_home.player_id)
-                inner join player p_away on (g.away_player_id = p_away.player_id)
-                where g.game_id not in (
-                    select game_id
-                    from player_game
-                )
-                order by g.season, g.game_number
-                limit 1
-            """)
-            raw_result = self.db_cursor.fetchall()
+            cursor = self._execute_query('get_next_unplayed_game_details')
+            raw_result = cursor.fetchall()
             if len(raw_result) == 0:
                 return []
             return raw_result[0]
         except Exception:
             error_reporting.report_error(get_error())
 
+    def get_standings(self, season):
+        """
+        :param season: Start date of season
+        :return: List of standings of players who have played in season, best first, as tuples of player name, games
+        played, wins, losses, ties, point differential, home wins, home losses, home ties, away wins, away losses and
+        away ties
+        """
+        try:
+            cursor = self._execute_query('get_standings', (season,))
+            return cursor.fetchall()
+        except Exception:
+            error_reporting.report_error(get_error())
+            return []
+
+    def get_season_game_number_range(self, season):
+        """
+        :param season: Start date of season
+        :return: Tuple of first and last game numbers of season, or None if it has no games
+        """
+        try:
+            raw_result = self._execute_query('get_season_game_number_range', (season,)).fetchall()
+            if len(raw_result) == 0 or raw_result[0][0] is None:
+                return None
+            return raw_result[0][0], raw_result[0][1]
+        except Exception:
+            error_reporting.report_error(get_error())
+
+    def get_schedule_page(self, season, after_game_number, last_game_number):
+        """
+        Read a range of a season's games, found from the (season, game_number) index however far into the season it is
+        :param season: Start date of season
+        :param after_game_number: Game number just before the range
+        :param last_game_number: Last game number in the range
+        :return: List of games in order, as tuples of game number, away player name, home player name, whether game was
+        played and home player's point differential (None if not played)
+        """
+        try:
+            cursor = self._execute_query('get_schedule_page', (season, after_game_number, last_game_number))
+            return cursor.fetchall()
+        except Exception:
+            error_reporting.report_error(get_error())
+            return []
+
+    def get_player_ratings(self):
+        """
+        :return: List of ratings of all players, highest first, as tuples of player name, rating and number of games
+        rated
+        """
+        try:
+            cursor = self._execute_query('get_player_ratings', (ratings.INITIAL_RATING,))
+            return cursor.fetchall()
+        except Exception:
+            error_reporting.report_error(get_error())
+            return []
+
+    def get_player_rating_history(self, player_id):
+        """
+        :param player_id: ID of player
+        :return: List of player's rated games in the order they were played, as tuples of season, game number, rating
+        before game and rating after game
+        """
+        try:
+            cursor = self._execute_query('get_player_rating_history', (player_id,))
+            return cursor.fetchall()
+        except Exception:
+            error_reporting.report_error(get_error())
+            return []
+
+    def get_player_game_totals(self):
+        """
+        :return: List of stats of all player games summed by season, player, side and footwear, as tuples of season,
+        player ID, player name, whether player was home, footwear name, number of games, then totals of differential,
+        knockovers, own cups, aces, serve breaks, penalty shots made, penalty shots attempted and penalties committed
+        """
+        try:
+            cursor = self._execute_query('get_player_game_totals')
+            return cursor.fetchall()
+        except Exception:
+            error_reporting.report_error(get_error())
+            return []
+
+    # EXPORT/IMPORT
+
+    def export_table_rows(self, table_name, batch_size):
+        """
+        Read every row of a table in batches. Rows are streamed from the database as batches are taken, so only one
+        batch is held at a time. Errors are raised to the caller
+        :param table_name: Name of table in EXPORT_TABLE_COLUMNS
+        :param batch_size: Maximum number of rows in a batch
+        :return: Generator of lists of rows, with columns in the order of EXPORT_TABLE_COLUMNS
+        """
+        cursor = self._execute_query('export_' + table_name)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if len(rows) == 0:
+                return
+            yield rows
+
+    def has_league_data(self):
+        """
+        :return: Whether any table of league data in EXPORT_TABLE_COLUMNS has rows. Errors are raised to the caller
+        """
+        return any(self._execute_query('has_rows_' + table_name).fetchall()[0][0] == 1
+                   for table_name in EXPORT_TABLE_COLUMNS)
+
+    def start_read_transaction(self):
+        """
+        Start a transaction whose reads all see the database as it was when it started, so reads of several tables are
+        consistent with each other while other connections write. A transaction already open is rolled back first, since
+        one can't be started inside another. End it with rollback. Errors are raised to the caller
+        """
+        connection = self._get_connection()
+        if self.backend.is_in_transaction(connection):
+            connection.rollback()
+        self.backend.start_read_transaction(connection)
+
+    def import_table_rows(self, table_name, rows):
+        """
+        Insert a batch of rows into a table as a single multi-row insert. Doesn't commit, and errors are raised to the
+        caller
+        :param table_name: Name of table in EXPORT_TABLE_COLUMNS
+        :param rows: List of rows, with columns in the order of EXPORT_TABLE_COLUMNS
+        """
+        self._execute_query_many('import_' + table_name, rows)
+
     # REGISTER CALLBACKS FOR UPDATES/INSERT REPORTING
 
     def register_insert_callback(self, table: Table, callback):
+        """
+        Call a function after inserts/updates of a table. Changes made close together only call it once
+        :param table: Table whose changes call callback
+        :param callback: Function taking no arguments
+        """
         if table in Table:
-            self.insertion_callbacks_dict[table].append(callback)
+            self.change_events.subscribe([table], lambda _: callback())
+
+    def _notify_changed(self, tables):
+        """
+        Clear cached lookups of changed tables right away, then notify listeners of the changes
+        :param tables: Tables changed
+        """
+        for table in tables:
+            self.invalidate_lookup_cache(table)
+        self.change_events.publish(tables)
 
 
 def get_error():
@@ -0,0 +1,85 @@
+from database import get_error
+import error_reporting
+import queue
+import threading
+
+DEFAULT_POLL_MS = 20  # Time between checks for finished database work
+
+
+class DatabaseWorker:
+    """
+    Runs database work on a background thread so the GUI never waits on the database. Work runs one piece at a time in
+    the order it was submitted, so statements of one transaction always share the worker's connection. Results are
+    handed back to the GUI thread by polling with after()
+    """
+    def __init__(self, db, widget, poll_ms=DEFAULT_POLL_MS):
+        """
+        :param db: PPPLDatabase to run work with
+        :param widget: Tk widget used to poll for finished work on the GUI thread
+        :param poll_ms: Time between checks for finished work
+        """
+        self.db = db
+        self.widget = widget
+        self.poll_ms = poll_ms
+        self.work = queue.Queue()  # (work, on_done) tuples waiting to run, or None to stop the worker
+        self.finished = queue.Queue()  # (function, args) tuples waiting to be called on the GUI thread
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.widget.after(self.poll_ms, self._poll)
+
+    def submit(self, work, on_done=None):
+        """
+        Run work on the database worker
+        :param work: Function taking the PPPLDatabase, run on the worker thread
+        :param on_done: Function taking the result of work, called on the GUI thread once work is done. Called with None
+        if work raised an error, which is reported, so the GUI can recover from work that failed
+        """
+        self.work.put((work, on_done))
+
+    def call_on_main_thread(self, function):
+        """
+        Wrap a function so that it's always called on the GUI thread, like callbacks performed by database work
+        :param function: Function taking no arguments
+        :return: Wrapped function
+        """
+        def wrapper():
+            if threading.current_thread() is threading.main_thread():
+                function()
+            else:
+                self.finished.put((function, ()))
+        return wrapper
+
+    def stop(self):
+        """
+        Stop the worker once the work already submitted is done
+        """
+        self.work.put(None)
+        self.thread.join()
+
+    def _run(self):
+        while True:
+            item = self.work.get()
+            if item is None:
+                break
+            work, on_done = item
+            try:
+                result = work(self.db)
+            except Exception:
+                error_reporting.report_error(get_error())
+                result = None
+            if on_done is not None:
+                self.finished.put((on_done, (result,)))
+        self.db.release_thread_connection()
+
+    def _poll(self):
+        # Polling always continues, so one failed callback never stops results reaching the GUI
+        try:
+            while not self.finished.empty():
+                function, args = self.finished.get()
+                try:
+                    function(*args)
+                except Exception:
+                    error_reporting.report_error(get_error())
+            error_reporting.show_pending_reports()
+        finally:
+            self.widget.after(self.poll_ms, self._poll)
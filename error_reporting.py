@@ -1,5 +1,20 @@
-import tkinter as tk
-from tkinter import messagebox
+import queue
+import sys
+import threading
+
+# Reports from background threads, which can't show pop-ups themselves. Shown by show_pending_reports on the GUI thread
+pending_reports = queue.Queue()
+# Stream reports are printed to instead of being shown as pop-ups, for use without a GUI, or None to show pop-ups
+console_stream = None
+
+
+def use_console(stream=sys.stderr):
+    """
+    Print reports instead of showing them as pop-ups, for command line tools that run without a GUI
+    :param stream: Stream to print reports to
+    """
+    global console_stream
+    console_stream = stream
 
 
 def report_error(error_message):
@@ -7,8 +22,13 @@ def report_error(error_message):
     Reports a given error message to the user. There may be different methods of doing this depending on error
     :param error_message: Message to send to user
     """
+    if console_stream is not None:
+        print('Problem: ' + error_message, file=console_stream)
+        return
+    # Imported here so the database layer can be used without Tk
+    from tkinter import messagebox
     # Print pop-up on GUI
-    messagebox.showerror('Problem', error_message + "\nProgram will continue after clicking OK")
+    show_report(messagebox.showerror, 'Problem', error_message + "\nProgram will continue after clicking OK")
 
 
 def report_warning(warning_message):
@@ -16,5 +36,26 @@ def report_warning(warning_message):
     Reports a given warning message to the user. There may be different methods of doing this depending on warning
     :param warning_message: Message to send to the user
     """
+    if console_stream is not None:
+        print('Warning: ' + warning_message, file=console_stream)
+        return
+    from tkinter import messagebox
     # Print pop-up on GUI
-    messagebox.showwarning('Warning', warning_message + "\nProgram will continue after clicking OK")
\ No newline at end of file
+    show_report(messagebox.showwarning, 'Warning', warning_message + "\nProgram will continue after clicking OK")
+
+
+def show_report(show_function, title, message):
+    # Pop-ups can only be shown from the GUI thread, so reports from other threads wait until it shows them
+    if threading.current_thread() is threading.main_thread():
+        show_function(title, message)
+    else:
+        pending_reports.put((show_function, title, message))
+
+
+def show_pending_reports():
+    """
+    Show reports made from background threads. Must be called from the GUI thread
+    """
+    while not pending_reports.empty():
+        show_function, title, message = pending_reports.get()
+        show_function(title, message)
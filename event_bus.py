@@ -0,0 +1,60 @@
+import threading
+
+
+class ChangeEventBus:
+    """
+    Notifies listeners of changed tables. Changes published close together are gathered into a single event, so each
+    listener is called once with every table that changed instead of once per changed row
+    """
+    def __init__(self):
+        self.listeners = []  # (tables, listener) tuples
+        self.pending_tables = set()  # Tables changed since listeners were last notified
+        self.b_flush_scheduled = False
+        self.lock = threading.Lock()
+        # Function taking a function to call later, used to gather changes before notifying listeners. When None,
+        # listeners are notified right away
+        self.scheduler = None
+
+    def set_scheduler(self, scheduler):
+        """
+        :param scheduler: Function taking a function to call once more changes have had time to gather, or None to
+        notify listeners right away
+        """
+        self.scheduler = scheduler
+
+    def subscribe(self, tables, listener):
+        """
+        :param tables: Tables whose changes listener is notified of
+        :param listener: Function taking the set of changed tables, called once per gathered event that includes any of
+        its tables
+        """
+        self.listeners.append((frozenset(tables), listener))
+
+    def publish(self, tables):
+        """
+        Report changed tables, notifying listeners once the scheduler calls back or right away if there is none
+        :param tables: Tables that changed
+        """
+        with self.lock:
+            self.pending_tables.update(tables)
+            if self.b_flush_scheduled:
+                return
+            self.b_flush_scheduled = True
+        if self.scheduler is None:
+            self.flush()
+        else:
+            self.scheduler(self.flush)
+
+    def flush(self):
+        """
+        Notify listeners of all tables changed since they were last notified
+        """
+        with self.lock:
+            changed_tables = self.pending_tables
+            self.pending_tables = set()
+            self.b_flush_scheduled = False
+        if len(changed_tables) == 0:
+            return
+        for tables, listener in self.listeners:
+            if not tables.isdisjoint(changed_tables):
+                listener(changed_tables)
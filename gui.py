@@ -1,15 +1,20 @@
 import tkinter as tk
 from tkinter import ttk
 from tkinter import filedialog
-from database import Table
-from PIL import Image, ImageTk
-import io
+from database import Table, PlayerImage, get_error
+from db_worker import DatabaseWorker
 import error_reporting
-import tkcalendar
 import datetime
-import analysis
+from schedule_pages import SchedulePageCache
+import threading
+import queue
 
 MAX_CUPS = 10  # Number of cups to get in game, useful for verification in GUI
+SCHEDULE_BATCH_SIZE = 200  # Maximum number of generated games to write to the database at once
+SCHEDULE_QUEUE_BATCHES = 4  # Maximum number of generated batches waiting to be saved, so generation can't run far ahead
+SCHEDULE_WAIT_SECONDS = 0.05  # Longest the database worker waits for a generated batch before running other work
+CHANGE_EVENT_WINDOW_MS = 100  # Database changes made within this time of each other refresh frames once
+SCHEDULE_VISIBLE_ROWS = 25  # Games shown at once in the schedule, which are the only ones given rows
 
 
 class MainGUI(tk.Tk):
@@ -19,6 +24,8 @@ class MainGUI(tk.Tk):
         # Title this container
         self.title('Ping Pong Pong League')
         self.db = db
+        self.db_worker = DatabaseWorker(db, self)
+        self.db.change_events.set_scheduler(self.schedule_change_event)
 
         # Set up primary container
         self.container = tk.Frame(self)
@@ -29,30 +36,55 @@ class MainGUI(tk.Tk):
         fake_label = tk.Label(self.container)
         fake_label.grid(row=0, column=0, sticky='nsew', padx=self.winfo_screenwidth(), pady=self.winfo_screenheight())
 
-        # Load all possible frames
+        # Frames are only built the first time they're needed, so starting up only builds the main frame
         self.frames = {}
-        for frame in (MainWindow, PlayerManagementWindow, EnterLeagueWindow, AddPlayerWindow, EditPlayerWindow,
-                      AddRoleWindow, ViewPlayerWindow, StatsWindow, StandingsWindow, ScheduleWindow, NewSeasonWindow,
-                      LiveGameWindow):
-            temp_frame = frame(self.container, self)
-            temp_frame.grid(row=0, column=0, sticky='nsew')
-            self.frames[frame] = temp_frame
+        self.current_frame = None
 
         # Bring main frame to top
         self.show_frame(MainWindow)
 
     def show_frame(self, container):
-        self.frames[container].tkraise()
+        self.get_frame(container).tkraise()
+        self.current_frame = container
+        # Frames may hold off on loading what they show until they are shown
+        if hasattr(self.frames[container], 'on_show'):
+            self.frames[container].on_show()
 
     def get_db(self):
         return self.db
 
+    def get_db_worker(self):
+        return self.db_worker
+
+    def subscribe_changes(self, tables, listener):
+        """
+        Listen for database changes on the GUI thread, even when changes were made by the database worker. Listeners
+        subscribed after the database was connected missed the change event of connecting, so they're called once as
+        soon as the frame subscribing them is built instead
+        :param tables: Tables whose changes notify listener
+        :param listener: Function taking the set of changed tables, called once for changes made close together
+        """
+        self.db.change_events.subscribe(tables, listener)
+        if self.db.backend is not None:
+            self.after_idle(lambda: listener(set(tables)))
+
+    def schedule_change_event(self, flush):
+        # Gather changes for a short time on the GUI thread so listeners are notified of all of them at once
+        self.db_worker.call_on_main_thread(lambda: self.after(CHANGE_EVENT_WINDOW_MS, flush))()
+
     def is_frame_top(self, container):
         return self.frames[container] == self.container.winfo_children()[-1]
 
     def get_frame(self, container):
+        if container not in self.frames:
+            frame = container(self.container, self)
+            frame.grid(row=0, column=0, sticky='nsew')
+            self.frames[container] = frame
         return self.frames[container]
 
+    def get_current_frame(self):
+        return self.current_frame
+
 
 class HomeFrame(tk.Frame):
     def __init__(self, parent, controller):
@@ -140,7 +172,7 @@ class AddPlayerWindow(HomeFrame):
         # Add roles listbox
         self.listbox_add_roles = tk.Listbox(self, selectmode='multiple', width=30)
         self.listbox_add_roles.grid(row=6, column=3, sticky='w', padx=5, pady=5)
-        self.controller.get_db().register_insert_callback(Table.ROLE, self.update_role_listbox)
+        self.controller.subscribe_changes([Table.ROLE], self.update_role_listbox)
         # Save and create player button
         self.button_create_player = tk.Button(self, text='Save and Create Player',
                                               command=self.save_create_player)
@@ -151,8 +183,13 @@ class AddPlayerWindow(HomeFrame):
         self.entry_headshot.bind('<Return>', self.save_create_player)
         self.listbox_add_roles.bind('<Return>', self.save_create_player)
 
-    def update_role_listbox(self):
-        roles = self.controller.get_db().get_role_names()
+    def update_role_listbox(self, _=None):
+        self.controller.get_db_worker().submit(lambda db: db.get_role_names(), self.show_role_listbox)
+
+    def show_role_listbox(self, roles):
+        # Roles that couldn't be read were already reported, so the listbox is left as it is
+        if roles is None:
+            return
         self.listbox_add_roles.delete(0, 'end')
         for role in range(len(roles)):
             self.listbox_add_roles.insert(role, roles[role])
@@ -161,28 +198,52 @@ class AddPlayerWindow(HomeFrame):
         # Check that this frame is on top
         if not self.controller.is_frame_top(AddPlayerWindow):
             return
-        # Check if player name already exists or there is no player name, stopping if so
+        # Check if there is no player name, stopping if so
         if self.entry_name.get() == '':
             error_reporting.report_warning('Name field is empty')
             return
-        elif self.controller.get_db().is_player_in_db(self.entry_name.get()):
-            self.entry_name.delete(0, 'end')
-            error_reporting.report_warning('Name already exists')
-            return
-        # Save new player to database
+        # Save new player and roles to database in the background
+        name = self.entry_name.get()
+        logo_path = self.entry_logo.get()
+        headshot_path = self.entry_headshot.get()
+        new_roles = [self.listbox_add_roles.get(role) for role in self.listbox_add_roles.curselection()]
+        self.button_create_player.config(state='disabled', text='Saving...')
+        self.controller.get_db_worker().submit(
+            lambda db: self.create_player(db, name, logo_path, headshot_path, new_roles), self.finish_create_player)
+
+    @staticmethod
+    def create_player(db, name, logo_path, headshot_path, roles):
+        """
+        Save a new player and their roles to database. Runs on the database worker
+        :return: Whether player was new, or None if player couldn't be saved
+        """
+        # Check if player name already exists, stopping if so
+        if db.is_player_in_db(name):
+            return False
         try:
-            logo_bin = open(self.entry_logo.get(), 'rb').read()
+            logo_bin = open(logo_path, 'rb').read()
         except Exception:
             logo_bin = None
         try:
-            headshot_bin = open(self.entry_headshot.get(), 'rb').read()
+            headshot_bin = open(headshot_path, 'rb').read()
         except Exception:
             headshot_bin = None
-        self.controller.get_db().insert_player(self.entry_name.get(), logo_bin, headshot_bin)
-        # Save new player's roles to database
-        new_roles = [self.listbox_add_roles.get(role) for role in self.listbox_add_roles.curselection()]
-        for role in new_roles:
-            self.controller.get_db().insert_player_role(self.entry_name.get(), role)
+        # Roles aren't saved for a player that wasn't, like one with an image that can't be read
+        if not db.insert_player(name, logo_bin, headshot_bin):
+            return None
+        for role in roles:
+            db.insert_player_role(name, role)
+        return True
+
+    def finish_create_player(self, b_created):
+        self.button_create_player.config(state='normal', text='Save and Create Player')
+        # Entries are kept if player couldn't be saved, so they can be tried again
+        if b_created is None:
+            return
+        if not b_created:
+            self.entry_name.delete(0, 'end')
+            error_reporting.report_warning('Name already exists')
+            return
         # At end, clear text from entry fields and go back to previous menu
         self.entry_name.delete(0, 'end')
         self.entry_logo.delete(0, 'end')
@@ -219,7 +280,7 @@ class AddRoleWindow(HomeFrame):
         # Current roles label
         self.label_current_roles = tk.Label(self, justify='left', borderwidth=2, relief='groove', padx=5, pady=5)
         self.label_current_roles.grid(row=3, column=2)
-        self.controller.get_db().register_insert_callback(Table.ROLE, self.update_role_label)
+        self.controller.subscribe_changes([Table.ROLE], self.update_role_label)
         # Add frame for adding new role
         self.frame_add_role = tk.Frame(self)
         self.frame_add_role.grid(row=3, column=3, sticky='n', padx=10)
@@ -235,26 +296,48 @@ class AddRoleWindow(HomeFrame):
         # Bind enter key to text field being entered
         self.entry_add_role.bind('<Return>', self.add_role)
 
-    def update_role_label(self):
+    def update_role_label(self, _=None):
+        self.controller.get_db_worker().submit(lambda db: db.get_role_names(), self.show_role_label)
+
+    def show_role_label(self, roles):
+        if roles is None:
+            return
         # Current roles label
-        text = 'Existing Roles:\n\n' + '\n'.join(sorted(self.controller.get_db().get_role_names()))
+        text = 'Existing Roles:\n\n' + '\n'.join(sorted(roles))
         self.label_current_roles.config(text=text)
 
     def add_role(self, _=None):
         # Check that this frame is on top
         if not self.controller.is_frame_top(AddRoleWindow):
             return
-        # Check if role name already exists or there is no role name, stopping if so
+        # Check if there is no role name, stopping if so
         if self.entry_add_role.get() == '':
             error_reporting.report_warning('Role field is empty')
             return
-        elif self.controller.get_db().is_role_in_db(self.entry_add_role.get()):
-            self.entry_add_role.delete(0, 'end')
-            error_reporting.report_warning('Role already exists')
+        # Save new role to database in the background
+        role_name = self.entry_add_role.get()
+        self.button_add_role.config(state='disabled')
+        self.controller.get_db_worker().submit(lambda db: self.create_role(db, role_name), self.finish_add_role)
+
+    @staticmethod
+    def create_role(db, role_name):
+        """
+        Save a new role to database. Runs on the database worker
+        :return: Whether role was new
+        """
+        # Check if role name already exists, stopping if so
+        if db.is_role_in_db(role_name):
+            return False
+        db.insert_role(role_name)
+        return True
+
+    def finish_add_role(self, b_created):
+        self.button_add_role.config(state='normal')
+        if b_created is None:
             return
-        # Save new role to database
-        self.controller.get_db().insert_role(self.entry_add_role.get())
-        # At end, clear text from entry fields and go back to previous menu
+        if not b_created:
+            error_reporting.report_warning('Role already exists')
+        # At end, clear text from entry fields
         self.entry_add_role.delete(0, 'end')
 
 
@@ -274,7 +357,7 @@ class EnterLeagueWindow(HomeFrame):
         self.option_menu_season = tk.OptionMenu(self.frame_season_view, self.selected_season,
                                                 *self.option_menu_season_options)
         self.option_menu_season.grid(row=2, column=1, padx=5)
-        self.controller.get_db().register_insert_callback(Table.SEASON, self.update_season_options)
+        self.controller.subscribe_changes([Table.SEASON], self.update_season_options)
         # Season info label
         self.label_season_info = tk.Label(self.frame_season_view, text='Season Info')
         self.label_season_info.grid(row=3, column=1, padx=5)
@@ -303,9 +386,8 @@ class EnterLeagueWindow(HomeFrame):
         # Next game details message
         self.message_game_details = tk.Message(self.frame_next_game, justify='center')
         self.message_game_details.grid(row=2, column=1, padx=5)
-        self.controller.get_db().register_insert_callback(Table.SEASON, self.update_game_details_message)
-        self.controller.get_db().register_insert_callback(Table.GAME, self.update_game_details_message)
-        self.controller.get_db().register_insert_callback(Table.PLAYER_GAME, self.update_game_details_message)
+        self.controller.subscribe_changes([Table.SEASON, Table.GAME, Table.PLAYER_GAME],
+                                          self.update_game_details_message)
         # Play game button
         self.button_play_game = tk.Button(self.frame_next_game, text='Play Game',
                                           command=lambda: controller.show_frame(LiveGameWindow))
@@ -313,10 +395,14 @@ class EnterLeagueWindow(HomeFrame):
         # Initialize helper variables
         self.next_unplayed_game_id = -1
 
-    def update_season_options(self):
+    def update_season_options(self, _=None):
+        self.controller.get_db_worker().submit(lambda db: db.get_season_start_dates(), self.show_season_options)
+
+    def show_season_options(self, season_start_dates):
+        if season_start_dates is None:
+            return
         # Update the option menu for the available seasons
-        self.option_menu_season_options = self.controller.get_db().get_season_start_dates()
-        self.option_menu_season_options = [date.strftime('%m/%d/%Y') for date in self.option_menu_season_options]
+        self.option_menu_season_options = [date.strftime('%m/%d/%Y') for date in season_start_dates]
         self.option_menu_season_options.sort(reverse=True)
         self.selected_season.set('')
         self.option_menu_season['menu'].delete(0, 'end')
@@ -324,9 +410,17 @@ class EnterLeagueWindow(HomeFrame):
             self.option_menu_season['menu'].add_command(label=new_option,
                                                         command=tk._setit(self.selected_season, new_option))
 
-    def update_game_details_message(self):
-        next_unplayed_game_details = self.controller.get_db().get_next_unplayed_game_details()
-        if len(next_unplayed_game_details) == 0:
+    def update_game_details_message(self, _=None):
+        self.message_game_details.config(text='Loading...')
+        self.button_play_game.config(state='disabled')
+        self.controller.get_db_worker().submit(lambda db: db.get_next_unplayed_game_details(),
+                                               self.show_game_details_message)
+
+    def show_game_details_message(self, next_unplayed_game_details):
+        if next_unplayed_game_details is None:
+            game_details_text = "Next Game Not Available"
+            self.button_play_game.config(state='disabled')
+        elif len(next_unplayed_game_details) == 0:
             game_details_text = "No Upcoming Games"
             self.button_play_game.config(state='disabled')
         else:
@@ -347,10 +441,114 @@ class StatsWindow(HomeFrame):
     def __init__(self, parent, controller):
         HomeFrame.__init__(self, parent, controller)
         self.controller = controller
+        # Imported here so NumPy is only loaded once stats are shown
+        from player_stats import PlayerStatsEngine
+        # Created before subscribing below, so stats are invalidated before they're read again for the same change
+        self.stats_engine = PlayerStatsEngine(controller.get_db())
         # Back button
         self.button_back = tk.Button(self, text='<--Back',
                                      command=lambda: controller.show_frame(EnterLeagueWindow))
         self.button_back.grid(row=2, column=1, sticky='w')
+        # Filter frame
+        self.frame_filters = tk.Frame(self, borderwidth=2, relief='groove')
+        self.frame_filters.grid(row=2, column=2, sticky='nw', padx=10)
+        # Season filter
+        self.label_season = tk.Label(self.frame_filters, text='Season')
+        self.label_season.grid(row=1, column=1, padx=5)
+        self.combobox_season = ttk.Combobox(self.frame_filters, state='readonly', values=['All'], width=12)
+        self.combobox_season.set('All')
+        self.combobox_season.grid(row=2, column=1, padx=5, pady=5)
+        self.combobox_season.bind('<<ComboboxSelected>>', self.update_stats)
+        self.controller.subscribe_changes([Table.SEASON], self.update_season_options)
+        # Side filter
+        self.label_side = tk.Label(self.frame_filters, text='Side')
+        self.label_side.grid(row=1, column=2, padx=5)
+        self.combobox_side = ttk.Combobox(self.frame_filters, state='readonly', values=['All', 'Home', 'Away'],
+                                          width=6)
+        self.combobox_side.set('All')
+        self.combobox_side.grid(row=2, column=2, padx=5, pady=5)
+        self.combobox_side.bind('<<ComboboxSelected>>', self.update_stats)
+        # Footwear filter
+        self.label_footwear = tk.Label(self.frame_filters, text='Footwear')
+        self.label_footwear.grid(row=1, column=3, padx=5)
+        self.combobox_footwear = ttk.Combobox(self.frame_filters, state='readonly', values=['All'], width=20)
+        self.combobox_footwear.set('All')
+        self.combobox_footwear.grid(row=2, column=3, padx=5, pady=5)
+        self.combobox_footwear.bind('<<ComboboxSelected>>', self.update_stats)
+        self.controller.subscribe_changes([Table.FOOTWEAR], self.update_footwear_options)
+        # Stats table
+        self.label_stats_status = tk.Label(self.frame_filters, text='')
+        self.label_stats_status.grid(row=3, column=1, columnspan=3)
+        self.treeview_stats = ttk.Treeview(self.frame_filters, show='headings', height=20, columns=(
+            'player', 'gp', 'diff', 'avg_diff', 'ko', 'ko_per_game', 'own_cups', 'aces', 'aces_per_game',
+            'serve_breaks', 'psm', 'psa', 'ps_pct', 'penalties'))
+        for column, heading, width in (
+                ('player', 'Player', 150), ('gp', 'GP', 40), ('diff', 'Diff', 50), ('avg_diff', 'Avg Diff', 60),
+                ('ko', 'KO', 40), ('ko_per_game', 'KO/G', 50), ('own_cups', 'Own Cups', 60), ('aces', 'Aces', 40),
+                ('aces_per_game', 'Aces/G', 50), ('serve_breaks', 'Breaks', 50), ('psm', 'PSM', 40),
+                ('psa', 'PSA', 40), ('ps_pct', 'PS%', 50), ('penalties', 'Penalties', 60)):
+            self.treeview_stats.heading(column, text=heading)
+            self.treeview_stats.column(column, width=width, anchor='w' if column == 'player' else 'center')
+        self.treeview_stats.grid(row=4, column=1, columnspan=3, padx=5, pady=5)
+        self.controller.subscribe_changes([Table.PLAYER_GAME], self.update_stats)
+
+    def update_season_options(self, _=None):
+        self.controller.get_db_worker().submit(lambda db: db.get_season_start_dates(), self.show_season_options)
+
+    def show_season_options(self, season_start_dates):
+        if season_start_dates is None:
+            return
+        season_options = [date.strftime('%m/%d/%Y') for date in sorted(season_start_dates, reverse=True)]
+        self.combobox_season.config(values=['All'] + season_options)
+        if self.combobox_season.get() not in season_options:
+            self.combobox_season.set('All')
+
+    def update_footwear_options(self, _=None):
+        self.controller.get_db_worker().submit(lambda db: db.get_footwear_names(), self.show_footwear_options)
+
+    def show_footwear_options(self, footwear_names):
+        if footwear_names is None:
+            return
+        footwear_options = sorted(footwear_names, key=str.lower)
+        self.combobox_footwear.config(values=['All'] + footwear_options)
+        if self.combobox_footwear.get() not in footwear_options:
+            self.combobox_footwear.set('All')
+
+    def on_show(self):
+        self.read_stats()
+
+    def update_stats(self, _=None):
+        # Stats are read when this window is shown, so only changes while it's shown need them read right away
+        if self.controller.get_current_frame() == StatsWindow:
+            self.read_stats()
+
+    def read_stats(self):
+        # Read filters here since widgets can only be used from the GUI thread
+        season = None
+        if self.combobox_season.get() != 'All':
+            season = datetime.datetime.strptime(self.combobox_season.get(), '%m/%d/%Y').date()
+        b_home = {'All': None, 'Home': True, 'Away': False}[self.combobox_side.get()]
+        footwear = None if self.combobox_footwear.get() == 'All' else self.combobox_footwear.get()
+        self.label_stats_status.config(text='Loading...')
+        stats_engine = self.stats_engine
+        self.controller.get_db_worker().submit(lambda _: stats_engine.get_player_stats(season, b_home, footwear),
+                                               self.show_stats)
+
+    def show_stats(self, player_stats):
+        if player_stats is None:
+            self.label_stats_status.config(text='Stats Not Available')
+            return
+        self.label_stats_status.config(text='' if len(player_stats) > 0 else 'No Games Played')
+        self.treeview_stats.delete(*self.treeview_stats.get_children())
+        for name, games, differential, average_differential, knockovers, knockovers_per_game, own_cups, aces, \
+                aces_per_game, serve_breaks, penalty_shots_made, penalty_shots_attempted, penalty_shot_percentage, \
+                penalties_committed in player_stats:
+            self.treeview_stats.insert('', 'end', values=(
+                name, games, '{:+d}'.format(differential), '{:+.2f}'.format(average_differential), knockovers,
+                '{:.2f}'.format(knockovers_per_game), own_cups, aces, '{:.2f}'.format(aces_per_game), serve_breaks,
+                penalty_shots_made, penalty_shots_attempted,
+                '-' if penalty_shot_percentage is None else '{:.1f}'.format(penalty_shot_percentage),
+                penalties_committed))
 
 
 class StandingsWindow(HomeFrame):
@@ -361,6 +559,63 @@ class StandingsWindow(HomeFrame):
         self.button_back = tk.Button(self, text='<--Back',
                                      command=lambda: controller.show_frame(EnterLeagueWindow))
         self.button_back.grid(row=2, column=1, sticky='w')
+        # Standings frame
+        self.frame_standings = tk.Frame(self, borderwidth=2, relief='groove')
+        self.frame_standings.grid(row=2, column=2, sticky='nw', padx=10)
+        # Season label
+        self.label_season = tk.Label(self.frame_standings, text='')
+        self.label_season.grid(row=1, column=1, padx=5)
+        # Standings table
+        self.treeview_standings = ttk.Treeview(self.frame_standings, show='headings', height=20,
+                                               columns=('player', 'gp', 'w', 'l', 't', 'diff', 'home', 'away'))
+        for column, heading, width in (('player', 'Player', 150), ('gp', 'GP', 40), ('w', 'W', 40), ('l', 'L', 40),
+                                       ('t', 'T', 40), ('diff', 'Diff', 50), ('home', 'Home', 70),
+                                       ('away', 'Away', 70)):
+            self.treeview_standings.heading(column, text=heading)
+            self.treeview_standings.column(column, width=width, anchor='w' if column == 'player' else 'center')
+        self.treeview_standings.grid(row=2, column=1, padx=5, pady=5)
+        # Rebuild button
+        self.button_rebuild = tk.Button(self.frame_standings, text='Rebuild Standings', command=self.rebuild_standings)
+        self.button_rebuild.grid(row=3, column=1, pady=5)
+        self.controller.subscribe_changes([Table.SEASON, Table.STANDING], self.update_standings)
+
+    def on_show(self):
+        # Season may have been changed since standings were last shown
+        self.read_standings()
+
+    def update_standings(self, _=None):
+        # Standings are read when this window is shown, so only changes while it's shown need them read right away
+        if self.controller.get_current_frame() == StandingsWindow:
+            self.read_standings()
+
+    def read_standings(self):
+        season_text = self.controller.get_frame(EnterLeagueWindow).get_selected_season().get()
+        if len(season_text) == 0:
+            self.label_season.config(text='No Season Chosen')
+            self.treeview_standings.delete(*self.treeview_standings.get_children())
+            return
+        season = datetime.datetime.strptime(season_text, '%m/%d/%Y').date()
+        self.label_season.config(text='Loading...')
+        self.controller.get_db_worker().submit(lambda db: db.get_standings(season),
+                                               lambda standings: self.show_standings(season_text, standings))
+
+    def show_standings(self, season_text, standings):
+        if standings is None:
+            self.label_season.config(text='Standings Not Available')
+            return
+        self.label_season.config(text='Season ' + season_text)
+        self.treeview_standings.delete(*self.treeview_standings.get_children())
+        for name, games_played, wins, losses, ties, point_differential, home_wins, home_losses, home_ties, away_wins, \
+                away_losses, away_ties in standings:
+            self.treeview_standings.insert('', 'end', values=(
+                name, games_played, wins, losses, ties, '{:+d}'.format(point_differential),
+                '{}-{}-{}'.format(home_wins, home_losses, home_ties),
+                '{}-{}-{}'.format(away_wins, away_losses, away_ties)))
+
+    def rebuild_standings(self):
+        self.button_rebuild.config(state='disabled')
+        self.controller.get_db_worker().submit(lambda db: db.rebuild_standings(),
+                                               lambda _: self.button_rebuild.config(state='normal'))
 
 
 class ScheduleWindow(HomeFrame):
@@ -371,10 +626,118 @@ class ScheduleWindow(HomeFrame):
         self.button_back = tk.Button(self, text='<--Back',
                                      command=lambda: controller.show_frame(EnterLeagueWindow))
         self.button_back.grid(row=2, column=1, sticky='w')
+        # Schedule frame
+        self.frame_schedule = tk.Frame(self, borderwidth=2, relief='groove')
+        self.frame_schedule.grid(row=2, column=2, sticky='nw', padx=10)
+        # Season label
+        self.label_season = tk.Label(self.frame_schedule, text='')
+        self.label_season.grid(row=1, column=1, columnspan=2, padx=5)
+        # Schedule table, which only ever holds the rows on screen. The scrollbar moves through the whole season and
+        # the rows are filled in from pages of games read around them
+        self.treeview_schedule = ttk.Treeview(self.frame_schedule, show='headings', height=SCHEDULE_VISIBLE_ROWS,
+                                              columns=('game', 'away', 'home', 'result'))
+        for column, heading, width in (('game', 'Game', 60), ('away', 'Away', 150), ('home', 'Home', 150),
+                                       ('result', 'Result', 150)):
+            self.treeview_schedule.heading(column, text=heading)
+            self.treeview_schedule.column(column, width=width, anchor='center' if column == 'game' else 'w')
+        self.treeview_schedule.grid(row=2, column=1, padx=(5, 0), pady=5)
+        self.scrollbar_schedule = ttk.Scrollbar(self.frame_schedule, orient='vertical', command=self.scroll_schedule)
+        self.scrollbar_schedule.grid(row=2, column=2, sticky='ns', padx=(0, 5), pady=5)
+        self.treeview_schedule.bind('<MouseWheel>', lambda event: self.scroll_schedule(
+            'scroll', -1 if event.delta > 0 else 1, 'units'))
+        self.treeview_schedule.bind('<Button-4>', lambda _: self.scroll_schedule('scroll', -1, 'units'))
+        self.treeview_schedule.bind('<Button-5>', lambda _: self.scroll_schedule('scroll', 1, 'units'))
+        self.controller.subscribe_changes([Table.SEASON, Table.GAME, Table.PLAYER_GAME], self.update_schedule)
+        # Initialize helper variables
+        self.season = None  # Season shown, or None if schedule has to be read again
+        self.page_cache = None  # SchedulePageCache of season, or None if season has no games
+        self.first_game_number = 0
+        self.last_game_number = 0
+        self.first_visible_game_number = 0
+
+    def on_show(self):
+        season_text = self.controller.get_frame(EnterLeagueWindow).get_selected_season().get()
+        if len(season_text) == 0:
+            self.season = None
+            self.page_cache = None
+            self.label_season.config(text='No Season Chosen')
+            self.show_visible_games()
+            return
+        season = datetime.datetime.strptime(season_text, '%m/%d/%Y').date()
+        if season == self.season:
+            return
+        self.season = season
+        self.label_season.config(text='Loading...')
+        self.controller.get_db_worker().submit(lambda db: db.get_season_game_number_range(season),
+                                               lambda game_number_range: self.show_schedule(season, game_number_range))
+
+    def update_schedule(self, _=None):
+        # Schedule is read again when this window is next shown, or right away if it's shown now
+        self.season = None
+        if self.controller.get_current_frame() == ScheduleWindow:
+            self.on_show()
+
+    def show_schedule(self, season, game_number_range):
+        if season != self.season:
+            return  # Another season was chosen while this one was read
+        self.label_season.config(text='Season ' + season.strftime('%m/%d/%Y'))
+        if game_number_range is None:
+            self.page_cache = None
+        else:
+            self.first_game_number, self.last_game_number = game_number_range
+            # Stay at the same place when the same season is read again after a change
+            if self.page_cache is None or self.page_cache.season != season:
+                self.first_visible_game_number = self.first_game_number
+            self.page_cache = SchedulePageCache(self.controller.get_db_worker(), season, self.first_game_number,
+                                                self.show_visible_games)
+        self.show_visible_games()
+
+    def scroll_schedule(self, action, amount, unit=None):
+        if self.page_cache is None:
+            return
+        num_games = self.last_game_number - self.first_game_number + 1
+        if action == 'moveto':
+            first_visible_game_number = self.first_game_number + round(float(amount) * num_games)
+        elif unit == 'pages':
+            first_visible_game_number = self.first_visible_game_number + int(amount) * SCHEDULE_VISIBLE_ROWS
+        else:
+            first_visible_game_number = self.first_visible_game_number + int(amount)
+        first_visible_game_number = min(first_visible_game_number, self.last_game_number - SCHEDULE_VISIBLE_ROWS + 1)
+        self.first_visible_game_number = max(first_visible_game_number, self.first_game_number)
+        self.show_visible_games()
+
+    def show_visible_games(self):
+        self.treeview_schedule.delete(*self.treeview_schedule.get_children())
+        if self.page_cache is None:
+            self.scrollbar_schedule.set(0, 1)
+            return
+        num_rows = min(SCHEDULE_VISIBLE_ROWS, self.last_game_number - self.first_visible_game_number + 1)
+        rows = self.page_cache.get_rows(self.first_visible_game_number, num_rows)
+        for game_number, row in zip(range(self.first_visible_game_number, self.first_visible_game_number + num_rows),
+                                    rows):
+            if row is None:
+                self.treeview_schedule.insert('', 'end', values=(game_number, 'Loading...', '', ''))
+                continue
+            _, away_player, home_player, b_played, home_differential = row
+            if not b_played or home_differential is None:
+                result = ''
+            elif home_differential > 0:
+                result = '{} by {}'.format(home_player, home_differential)
+            elif home_differential < 0:
+                result = '{} by {}'.format(away_player, -home_differential)
+            else:
+                result = 'Tie'
+            self.treeview_schedule.insert('', 'end', values=(game_number, away_player, home_player, result))
+        num_games = self.last_game_number - self.first_game_number + 1
+        self.scrollbar_schedule.set((self.first_visible_game_number - self.first_game_number) / num_games,
+                                    (self.first_visible_game_number - self.first_game_number + num_rows) / num_games)
 
 
 class NewSeasonWindow(HomeFrame):
     def __init__(self, parent, controller):
+        # Imported here so the calendar and schedule generator are only loaded once a season is created
+        import tkcalendar
+        from schedule_cache import ScheduleCache
         HomeFrame.__init__(self, parent, controller)
         self.button_home.config(command=self.go_home)
         self.controller = controller
@@ -400,10 +763,14 @@ class NewSeasonWindow(HomeFrame):
         # Players listbox
         self.listbox_players = tk.Listbox(self, selectmode='multiple', width=30)
         self.listbox_players.grid(row=5, column=3, sticky='w', pady=5, padx=5)
-        self.controller.get_db().register_insert_callback(Table.PLAYER, self.update_player_listbox)
+        self.controller.subscribe_changes([Table.PLAYER], self.update_player_listbox)
         # Submit button
         self.button_submit = tk.Button(self, text='Submit', command=self.submit_new_season)
         self.button_submit.grid(row=6, column=3, sticky='w', padx=5, pady=5)
+        # Schedule progress label
+        self.label_schedule_progress = tk.Label(self)
+        self.label_schedule_progress.grid(row=7, column=3, sticky='w', padx=5)
+        self.schedule_cache = ScheduleCache()
 
     def go_home(self):
         self.reset_entries()
@@ -419,43 +786,179 @@ class NewSeasonWindow(HomeFrame):
         self.date_entry_start_date.set_date(datetime.datetime.now())
         self.listbox_players.selection_clear(0, 'end')
 
-    def update_player_listbox(self):
-        players = self.controller.get_db().get_player_names()
+    def update_player_listbox(self, _=None):
+        self.controller.get_db_worker().submit(lambda db: db.get_player_names(), self.show_player_listbox)
+
+    def show_player_listbox(self, players):
+        if players is None:
+            return
         players.sort()
         self.listbox_players.delete(0, 'end')
         for player in range(len(players)):
             self.listbox_players.insert(player, players[player])
 
     def submit_new_season(self):
-        # Check all user-entered values and players are valid
+        # Check all user-entered values are valid
         if eval(self.spinbox_num_games.get()) <= 0:
             error_reporting.report_warning('Invalid number of games per player')
             return
         if len(self.listbox_players.curselection()) <= 0:
             error_reporting.report_warning('No players selected for the new season')
             return
-        if self.date_entry_start_date.get_date() in self.controller.get_db().get_season_start_dates():
-            error_reporting.report_warning('Existing season already started on date entered')
-            return
+        # Check season and players against database in the background
+        games_per_player = eval(self.spinbox_num_games.get())
+        start_date = self.date_entry_start_date.get_date()
         players = [self.listbox_players.get(player) for player in self.listbox_players.curselection()]
-        player_ids = [self.controller.get_db().get_player_id(name) for name in players]
+        self.button_submit.config(state='disabled')
+        self.label_schedule_progress.config(text='Creating season...')
+        self.controller.get_db_worker().submit(
+            lambda db: self.start_new_season(db, start_date, players),
+            lambda player_ids: self.start_schedule(start_date, games_per_player, player_ids))
+
+    @staticmethod
+    def start_new_season(db, start_date, players):
+        """
+        Check new season is valid, then enter it into database without committing, so its games are saved in the same
+        transaction. Runs on the database worker
+        :param db: PPPLDatabase
+        :param start_date: Start date of season
+        :param players: Names of players in season
+        :return: List of player IDs in season, or None if season wasn't entered
+        """
+        if start_date in db.get_season_start_dates():
+            error_reporting.report_warning('Existing season already started on date entered')
+            return None
+        player_ids = [db.get_player_id(name) for name in players]
         if -1 in player_ids:
             error_reporting.report_error('Database error. A player name did not match any known entries.')
+            return None
+        if not db.start_season_schedule(start_date):
+            return None
+        return player_ids
+
+    def start_schedule(self, start_date, games_per_player, player_ids):
+        if player_ids is None:
+            self.finish_new_season(False)
+            return
+        # Generate schedule in the background while the database worker saves the batches generated so far, so
+        # creating a season takes about as long as the slower of the two
+        batches = queue.Queue(SCHEDULE_QUEUE_BATCHES)
+        stop = threading.Event()
+        threading.Thread(target=self.generate_schedule_batches,
+                         args=(self.schedule_cache, games_per_player, player_ids, batches, stop), daemon=True).start()
+        self.submit_schedule_batches(start_date, batches, stop, 0)
+
+    @staticmethod
+    def generate_schedule_batches(schedule_cache, games_per_player, player_ids, batches, stop):
+        """
+        Put each batch of games of the new season's schedule in the queue as it's generated, followed by None when
+        finished, or by the error raised if the schedule couldn't be generated. Runs in its own thread
+        :param schedule_cache: ScheduleCache to get schedule from
+        :param games_per_player: Minimum number of games each player plays
+        :param player_ids: List of player IDs to schedule
+        :param batches: Bounded queue of lists of (home player ID, away player ID) tuples
+        :param stop: Event set once batches are no longer saved, which stops generation
+        """
+        def put(item):
+            # Waiting for room is interrupted if saving stops, so the thread never waits on a queue nobody reads
+            while not stop.is_set():
+                try:
+                    batches.put(item, timeout=SCHEDULE_WAIT_SECONDS)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+        try:
+            batch = []
+            for game in schedule_cache.generate_schedule_games(games_per_player, player_ids, round_robin=True):
+                batch.append(game)
+                if len(batch) == SCHEDULE_BATCH_SIZE:
+                    if not put(batch):
+                        return
+                    batch = []
+            if len(batch) > 0 and not put(batch):
+                return
+            put(None)
+        except Exception as e:
+            put(e)
+
+    def submit_schedule_batches(self, start_date, batches, stop, num_games):
+        self.controller.get_db_worker().submit(
+            lambda db: self.save_schedule_batches(db, start_date, batches, stop, num_games),
+            lambda progress: self.continue_schedule(start_date, batches, stop, progress))
+
+    @staticmethod
+    def save_schedule_batches(db, start_date, batches, stop, num_games):
+        """
+        Save the generated batches of the new season's games that are ready, then commit the season once its last
+        batch is saved. Returns after a few batches, or once no batch arrives for a while, so other database work can
+        run while the rest of the schedule is generated. Runs on the database worker
+        :param db: PPPLDatabase
+        :param start_date: Start date of season
+        :param batches: Bounded queue of batches from generate_schedule_batches
+        :param stop: Event to set if the season is removed, which stops generation
+        :param num_games: Number of games saved so far
+        :return: Tuple of whether the season was committed and the number of games saved so far, or None if the
+        season was removed because its schedule couldn't be generated or saved
+        """
+        try:
+            for _ in range(SCHEDULE_QUEUE_BATCHES):
+                batch = batches.get(timeout=SCHEDULE_WAIT_SECONDS)
+                if batch is None:
+                    if not db.finish_season_schedule(start_date, num_games):
+                        return None
+                    return True, num_games
+                if isinstance(batch, Exception):
+                    raise batch
+                if not db.insert_games(start_date, num_games + 1, batch, b_commit=False):
+                    stop.set()
+                    return None
+                num_games += len(batch)
+        except queue.Empty:
+            pass  # Rest of schedule is still being generated
+        except Exception:
+            # Schedule couldn't be generated, so the season is removed along with the games saved so far
+            stop.set()
+            db.rollback()
+            error_reporting.report_error(get_error())
+            return None
+        return False, num_games
+
+    def continue_schedule(self, start_date, batches, stop, progress):
+        if progress is None:
+            stop.set()
+            self.finish_new_season(False)
             return
-        # Enter new season into database
-        schedule = analysis.generate_new_schedule(eval(self.spinbox_num_games.get()), player_ids)
-        self.controller.get_db().insert_season(self.date_entry_start_date.get_date(), len(schedule) + 1)
-        for game in range(len(schedule)):
-            self.controller.get_db().insert_game(self.date_entry_start_date.get_date(), game + 1, schedule[game][0],
-                                                 schedule[game][1])
+        b_committed, num_games = progress
+        if b_committed:
+            self.finish_new_season(True)
+            return
+        self.show_schedule_progress(num_games)
+        self.submit_schedule_batches(start_date, batches, stop, num_games)
+
+    def show_schedule_progress(self, num_games):
+        self.label_schedule_progress.config(text='Saved {} games'.format(num_games))
+
+    def finish_new_season(self, b_created):
+        self.button_submit.config(state='normal')
+        if not b_created:
+            self.label_schedule_progress.config(text='Season not created')
+            return
+        self.label_schedule_progress.config(text='Season created')
         self.reset_entries()
 
 
 class LiveGameWindow(tk.Frame):
     def __init__(self, parent, controller):
-        self.IMAGE_SIZE_PX = (100, 100)
+        # Imported here so PIL is only loaded once a game is played
+        import player_images
+        self.IMAGE_SIZE_PX = player_images.THUMBNAIL_SIZE_PX
         tk.Frame.__init__(self, parent)
         self.controller = controller
+        self.game_id = -1  # ID of game being played
+        self.player_ids = (None, None)  # IDs of home and away players of the next game, used to load their images
+        self.b_player_images_loaded = True
+        self.player_image_cache = player_images.DecodedImageCache()
         # Game info label
         self.label_game_info = tk.Label(self, justify='center')
         self.label_game_info.grid(row=1, column=1, pady=10)
@@ -641,70 +1144,130 @@ class LiveGameWindow(tk.Frame):
         self.button_submit = tk.Button(self.frame_completed_game_action, text='Submit Game',
                                        command=self.submit_game)
         self.button_submit.grid(row=1, column=2, padx=10)
-        # Set up callbacks for updating text for next unplayed game details
-        self.controller.get_db().register_insert_callback(Table.SEASON, self.update_game_details)
-        self.controller.get_db().register_insert_callback(Table.GAME, self.update_game_details)
-        self.controller.get_db().register_insert_callback(Table.PLAYER_GAME, self.update_game_details)
-        self.controller.get_db().register_insert_callback(Table.FOOTWEAR, self.update_footwear_options)
-
-    def update_game_details(self):
-        next_unplayed_game_details = self.controller.get_db().get_next_unplayed_game_details()
+        # Listen for changes that update next unplayed game details
+        self.controller.subscribe_changes([Table.SEASON, Table.GAME, Table.PLAYER_GAME], self.update_game_details)
+        self.controller.subscribe_changes([Table.FOOTWEAR], self.update_footwear_options)
+        self.controller.subscribe_changes([Table.PLAYER], lambda _: self.player_image_cache.clear())
+
+    def update_game_details(self, _=None):
+        self.label_game_info.config(text='Loading...')
+        self.button_submit.config(state='disabled')
+        self.controller.get_db_worker().submit(self.read_game_details, self.show_game_details)
+
+    @staticmethod
+    def read_game_details(db):
+        """
+        Read the next unplayed game and its players. Runs on the database worker
+        :return: Tuple of next unplayed game details, home player details and away player details
+        """
+        next_unplayed_game_details = db.get_next_unplayed_game_details()
+        if next_unplayed_game_details is None:
+            return None
+        if len(next_unplayed_game_details) == 0:
+            return next_unplayed_game_details, [], []
+        home_player_details = db.get_player_details(next_unplayed_game_details[3])
+        away_player_details = db.get_player_details(next_unplayed_game_details[4])
+        if home_player_details is None or away_player_details is None:
+            return None
+        return next_unplayed_game_details, home_player_details, away_player_details
+
+    def show_game_details(self, game_details):
+        # Game can't be submitted if its details couldn't be read
+        if game_details is None:
+            self.label_game_info.config(text='Game Not Available')
+            return
+        next_unplayed_game_details, home_player_details, away_player_details = game_details
         # This window should never be opened if there isn't another unplayed game
         # If there is, make sure the game can't be submitted but don't bother updating any information
         if len(next_unplayed_game_details) == 0:
-            self.button_submit.config(state='disabled')
+            self.label_game_info.config(text='')
             return
+        self.game_id = next_unplayed_game_details[0]
         # Update game info label
         game_info_text = "Game " + str(next_unplayed_game_details[2]) + \
                          "\nSeason " + str(next_unplayed_game_details[1].strftime('%m/%d/%Y'))
         self.label_game_info.config(text=game_info_text)
-        # Update home player details
-        home_player_details = self.controller.get_db().get_player_details(next_unplayed_game_details[3])
-        if len(home_player_details) == 0:
-            self.button_submit.config(state='disabled')
-            return
-        if home_player_details[1] is not None:
-            logo = ImageTk.PhotoImage(Image.open(io.BytesIO(home_player_details[1])).resize(self.IMAGE_SIZE_PX))
-            self.label_home_player_logo.config(image=logo)
-            self.label_home_player_logo.image = logo
-        else:
-            self.label_home_player_logo.config(image=None)
-            self.label_home_player_logo.image = None
-        if home_player_details[2] is not None:
-            headshot = ImageTk.PhotoImage(Image.open(io.BytesIO(home_player_details[2])).resize(self.IMAGE_SIZE_PX))
-            self.label_home_player_headshot.config(image=headshot)
-            self.label_home_player_headshot.image = headshot
-        else:
-            self.label_home_player_headshot.config(image=None)
-            self.label_home_player_headshot.image = None
+        # Update player details
+        if len(home_player_details) == 0 or len(away_player_details) == 0:
+            return
         self.label_home_player_name.config(text=home_player_details[0].upper())
-        # Update away player details
-        away_player_details = self.controller.get_db().get_player_details(next_unplayed_game_details[4])
-        if len(away_player_details) == 0:
-            self.button_submit.config(state='disabled')
-            return
-        if away_player_details[1] is not None:
-            logo = ImageTk.PhotoImage(Image.open(io.BytesIO(away_player_details[1])).resize(self.IMAGE_SIZE_PX))
-            self.label_away_player_logo.config(image=logo)
-            self.label_away_player_logo.image = logo
-        else:
-            self.label_away_player_logo.config(image=None)
-            self.label_away_player_logo.image = None
-        if away_player_details[2] is not None:
-            headshot = ImageTk.PhotoImage(Image.open(io.BytesIO(away_player_details[2])).resize(self.IMAGE_SIZE_PX))
-            self.label_away_player_headshot.config(image=headshot)
-            self.label_away_player_headshot.image = headshot
-        else:
-            self.label_away_player_headshot.config(image=None)
-            self.label_away_player_headshot.image = None
         self.label_away_player_name.config(text=away_player_details[0].upper())
+        # Images are only loaded once this window is shown
+        self.player_ids = (home_player_details[1], away_player_details[1])
+        self.b_player_images_loaded = False
+        if self.controller.get_current_frame() == LiveGameWindow:
+            self.load_player_images()
         self.button_submit.config(state='normal')
         # Update winner choices
         self.radiobutton_winner_home.config(text=home_player_details[0].upper())
         self.radiobutton_winner_away.config(text=away_player_details[0].upper())
 
-    def update_footwear_options(self):
-        current_footwear = self.controller.get_db().get_footwear_names()
+    def on_show(self):
+        if not self.b_player_images_loaded:
+            self.load_player_images()
+
+    def load_player_images(self):
+        # Show images decoded recently right away and read the rest in the background
+        missing_images = []
+        for player_id, label_logo, label_headshot in (
+                (self.player_ids[0], self.label_home_player_logo, self.label_home_player_headshot),
+                (self.player_ids[1], self.label_away_player_logo, self.label_away_player_headshot)):
+            for image, thumbnail, label in ((PlayerImage.LOGO, PlayerImage.LOGO_THUMBNAIL, label_logo),
+                                            (PlayerImage.HEADSHOT, PlayerImage.HEADSHOT_THUMBNAIL, label_headshot)):
+                key = (player_id, image, self.IMAGE_SIZE_PX)
+                if player_id is not None and not self.player_image_cache.is_cached(key):
+                    missing_images.append((player_id, image, thumbnail))
+                    continue
+                photo = None if player_id is None else self.player_image_cache.get(key)
+                label.config(image=photo)
+                label.image = photo
+        self.b_player_images_loaded = True
+        if len(missing_images) > 0:
+            player_ids = self.player_ids
+            self.controller.get_db_worker().submit(
+                lambda db: [(player_id, image, self.read_player_thumbnail(db, player_id, image, thumbnail))
+                            for player_id, image, thumbnail in missing_images],
+                lambda thumbnails: self.cache_player_images(player_ids, thumbnails))
+
+    @staticmethod
+    def read_player_thumbnail(db, player_id, image, thumbnail):
+        """
+        Read the thumbnail of a player image. Runs on the database worker
+        :param db: PPPLDatabase
+        :param player_id: ID of player
+        :param image: PlayerImage of original image
+        :param thumbnail: PlayerImage of thumbnail of image
+        :return: Thumbnail file contents, or None if player has no such image
+        """
+        import player_images
+        thumbnail_bytes = db.get_player_image(player_id, thumbnail)
+        if thumbnail_bytes is None:
+            # Players from before thumbnails were stored get theirs made the first time they are shown
+            thumbnail_bytes = player_images.make_thumbnail(db.get_player_image(player_id, image))
+            if thumbnail_bytes is not None:
+                db.update_player_thumbnail(player_id, thumbnail, thumbnail_bytes)
+        return thumbnail_bytes
+
+    def cache_player_images(self, player_ids, thumbnails):
+        import player_images
+        # Images that couldn't be read are left out, and read again the next time they're shown
+        if thumbnails is None:
+            return
+        # Images can only be decoded for display on the GUI thread
+        for player_id, image, thumbnail_bytes in thumbnails:
+            photo = None if thumbnail_bytes is None else player_images.decode_image(thumbnail_bytes,
+                                                                                     self.IMAGE_SIZE_PX)
+            self.player_image_cache.put((player_id, image, self.IMAGE_SIZE_PX), photo)
+        # Players may have changed while images were being read
+        if player_ids == self.player_ids:
+            self.load_player_images()
+
+    def update_footwear_options(self, _=None):
+        self.controller.get_db_worker().submit(lambda db: db.get_footwear_names(), self.show_footwear_options)
+
+    def show_footwear_options(self, current_footwear):
+        if current_footwear is None:
+            return
         current_footwear.sort()
         self.combobox_home_player_footwear.config(values=current_footwear)
         self.combobox_away_player_footwear.config(values=current_footwear)
@@ -753,35 +1316,43 @@ class LiveGameWindow(tk.Frame):
         if len(self.combobox_home_player_footwear.get()) == 0 or len(self.combobox_away_player_footwear.get()) == 0:
             error_reporting.report_warning('No footwear entered')
             return
-        next_unplayed_game_details = self.controller.get_db().get_next_unplayed_game_details()
-        home_player_details = self.controller.get_db().get_player_details(next_unplayed_game_details[3])
-        away_player_details = self.controller.get_db().get_player_details(next_unplayed_game_details[4])
-        # Insert home player to database
-        current_footwear = self.combobox_home_player_footwear.get()
-        self.controller.get_db().insert_footwear(current_footwear)
-        footwear_id = self.controller.get_db().get_footwear_id(current_footwear)
-        differential = ('-' if self.winner.get() == 'away' else '') + self.spinbox_differential.get()
-        self.controller.get_db().insert_player_game(
-            player_id=home_player_details[3], game_id=next_unplayed_game_details[0], footwear_id=footwear_id,
-            differential=differential, knockovers=self.spinbox_home_player_knockovers.get(),
-            own_cups=self.spinbox_home_player_own_cups.get(), aces=self.spinbox_home_player_aces.get(),
-            serve_breaks=self.spinbox_home_player_serve_breaks.get(),
-            penalty_shots_made=self.spinbox_home_player_psm.get(),
-            penalty_shots_attempted=self.spinbox_home_player_psa.get(),
-            penalties_committed=self.spinbox_away_player_psa.get())
-        # Insert away player to database
-        current_footwear = self.combobox_away_player_footwear.get()
-        self.controller.get_db().insert_footwear(current_footwear)
-        footwear_id = self.controller.get_db().get_footwear_id(current_footwear)
-        differential = ('-' if self.winner.get() == 'home' else '') + self.spinbox_differential.get()
-        self.controller.get_db().insert_player_game(
-            player_id=away_player_details[3], game_id=next_unplayed_game_details[0], footwear_id=footwear_id,
-            differential=differential, knockovers=self.spinbox_away_player_knockovers.get(),
-            own_cups=self.spinbox_away_player_own_cups.get(), aces=self.spinbox_away_player_aces.get(),
-            serve_breaks=self.spinbox_away_player_serve_breaks.get(),
-            penalty_shots_made=self.spinbox_away_player_psm.get(),
-            penalty_shots_attempted=self.spinbox_away_player_psa.get(),
-            penalties_committed=self.spinbox_home_player_psa.get())
+        # Read entered stats here since widgets can only be used from the GUI thread. Stats of both players are saved
+        # in a single transaction
+        home_player_game = {
+            'footwear': self.combobox_home_player_footwear.get(),
+            'differential': ('-' if self.winner.get() == 'away' else '') + self.spinbox_differential.get(),
+            'knockovers': self.spinbox_home_player_knockovers.get(),
+            'own_cups': self.spinbox_home_player_own_cups.get(),
+            'aces': self.spinbox_home_player_aces.get(),
+            'serve_breaks': self.spinbox_home_player_serve_breaks.get(),
+            'penalty_shots_made': self.spinbox_home_player_psm.get(),
+            'penalty_shots_attempted': self.spinbox_home_player_psa.get(),
+            'penalties_committed': self.spinbox_away_player_psa.get()
+        }
+        away_player_game = {
+            'footwear': self.combobox_away_player_footwear.get(),
+            'differential': ('-' if self.winner.get() == 'home' else '') + self.spinbox_differential.get(),
+            'knockovers': self.spinbox_away_player_knockovers.get(),
+            'own_cups': self.spinbox_away_player_own_cups.get(),
+            'aces': self.spinbox_away_player_aces.get(),
+            'serve_breaks': self.spinbox_away_player_serve_breaks.get(),
+            'penalty_shots_made': self.spinbox_away_player_psm.get(),
+            'penalty_shots_attempted': self.spinbox_away_player_psa.get(),
+            'penalties_committed': self.spinbox_home_player_psa.get()
+        }
+        self.button_submit.config(state='disabled', text='Submitting...')
+        game_id = self.game_id
+        self.controller.get_db_worker().submit(
+            lambda db: db.insert_game_result(game_id, home_player_game, away_player_game), self.finish_submit_game)
+
+    def finish_submit_game(self, b_submitted):
+        self.button_submit.config(text='Submit Game')
+        # Entered stats are kept if game couldn't be submitted, so it can be submitted again
+        if not b_submitted:
+            self.button_submit.config(state='normal')
+            return
+        # Game details are read again so the submit button is only enabled if there's another game to submit
+        self.update_game_details()
         self.reset_entries()
         self.controller.show_frame(EnterLeagueWindow)
 
@@ -0,0 +1,205 @@
+"""
+Export of all league data to a directory of CSV or JSON lines files, one per table, and import of an export into an
+empty database. Rows are streamed in batches both ways, so memory use doesn't grow with the size of the league
+Usage: python league_export.py {export,import} DIRECTORY [--format {jsonl,csv}] [--file FILE | --host HOST --user USER]
+       [--force]
+"""
+import argparse
+import base64
+import csv
+import datetime
+import getpass
+import json
+import os
+import sys
+from database import PPPLDatabase, EXPORT_TABLE_COLUMNS, Table, get_error
+import error_reporting
+
+FILE_FORMATS = ('jsonl', 'csv')
+DEFAULT_BATCH_ROWS = 1000  # Rows read or inserted at once
+IMAGE_BATCH_ROWS = 10  # Rows read or inserted at once from tables with images, which can be megabytes each
+CSV_MAX_FIELD_CHARS = 2 ** 31 - 1  # Images are far larger than the csv module's default field limit
+
+
+def encode_value(value, column_type):
+    """
+    :param value: Value read from the database
+    :param column_type: Type of column in database.EXPORT_TABLE_COLUMNS
+    :return: Value as stored in JSON
+    """
+    if value is None:
+        return None
+    if column_type == 'date':
+        return value.isoformat()
+    if column_type == 'blob':
+        return base64.b64encode(value).decode('ascii')
+    if column_type == 'bool':
+        return bool(value)
+    return value
+
+
+def decode_value(value, column_type):
+    """
+    :param value: Value as stored in JSON, or text from CSV where empty text is None for every type but text
+    :param column_type: Type of column in database.EXPORT_TABLE_COLUMNS
+    :return: Value to insert into the database
+    """
+    if value is None or (value == '' and column_type != 'text'):
+        return None
+    if column_type == 'int':
+        return int(value)
+    if column_type == 'date':
+        return datetime.date.fromisoformat(value)
+    if column_type == 'blob':
+        return base64.b64decode(value)
+    if column_type == 'bool':
+        return value in (True, 'True')
+    return value
+
+
+def get_batch_rows(table_name, batch_size):
+    # Batches of images are kept small so a batch never takes up too much memory
+    if any(column_type == 'blob' for _, column_type in EXPORT_TABLE_COLUMNS[table_name]):
+        return min(batch_size, IMAGE_BATCH_ROWS)
+    return batch_size
+
+
+def get_table_path(directory, table_name, file_format):
+    return os.path.join(directory, '{}.{}'.format(table_name, file_format))
+
+
+def export_league(db, directory, file_format='jsonl', batch_size=DEFAULT_BATCH_ROWS):
+    """
+    Write every table of league data to its own file. Every table is read in a single read transaction, so the export
+    is consistent even while the app is recording games
+    :param db: Connected PPPLDatabase to export
+    :param directory: Directory to write files to, which is created if it doesn't exist
+    :param file_format: 'jsonl' for a JSON object per row or 'csv' for CSV with a header row
+    :param batch_size: Maximum number of rows read from the database at once
+    :return: Dictionary of number of rows exported by table name, or None if export failed
+    """
+    row_counts = {}
+    try:
+        os.makedirs(directory, exist_ok=True)
+        db.start_read_transaction()
+        for table_name, columns in EXPORT_TABLE_COLUMNS.items():
+            column_names = [column_name for column_name, _ in columns]
+            row_counts[table_name] = 0
+            with open(get_table_path(directory, table_name, file_format), 'w', newline='', encoding='utf-8') as file:
+                if file_format == 'csv':
+                    writer = csv.writer(file)
+                    writer.writerow(column_names)
+                for rows in db.export_table_rows(table_name, get_batch_rows(table_name, batch_size)):
+                    for row in rows:
+                        values = [encode_value(value, column_type) for value, (_, column_type) in zip(row, columns)]
+                        if file_format == 'csv':
+                            writer.writerow(['' if value is None else value for value in values])
+                        else:
+                            file.write(json.dumps(dict(zip(column_names, values))) + '\n')
+                    row_counts[table_name] += len(rows)
+    except Exception:
+        error_reporting.report_error(get_error())
+        return None
+    finally:
+        db.rollback()
+    return row_counts
+
+
+def read_table_rows(directory, table_name, file_format, batch_size):
+    """
+    Read the rows of a table's file in batches
+    :return: Generator of lists of rows ready to insert, with columns in the order of database.EXPORT_TABLE_COLUMNS
+    """
+    columns = EXPORT_TABLE_COLUMNS[table_name]
+    with open(get_table_path(directory, table_name, file_format), newline='', encoding='utf-8') as file:
+        if file_format == 'csv':
+            records = csv.DictReader(file)
+        else:
+            records = (json.loads(line) for line in file if line.strip() != '')
+        batch = []
+        for record in records:
+            batch.append(tuple(decode_value(record[column_name], column_type) for column_name, column_type in columns))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if len(batch) > 0:
+            yield batch
+
+
+def import_league(db, directory, file_format='jsonl', batch_size=DEFAULT_BATCH_ROWS, b_replace=False):
+    """
+    Replace all league data with an export. Every table is imported in a single transaction, so a failed import leaves
+    the database empty instead of half imported. Standings and ratings are then made from the imported games
+    :param db: Connected PPPLDatabase to import into. Its schema is reset first
+    :param directory: Directory of files written by export_league
+    :param file_format: Format of files, 'jsonl' or 'csv'
+    :param batch_size: Maximum number of rows inserted in one statement
+    :param b_replace: Whether to replace league data already in the database. If not, import stops without changing
+    a database that isn't empty
+    :return: Dictionary of number of rows imported by table name, or None if import failed
+    """
+    csv.field_size_limit(CSV_MAX_FIELD_CHARS)
+    try:
+        b_has_league_data = db.has_league_data()
+    except Exception:
+        error_reporting.report_error(get_error())
+        return None
+    # Resetting the schema deletes the league, so it's only done to a league that's meant to be replaced
+    if b_has_league_data and not b_replace:
+        error_reporting.report_error('Database already has league data, which importing would delete. Import with '
+                                     '--force to replace it')
+        return None
+    if not db.reset_database_schema():
+        return None
+    row_counts = {}
+    try:
+        for table_name in EXPORT_TABLE_COLUMNS:
+            row_counts[table_name] = 0
+            for rows in read_table_rows(directory, table_name, file_format, get_batch_rows(table_name, batch_size)):
+                db.import_table_rows(table_name, rows)
+                row_counts[table_name] += len(rows)
+    except Exception:
+        db.rollback()
+        error_reporting.report_error(get_error())
+        return None
+    if not db.commit(list(Table)) or not db.rebuild_standings() or not db.replay_ratings():
+        return None
+    return row_counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export league data to files or import it from them')
+    parser.add_argument('action', choices=('export', 'import'))
+    parser.add_argument('directory', help='directory of exported files')
+    parser.add_argument('--format', choices=FILE_FORMATS, default='jsonl', help='format of exported files')
+    parser.add_argument('--file', help='SQLite database file to use instead of the default one')
+    parser.add_argument('--host', help='MySQL server to use instead of a SQLite file')
+    parser.add_argument('--user', help='MySQL user')
+    parser.add_argument('--force', action='store_true', help='import even if the database already has league data, '
+                                                             'deleting it')
+    args = parser.parse_args()
+    # There's no GUI to show errors in
+    error_reporting.use_console()
+    db = PPPLDatabase()
+    if args.host is not None:
+        db.connect_server(args.host, args.user, getpass.getpass('Database Password: '))
+    elif args.file is not None:
+        db.connect_file(args.file)
+    else:
+        db.connect_file()
+    if db.backend is None:
+        return 1
+    if args.action == 'export':
+        row_counts = export_league(db, args.directory, args.format)
+    else:
+        row_counts = import_league(db, args.directory, args.format, b_replace=args.force)
+    db.disconnect_server()
+    if row_counts is None:
+        return 1
+    for table_name, row_count in row_counts.items():
+        print('{:>12}: {} rows'.format(table_name, row_count))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,11 +1,37 @@
+import time
+startup_start_time = time.perf_counter()  # Taken before the rest of the app is imported so imports are timed too
 from database import PPPLDatabase
 import gui
+from startup_report import StartupReport
 
-db_host = input('Database Host Name: ')
-db_user = input('Database Username: ')
-db_password = input('Database Password: ')
+startup_report = StartupReport(startup_start_time)
+startup_report.mark('modules imported')
+startup_report.pause()
+db_host = input('Database Host Name (leave empty to use a local SQLite file): ')
+if db_host == '':
+    db_file = input('SQLite File (leave empty for default): ')
+else:
+    db_user = input('Database Username: ')
+    db_password = input('Database Password: ')
+startup_report.resume()
 pppl_db = PPPLDatabase()
 ui = gui.MainGUI(pppl_db)
-pppl_db.connect_server(db_host, db_user, db_password)
+startup_report.mark('main window built')
+ui.after_idle(lambda: startup_report.mark('main window shown'))
+
+
+def connect(db):
+    if db_host == '':
+        if db_file == '':
+            db.connect_file()
+        else:
+            db.connect_file(db_file)
+    else:
+        db.connect_server(db_host, db_user, db_password)
+
+
+# Connecting may migrate the schema, so it's done on the database worker while the window is already shown
+ui.get_db_worker().submit(connect, lambda _: startup_report.mark('database connected'))
 ui.mainloop()
-pppl_db.disconnect_server()
\ No newline at end of file
+ui.get_db_worker().stop()
+pppl_db.disconnect_server()
@@ -0,0 +1,75 @@
+import collections
+import io
+
+THUMBNAIL_SIZE_PX = (100, 100)
+DEFAULT_MAX_CACHED_IMAGES = 32
+
+
+def make_thumbnail(image_bytes, size_px=THUMBNAIL_SIZE_PX):
+    """
+    Resize a player image to the size it's shown at
+    :param image_bytes: Image file contents, or None if there is no image
+    :param size_px: Size of thumbnail in pixels
+    :return: PNG file contents of thumbnail, or None if there is no image
+    """
+    if image_bytes is None:
+        return None
+    # Imported here so the database layer only needs Pillow once a player has an image, and never needs Tk
+    from PIL import Image
+    thumbnail = Image.open(io.BytesIO(image_bytes)).resize(size_px)
+    # PNG can't store every mode an original image may use
+    if thumbnail.mode not in ('1', 'L', 'LA', 'P', 'RGB', 'RGBA'):
+        thumbnail = thumbnail.convert('RGBA')
+    thumbnail_file = io.BytesIO()
+    thumbnail.save(thumbnail_file, format='PNG')
+    return thumbnail_file.getvalue()
+
+
+class DecodedImageCache:
+    """
+    Least recently used cache of images decoded and resized for display, so showing the same image again needs neither
+    """
+    def __init__(self, max_images=DEFAULT_MAX_CACHED_IMAGES):
+        """
+        :param max_images: Maximum number of images to keep, after which least recently used ones are removed
+        """
+        self.max_images = max_images
+        self.images = collections.OrderedDict()
+
+    def is_cached(self, key):
+        return key in self.images
+
+    def get(self, key):
+        """
+        :param key: Key image was stored with
+        :return: Cached image, which is None for keys that have no image
+        """
+        self.images.move_to_end(key)
+        return self.images[key]
+
+    def put(self, key, image):
+        """
+        :param key: Key to store image with, like player ID, image type and size
+        :param image: ImageTk.PhotoImage to store, or None to remember that key has no image
+        """
+        self.images[key] = image
+        self.images.move_to_end(key)
+        while len(self.images) > self.max_images:
+            self.images.popitem(last=False)
+
+    def clear(self):
+        self.images.clear()
+
+
+def decode_image(image_bytes, size_px):
+    """
+    Decode an image for display, only resizing it if it isn't already the right size
+    :param image_bytes: Image file contents
+    :param size_px: Size to show image at in pixels
+    :return: ImageTk.PhotoImage of image
+    """
+    from PIL import Image, ImageTk
+    image = Image.open(io.BytesIO(image_bytes))
+    if image.size != tuple(size_px):
+        image = image.resize(size_px)
+    return ImageTk.PhotoImage(image)
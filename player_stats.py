@@ -0,0 +1,114 @@
+import numpy as np
+import threading
+from database import Table
+
+# Summed stats in the order they follow the grouping columns of database.PPPLDatabase.get_player_game_totals
+TOTAL_COLUMNS = ['games', 'differential', 'knockovers', 'own_cups', 'aces', 'serve_breaks', 'penalty_shots_made',
+                 'penalty_shots_attempted', 'penalties_committed']
+GAMES, DIFFERENTIAL, KNOCKOVERS, OWN_CUPS, ACES, SERVE_BREAKS, PENALTY_SHOTS_MADE, PENALTY_SHOTS_ATTEMPTED, \
+    PENALTIES_COMMITTED = range(len(TOTAL_COLUMNS))
+
+
+class PlayerGameColumns:
+    """
+    Player game totals grouped by season, player, side and footwear, held as one array per column
+    """
+    def __init__(self, rows):
+        """
+        :param rows: Rows from database.PPPLDatabase.get_player_game_totals
+        """
+        self.seasons = np.array([row[0] for row in rows], dtype='datetime64[D]')
+        player_ids = np.array([row[1] for row in rows], dtype=np.int64)
+        # Players are numbered from 0 so their totals can be summed by index
+        self.player_ids, self.player_indexes = np.unique(player_ids, return_inverse=True)
+        self.player_names = [None] * len(self.player_ids)
+        for player_index, row in zip(self.player_indexes, rows):
+            self.player_names[player_index] = row[2]
+        self.b_home = np.array([bool(row[3]) for row in rows], dtype=bool)
+        # Footwear names compare ignoring case like they do in the database
+        self.footwear = np.array([row[4].lower() for row in rows], dtype=object)
+        self.totals = np.array([row[5:] for row in rows], dtype=np.int64).reshape(len(rows), len(TOTAL_COLUMNS))
+
+
+class PlayerStatsEngine:
+    """
+    Per player totals and rates of recorded games. Player games are read with a single grouped query, and stats for
+    every filter are calculated from the grouped columns without going back to the database. Both are kept until
+    player games change
+    """
+    def __init__(self, db):
+        """
+        :param db: PPPLDatabase to read player games from. Stats are invalidated whenever its player games change
+        """
+        self.db = db
+        self.lock = threading.Lock()
+        self.columns = None  # PlayerGameColumns, or None if they have to be read again
+        self.stats = {}  # Stats already calculated, by filter
+        self.generation = 0  # Increased on every invalidation, so columns read before one aren't kept
+        db.register_insert_callback(Table.PLAYER_GAME, self.invalidate)
+
+    def invalidate(self):
+        with self.lock:
+            self.columns = None
+            self.stats = {}
+            self.generation += 1
+
+    def get_player_stats(self, season=None, b_home=None, footwear=None):
+        """
+        Calculate stats of every player with games matching a filter. Runs on the database worker, since player games
+        are read from the database if they aren't already held
+        :param season: Start date of season to include games of, or None for all seasons
+        :param b_home: True to only include home games, False to only include away games or None for both
+        :param footwear: Name of footwear to include games of, or None for all footwear
+        :return: List of stats of players sorted by name, as tuples of player name, games played, total differential,
+        average differential, knockovers, knockovers per game, own cups, aces, aces per game, serve breaks, penalty
+        shots made, penalty shots attempted, penalty shot percentage (None without attempts) and penalties committed
+        """
+        key = (season, b_home, None if footwear is None else footwear.lower())
+        with self.lock:
+            if key in self.stats:
+                return self.stats[key]
+            columns = self.columns
+            generation = self.generation
+        if columns is None:
+            columns = PlayerGameColumns(self.db.get_player_game_totals())
+        stats = self._calculate_stats(columns, *key)
+        with self.lock:
+            # Player games that changed while these were calculated make them out of date
+            if generation == self.generation:
+                self.columns = columns
+                self.stats[key] = stats
+        return stats
+
+    @staticmethod
+    def _calculate_stats(columns, season, b_home, footwear):
+        b_included = np.ones(len(columns.totals), dtype=bool)
+        if season is not None:
+            b_included &= columns.seasons == np.datetime64(season, 'D')
+        if b_home is not None:
+            b_included &= columns.b_home == b_home
+        if footwear is not None:
+            b_included &= columns.footwear == footwear
+        totals = np.zeros((len(columns.player_ids), len(TOTAL_COLUMNS)), dtype=np.int64)
+        np.add.at(totals, columns.player_indexes[b_included], columns.totals[b_included])
+        games = totals[:, GAMES]
+        # Rates of players without games are never shown, so dividing by at least 1 game is safe
+        games_divisor = np.maximum(games, 1)
+        average_differential = totals[:, DIFFERENTIAL] / games_divisor
+        knockovers_per_game = totals[:, KNOCKOVERS] / games_divisor
+        aces_per_game = totals[:, ACES] / games_divisor
+        penalty_shots_attempted = totals[:, PENALTY_SHOTS_ATTEMPTED]
+        penalty_shot_percentage = 100 * totals[:, PENALTY_SHOTS_MADE] / np.maximum(penalty_shots_attempted, 1)
+        stats = []
+        for player_index in np.flatnonzero(games > 0):
+            player_totals = totals[player_index].tolist()
+            stats.append((
+                columns.player_names[player_index], player_totals[GAMES], player_totals[DIFFERENTIAL],
+                float(average_differential[player_index]), player_totals[KNOCKOVERS],
+                float(knockovers_per_game[player_index]), player_totals[OWN_CUPS], player_totals[ACES],
+                float(aces_per_game[player_index]), player_totals[SERVE_BREAKS], player_totals[PENALTY_SHOTS_MADE],
+                player_totals[PENALTY_SHOTS_ATTEMPTED],
+                float(penalty_shot_percentage[player_index]) if player_totals[PENALTY_SHOTS_ATTEMPTED] > 0 else None,
+                player_totals[PENALTIES_COMMITTED]))
+        stats.sort(key=lambda player_stats: player_stats[0].lower())
+        return stats
@@ -0,0 +1,107 @@
+# Elo rating parameters. Stored ratings are replayed with new parameters when these change
+INITIAL_RATING = 1500.0  # Rating of players who haven't played a game
+K_FACTOR = 32.0  # Most a rating can change in one game
+RATING_SCALE = 400.0  # Rating difference at which the higher rated player is expected to score 10 times as much
+
+
+def get_rating_parameters():
+    """
+    :return: Tuple of initial rating, K factor and rating scale used for ratings
+    """
+    return INITIAL_RATING, K_FACTOR, RATING_SCALE
+
+
+def get_score(differential):
+    """
+    :param differential: Player's point differential in a game
+    :return: Player's score in a game, 1 for a win, 0.5 for a tie and 0 for a loss
+    """
+    # Works the same on arrays of differentials
+    return 0.5 * ((differential > 0) * 1.0 + (differential >= 0) * 1.0)
+
+
+def get_expected_score(rating, opponent_rating, scale=RATING_SCALE):
+    """
+    :param rating: Rating of player, or array of ratings
+    :param opponent_rating: Rating of player's opponent, or array of ratings
+    :param scale: Rating scale
+    :return: Score player is expected to get against opponent
+    """
+    return 1 / (1 + 10.0 ** ((opponent_rating - rating) / scale))
+
+
+def rate_game(home_rating, away_rating, home_differential, k_factor=K_FACTOR, scale=RATING_SCALE):
+    """
+    Update players' ratings with the result of a game between them
+    :param home_rating: Home player's rating before game
+    :param away_rating: Away player's rating before game
+    :param home_differential: Home player's point differential, so negative if away player won
+    :param k_factor: K factor
+    :param scale: Rating scale
+    :return: Tuple of home and away players' ratings after game
+    """
+    change = k_factor * (get_score(home_differential) - get_expected_score(home_rating, away_rating, scale))
+    return home_rating + change, away_rating - change
+
+
+def get_independent_layers(home_indexes, away_indexes, num_players):
+    """
+    Group games into layers that can be rated at the same time. Each game is put in the layer after the last one either
+    of its players played in, so every game of a player is in a later layer than the player's games before it, and no
+    player plays more than once in a layer
+    :param home_indexes: Array of home player index of each game, in the order games were played
+    :param away_indexes: Array of away player index of each game
+    :param num_players: Number of players
+    :return: Array of layer of each game, starting at 0
+    """
+    # Imported here so rating a single game doesn't load NumPy
+    import numpy as np
+    last_player_layers = [-1] * num_players
+    layers = np.empty(len(home_indexes), dtype=np.int64)
+    for game, (home, away) in enumerate(zip(home_indexes.tolist(), away_indexes.tolist())):
+        layer = max(last_player_layers[home], last_player_layers[away]) + 1
+        last_player_layers[home] = layer
+        last_player_layers[away] = layer
+        layers[game] = layer
+    return layers
+
+
+def replay_games(home_indexes, away_indexes, home_differentials, num_players, initial_rating=INITIAL_RATING,
+                 k_factor=K_FACTOR, scale=RATING_SCALE):
+    """
+    Rate every game from scratch, giving the same ratings as rating games one at a time in order. Games are rated one
+    layer of independent games at a time, with every game in a layer rated at once
+    :param home_indexes: Array of home player index of each game, in the order games were played
+    :param away_indexes: Array of away player index of each game
+    :param home_differentials: Array of home player's point differential in each game
+    :param num_players: Number of players, whose indexes go from 0 to num_players - 1
+    :param initial_rating: Rating of players before their first game
+    :param k_factor: K factor
+    :param scale: Rating scale
+    :return: Tuple of array of ratings of each player after all games, then arrays of home ratings before, away ratings
+    before, home ratings after and away ratings after each game
+    """
+    import numpy as np
+    ratings = np.full(num_players, initial_rating, dtype=np.float64)
+    home_before = np.empty(len(home_indexes), dtype=np.float64)
+    away_before = np.empty(len(home_indexes), dtype=np.float64)
+    home_after = np.empty(len(home_indexes), dtype=np.float64)
+    away_after = np.empty(len(home_indexes), dtype=np.float64)
+    if len(home_indexes) == 0:
+        return ratings, home_before, away_before, home_after, away_after
+    layers = get_independent_layers(home_indexes, away_indexes, num_players)
+    # Games sorted by layer, keeping the order of games within a layer
+    layer_order = np.argsort(layers, kind='stable')
+    layer_starts = np.searchsorted(layers[layer_order], np.arange(layers.max() + 2))
+    for layer in range(len(layer_starts) - 1):
+        games = layer_order[layer_starts[layer]:layer_starts[layer + 1]]
+        home = home_indexes[games]
+        away = away_indexes[games]
+        home_before[games] = ratings[home]
+        away_before[games] = ratings[away]
+        home_after[games], away_after[games] = rate_game(ratings[home], ratings[away], home_differentials[games],
+                                                         k_factor, scale)
+        # No player plays twice in a layer, so these never overwrite each other
+        ratings[home] = home_after[games]
+        ratings[away] = away_after[games]
+    return ratings, home_before, away_before, home_after, away_after
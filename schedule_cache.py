@@ -0,0 +1,124 @@
+import analysis
+import json
+import os
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(os.path.expanduser('~'), '.pppl', 'schedule_cache')
+DEFAULT_MAX_CACHE_BYTES = 50 * 1024 * 1024
+
+
+class ScheduleCache:
+    """
+    Disk cache of schedules from analysis.generate_new_schedule. A schedule only depends on the number of players and
+    games per player, so schedules are stored by player index and relabeled with the actual player IDs when used
+    """
+    def __init__(self, directory=DEFAULT_CACHE_DIRECTORY, max_bytes=DEFAULT_MAX_CACHE_BYTES,
+                 algorithm_version=analysis.SCHEDULE_ALGORITHM_VERSION):
+        """
+        :param directory: Directory to keep cached schedules in
+        :param max_bytes: Maximum total size of cached schedules, after which least recently used ones are removed
+        :param algorithm_version: Version of schedule algorithm that cached schedules must come from
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.algorithm_version = algorithm_version
+        os.makedirs(self.directory, exist_ok=True)
+        # Schedules from any other algorithm version are no longer valid
+        self.invalidate()
+
+    def _get_path(self, num_players, games_per_player):
+        return os.path.join(self.directory, 'schedule_{}_{}_v{}.json'.format(num_players, games_per_player,
+                                                                             self.algorithm_version))
+
+    def _get_cached_files(self):
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                if name.startswith('schedule_') and name.endswith('.json')]
+
+    def get_schedule(self, games_per_player, player_ids, round_robin=False):
+        """
+        Get a schedule from the cache, generating and caching it if it's not there yet
+        :param games_per_player: Minimum number of games each player plays
+        :param player_ids: List of player IDs to schedule
+        :param round_robin: Whether to build full round robin shapes directly instead of using the cache
+        :return: List of (home player ID, away player ID) tuples in order of games
+        """
+        return list(self.generate_schedule_games(games_per_player, player_ids, round_robin))
+
+    def generate_schedule_games(self, games_per_player, player_ids, round_robin=False):
+        """
+        Same as analysis.generate_new_schedule_games, but yields a cached schedule instantly if there is one and caches
+        the schedule once all of it is generated if there isn't
+        :param games_per_player: Minimum number of games each player plays
+        :param player_ids: List of player IDs to schedule
+        :param round_robin: Whether to build full round robin shapes directly instead of using the cache
+        :return: Generator of (home player ID, away player ID) tuples in order of games
+        """
+        # Directly built round robins are faster to build again than to load
+        if round_robin and analysis.is_round_robin_shape(games_per_player, len(player_ids)):
+            yield from analysis.generate_round_robin_games(games_per_player, player_ids)
+            return
+        index_schedule = self.load(len(player_ids), games_per_player)
+        if index_schedule is not None:
+            for home, away in index_schedule:
+                yield player_ids[home], player_ids[away]
+            return
+        index_schedule = []
+        for home, away in analysis.generate_new_schedule_games(games_per_player, list(range(len(player_ids)))):
+            index_schedule.append((home, away))
+            yield player_ids[home], player_ids[away]
+        try:
+            self.store(len(player_ids), games_per_player, index_schedule)
+        except OSError:
+            pass  # Schedule is still used if it can't be cached, it's just generated again next time
+
+    def load(self, num_players, games_per_player):
+        """
+        Load a schedule by player index from the cache
+        :param num_players: Number of players in schedule
+        :param games_per_player: Minimum number of games each player plays
+        :return: List of (home index, away index) tuples, or None if schedule isn't cached
+        """
+        path = self._get_path(num_players, games_per_player)
+        try:
+            with open(path) as file:
+                index_schedule = [tuple(game) for game in json.load(file)]
+            # Mark as recently used for eviction
+            os.utime(path)
+            return index_schedule
+        except (OSError, ValueError):
+            return None
+
+    def store(self, num_players, games_per_player, index_schedule):
+        """
+        Store a schedule by player index in the cache, removing least recently used schedules if it's over its size
+        :param num_players: Number of players in schedule
+        :param games_per_player: Minimum number of games each player plays
+        :param index_schedule: List of (home index, away index) tuples
+        """
+        path = self._get_path(num_players, games_per_player)
+        # Write to a temporary file first so a partially written schedule is never loaded
+        with open(path + '.tmp', 'w') as file:
+            json.dump(index_schedule, file, separators=(',', ':'))
+        os.replace(path + '.tmp', path)
+        self.evict()
+
+    def evict(self):
+        """
+        Remove least recently used schedules until the cache is within its maximum size
+        """
+        cached_files = sorted(self._get_cached_files(), key=os.path.getmtime)
+        total_bytes = sum(os.path.getsize(path) for path in cached_files)
+        while total_bytes > self.max_bytes and len(cached_files) > 0:
+            path = cached_files.pop(0)
+            total_bytes -= os.path.getsize(path)
+            os.remove(path)
+
+    def invalidate(self, b_all_versions=False):
+        """
+        Remove cached schedules from other versions of the schedule algorithm. Called whenever the cache is created,
+        and can be called to clear the cache after the algorithm changes
+        :param b_all_versions: Whether to remove schedules from the current algorithm version too
+        """
+        current_suffix = '_v{}.json'.format(self.algorithm_version)
+        for path in self._get_cached_files():
+            if b_all_versions or not path.endswith(current_suffix):
+                os.remove(path)
@@ -0,0 +1,91 @@
+import collections
+
+DEFAULT_PAGE_SIZE = 50  # Games read from the database at once
+DEFAULT_MAX_PAGES = 6  # Enough for the pages on screen and their neighbours
+
+
+class SchedulePageCache:
+    """
+    Pages of one season's games, each read by its range of game numbers so it's found from the (season, game_number)
+    index however far into the season it is. Neighbouring pages are read ahead of being shown, and only the most
+    recently used pages are kept, so memory use doesn't grow with the length of the season. Used from the GUI thread,
+    with pages read on the database worker
+    """
+    def __init__(self, db_worker, season, first_game_number, on_page_loaded, page_size=DEFAULT_PAGE_SIZE,
+                 max_pages=DEFAULT_MAX_PAGES):
+        """
+        :param db_worker: DatabaseWorker to read pages on
+        :param season: Start date of season
+        :param first_game_number: First game number of season, where the first page starts
+        :param on_page_loaded: Function taking no arguments, called on the GUI thread when a page has been read
+        :param page_size: Number of game numbers in each page
+        :param max_pages: Maximum number of pages to keep, after which least recently used ones are removed
+        """
+        self.db_worker = db_worker
+        self.season = season
+        self.first_game_number = first_game_number
+        self.on_page_loaded = on_page_loaded
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.pages = collections.OrderedDict()  # Rows of each page by game number, by page index
+        self.pending_pages = set()  # Indexes of pages being read
+        self.generation = 0  # Increased on every invalidation, so pages read before one aren't kept
+
+    def get_rows(self, first_game_number, num_rows):
+        """
+        Get the rows of a range of games, reading the pages they're on and the pages next to them if they aren't
+        already kept
+        :param first_game_number: Game number of first row
+        :param num_rows: Number of rows
+        :return: List of rows from database.PPPLDatabase.get_schedule_page, with None for rows not read yet and rows
+        of game numbers that have no game
+        """
+        first_page = self._get_page_index(first_game_number)
+        last_page = self._get_page_index(first_game_number + num_rows - 1)
+        # Pages on screen are read before their neighbours
+        for page_index in list(range(first_page, last_page + 1)) + [first_page - 1, last_page + 1]:
+            if page_index >= 0:
+                self._request_page(page_index)
+        rows = []
+        for game_number in range(first_game_number, first_game_number + num_rows):
+            page = self.pages.get(self._get_page_index(game_number))
+            rows.append(None if page is None else page.get(game_number))
+        # Pages on screen are the most recently used, so they're the last to be removed
+        for page_index in range(first_page, last_page + 1):
+            if page_index in self.pages:
+                self.pages.move_to_end(page_index)
+        return rows
+
+    def invalidate(self):
+        """
+        Forget every page, so pages are read again when next used
+        """
+        self.pages.clear()
+        self.pending_pages.clear()
+        self.generation += 1
+
+    def _get_page_index(self, game_number):
+        return (game_number - self.first_game_number) // self.page_size
+
+    def _request_page(self, page_index):
+        if page_index in self.pages or page_index in self.pending_pages:
+            return
+        self.pending_pages.add(page_index)
+        season = self.season
+        after_game_number = self.first_game_number + page_index * self.page_size - 1
+        last_game_number = after_game_number + self.page_size
+        generation = self.generation
+        self.db_worker.submit(lambda db: db.get_schedule_page(season, after_game_number, last_game_number),
+                              lambda rows: self._store_page(page_index, generation, rows))
+
+    def _store_page(self, page_index, generation, rows):
+        if generation != self.generation:
+            return
+        self.pending_pages.discard(page_index)
+        # Pages that couldn't be read are read again the next time they're used
+        if rows is None:
+            return
+        self.pages[page_index] = {row[0]: row for row in rows}
+        while len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)
+        self.on_page_loaded()
@@ -0,0 +1,32 @@
+import time
+
+
+class StartupReport:
+    """
+    Times the stages of starting the app, printing how long after start each stage was reached. Time spent waiting for
+    input isn't counted, so stages can be compared between runs
+    """
+    def __init__(self, start_time):
+        """
+        :param start_time: time.perf_counter() when the app started
+        """
+        self.start_time = start_time
+        self.paused_seconds = 0
+        self.pause_time = None
+        self.stages = []  # (stage, seconds after start) tuples in the order stages were reached
+
+    def pause(self):
+        self.pause_time = time.perf_counter()
+
+    def resume(self):
+        self.paused_seconds += time.perf_counter() - self.pause_time
+        self.pause_time = None
+
+    def mark(self, stage):
+        """
+        Record that a stage of starting up was reached
+        :param stage: Name of stage
+        """
+        seconds = time.perf_counter() - self.start_time - self.paused_seconds
+        self.stages.append((stage, seconds))
+        print('Startup: {} after {:.0f} ms'.format(stage, seconds * 1000))
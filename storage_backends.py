@@ -0,0 +1,187 @@
+import datetime
+import os
+import re
+import sqlite3
+
+CONNECTION_POOL_SIZE = 5
+CONNECTION_RECONNECT_ATTEMPTS = 3
+DEFAULT_SQLITE_FILE = os.path.join(os.path.expanduser('~'), '.pppl', 'pppl.sqlite3')
+
+# Dates are stored as ISO text in SQLite and read back as dates from columns declared as date
+sqlite3.register_adapter(datetime.date, lambda date: date.isoformat())
+sqlite3.register_converter('date', lambda text: datetime.date.fromisoformat(text.decode()))
+
+# Queries written differently for SQLite, by name in database.QUERIES
+SQLITE_QUERY_OVERRIDES = {
+    'insert_game_result_footwear': """
+        insert into footwear (footwear_name)
+        values (%s), (%s)
+        on conflict do nothing
+    """,
+    'insert_standings': """
+        insert or ignore into standing (season, player_id)
+        select season, home_player_id from game where game_id = %s
+        union all
+        select season, away_player_id from game where game_id = %s
+    """,
+    'insert_standing': """
+        insert or ignore into standing (season, player_id)
+        select season, %s from game where game_id = %s
+    """,
+    'update_game_player_ratings': """
+        insert into player_rating (player_id, rating, games_rated)
+        values (%s, %s, 1), (%s, %s, 1)
+        on conflict (player_id) do update set rating = excluded.rating, games_rated = games_rated + 1
+    """,
+    # Names compare with collate nocase, which only ignores the case of ASCII letters
+    'is_player_in_db': """
+        select exists (
+            select 1
+            from player
+            where name = %s
+        )
+    """,
+    'is_role_in_db': """
+        select exists (
+            select 1
+            from role
+            where role_name = %s
+        )
+    """,
+    'is_table_in_db': """
+        select exists (
+            select 1
+            from sqlite_master
+            where type = 'table' and name = %s
+        )
+    """
+}
+
+
+class MySQLBackend:
+    """
+    Storage on a MySQL server, with connections taken from a pool
+    """
+    name = 'mysql'
+    b_unicode_case_folding = True  # Whether comparing names ignores the case of every letter, not only ASCII ones
+
+    def __init__(self, host, user, password):
+        """
+        :param host: Host name/IP to connect to
+        :param user: User on host to log in with
+        :param password: User password
+        """
+        # Imported here so the connector is only needed when a MySQL server is used
+        import mysql.connector
+        import mysql.connector.pooling
+        self.connector = mysql.connector
+        self.host = host
+        self.user = user
+        self.password = password
+        self.connection_pool = None
+        self.IntegrityError = mysql.connector.IntegrityError
+        # Errors from a lost connection, after which a statement can be run again on a new connection
+        self.connection_errors = (mysql.connector.OperationalError, mysql.connector.InterfaceError)
+
+    def connect(self):
+        # Schema has to exist before pooled connections can use it
+        connection = self.connector.connect(host=self.host, user=self.user, password=self.password)
+        connection.cursor().execute('create database if not exists pppl')
+        connection.close()
+        self.connection_pool = self.connector.pooling.MySQLConnectionPool(
+            pool_name='pppl', pool_size=CONNECTION_POOL_SIZE, pool_reset_session=False, host=self.host,
+            user=self.user, password=self.password, database='pppl')
+
+    def get_connection(self):
+        return self.connection_pool.get_connection()
+
+    def check_connection(self, connection):
+        """
+        Make sure a connection left idle is still alive, reconnecting it if it isn't
+        :return: Whether connection may have been replaced, losing its prepared statements
+        """
+        connection.ping(reconnect=True, attempts=CONNECTION_RECONNECT_ATTEMPTS)
+        return True
+
+    def is_in_transaction(self, connection):
+        return connection.is_connected() and connection.in_transaction
+
+    def start_read_transaction(self, connection):
+        """
+        Start a transaction whose reads all see the database as it was when it started
+        """
+        connection.start_transaction(consistent_snapshot=True, readonly=True)
+
+    def get_prepared_cursor(self, connection):
+        return connection.cursor(prepared=True)
+
+    def translate_query(self, name, query):
+        """
+        :param name: Name of query in database.QUERIES
+        :param query: Query written for MySQL
+        :return: Query to run on this backend
+        """
+        return query
+
+    def translate_schema(self, statement):
+        """
+        :param statement: Schema statement written for MySQL
+        :return: Statement to run on this backend
+        """
+        return statement
+
+
+class SQLiteBackend:
+    """
+    Storage in a local SQLite file, run in-process without a server. Each thread opens its own connection to the file
+    """
+    name = 'sqlite'
+    b_unicode_case_folding = False
+
+    def __init__(self, path=DEFAULT_SQLITE_FILE):
+        """
+        :param path: Path of database file, which is created if it doesn't exist
+        """
+        self.path = path
+        self.IntegrityError = sqlite3.IntegrityError
+        # There's no server connection to lose
+        self.connection_errors = ()
+
+    def connect(self):
+        if os.path.dirname(self.path) != '':
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+    def get_connection(self):
+        # Connections are only used by the thread that opened them, but are closed by whichever thread disconnects
+        connection = sqlite3.connect(self.path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        connection.execute('pragma foreign_keys = on')
+        # Readers don't block the writer, so background work doesn't hold up the GUI
+        connection.execute('pragma journal_mode = wal')
+        return connection
+
+    def check_connection(self, connection):
+        return False
+
+    def is_in_transaction(self, connection):
+        return connection.in_transaction
+
+    def start_read_transaction(self, connection):
+        # Reads in a transaction all see the same snapshot of the write-ahead log
+        connection.execute('begin')
+
+    def get_prepared_cursor(self, connection):
+        # SQLite keeps compiled statements per connection, so any cursor reuses them
+        return connection.cursor()
+
+    def translate_query(self, name, query):
+        return SQLITE_QUERY_OVERRIDES.get(name, query).replace('%s', '?')
+
+    def translate_schema(self, statement):
+        # MySQL compares text ignoring case by default
+        statement = re.sub(r'varchar\((\d+)\)', r'varchar(\1) collate nocase', statement)
+        # Auto increment IDs are SQLite's integer primary keys, so they can't be declared as a separate primary key
+        for column in re.findall(r'(\w+) int not null unique auto_increment', statement):
+            statement = statement.replace(column + ' int not null unique auto_increment',
+                                          column + ' integer primary key autoincrement')
+            statement = re.sub(r',\s*primary key \(' + column + r'\)', '', statement)
+        return statement
@@ -0,0 +1,77 @@
+import datetime
+import os
+import random
+import sys
+import pytest
+
+# Modules of the app are at the top of the repository rather than in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import analysis
+import error_reporting
+from database import PPPLDatabase, Table
+
+LEAGUE_PLAYER_NAMES = ['ann', 'bo', 'cy', 'di', 'ed', 'flo']
+LEAGUE_SEASONS = [datetime.date(2020, 1, 1), datetime.date(2021, 1, 1)]
+LEAGUE_GAMES_PER_PLAYER = 6
+LEAGUE_UNPLAYED_GAMES = 7  # Games left unplayed at the end of the last season
+
+
+@pytest.fixture(autouse=True)
+def reports(monkeypatch):
+    """
+    Record error and warning reports instead of showing pop-ups
+    :return: List of reported messages
+    """
+    reported = []
+    monkeypatch.setattr(error_reporting, 'report_error', reported.append)
+    monkeypatch.setattr(error_reporting, 'report_warning', reported.append)
+    return reported
+
+
+@pytest.fixture
+def db(tmp_path):
+    """
+    :return: PPPLDatabase connected to a new SQLite file
+    """
+    database = PPPLDatabase()
+    database.connect_file(str(tmp_path / 'pppl.sqlite3'))
+    assert database.backend is not None
+    yield database
+    database.disconnect_server()
+
+
+@pytest.fixture
+def league(db, reports):
+    """
+    :return: PPPLDatabase with two seasons of games between the same players, with every game recorded but the last few.
+    Every fourth game is recorded a player at a time instead of as a whole game result
+    """
+    # Players are imported rather than inserted so no images have to be read
+    db.import_table_rows('player', [(player_id, name, b'logo of ' + name.encode() if player_id == 1 else None, None,
+                                     None, None) for player_id, name in enumerate(LEAGUE_PLAYER_NAMES, 1)])
+    assert db.commit([Table.PLAYER])
+    player_ids = list(range(1, len(LEAGUE_PLAYER_NAMES) + 1))
+    for season in LEAGUE_SEASONS:
+        assert db.insert_season_schedule(season, analysis.generate_new_schedule(LEAGUE_GAMES_PER_PLAYER, player_ids))
+    db.insert_footwear('sneakers')
+    footwear_id = db.get_footwear_id('sneakers')
+    rng = random.Random(0)
+    num_games = 2 * len(analysis.generate_new_schedule(LEAGUE_GAMES_PER_PLAYER, player_ids))
+    for game in range(num_games - LEAGUE_UNPLAYED_GAMES):
+        game_id = db.get_next_unplayed_game_details()[0]
+        home_differential = rng.randint(-3, 3)
+        player_games = [{'footwear': 'sneakers', 'differential': str(differential), 'knockovers': rng.randint(0, 2),
+                         'own_cups': rng.randint(0, 2), 'aces': rng.randint(0, 3), 'serve_breaks': rng.randint(0, 3),
+                         'penalty_shots_made': 0, 'penalty_shots_attempted': 1, 'penalties_committed': 1}
+                        for differential in (home_differential, -home_differential)]
+        if game % 4 != 3:
+            assert db.insert_game_result(game_id, *player_games)
+            continue
+        home_player_id, away_player_id = db._execute_query('get_game_player_ids', (game_id,)).fetchall()[0]
+        for player_id, player_game in zip((home_player_id, away_player_id), player_games):
+            db.insert_player_game(player_id, game_id, footwear_id, player_game['differential'],
+                                  player_game['knockovers'], player_game['own_cups'], player_game['aces'],
+                                  player_game['serve_breaks'], player_game['penalty_shots_made'],
+                                  player_game['penalty_shots_attempted'], player_game['penalties_committed'])
+    assert reports == []
+    return db
@@ -0,0 +1,72 @@
+import json
+import os
+import random
+import pytest
+import analysis
+
+GOLDEN_SCHEDULES_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                     'golden_schedules.json')
+
+with open(GOLDEN_SCHEDULES_FILE) as golden_file:
+    GOLDEN_SCHEDULES = json.load(golden_file)
+
+
+@pytest.mark.parametrize('vectorized', [False, True], ids=['incremental', 'vectorized'])
+@pytest.mark.parametrize('golden', GOLDEN_SCHEDULES,
+                         ids=['{}x{}'.format(len(golden['player_ids']), golden['games_per_player'])
+                              for golden in GOLDEN_SCHEDULES])
+def test_schedule_matches_golden_schedule(golden, vectorized):
+    schedule = analysis.generate_new_schedule(golden['games_per_player'], golden['player_ids'], vectorized)
+    assert [list(game) for game in schedule] == golden['schedule']
+
+
+@pytest.mark.parametrize('vectorized', [False, True], ids=['incremental', 'vectorized'])
+def test_streamed_schedule_matches_whole_schedule(vectorized):
+    player_ids = [5, 3, 9, 1, 7]
+    games = analysis.generate_new_schedule_games(6, player_ids, vectorized)
+    assert list(games) == analysis.generate_new_schedule(6, player_ids, vectorized)
+
+
+@pytest.mark.parametrize('num_players', range(2, 13))
+@pytest.mark.parametrize('num_round_robins', [1, 2, 3])
+def test_round_robin_meets_schedule_priorities(num_players, num_round_robins):
+    player_ids = list(range(100, 100 + num_players))
+    games_per_player = num_round_robins * (num_players - 1)
+    schedule = list(analysis.generate_round_robin_games(games_per_player, player_ids))
+    assert analysis.check_round_robin_priorities(schedule, games_per_player, player_ids)
+
+
+def test_round_robin_check_rejects_repeated_meeting():
+    player_ids = [1, 2, 3, 4]
+    schedule = list(analysis.generate_round_robin_games(3, player_ids))
+    # Replace a meeting with one the round robin already has
+    schedule[-1] = schedule[0]
+    assert not analysis.check_round_robin_priorities(schedule, 3, player_ids)
+
+
+def test_round_robin_shape_is_built_directly_when_checked():
+    player_ids = [4, 8, 15, 16, 23, 42]
+    schedule = analysis.generate_new_schedule(10, player_ids, round_robin=True, b_check_round_robin=True)
+    assert schedule == list(analysis.generate_round_robin_games(10, player_ids))
+
+
+@pytest.mark.parametrize('num_players, games_per_player', [(6, 10), (7, 4), (12, 9)])
+def test_improved_order_keeps_games_and_priorities(num_players, games_per_player):
+    player_ids = list(range(1, num_players + 1))
+    schedule = analysis.generate_new_schedule(games_per_player, player_ids, seed=0)
+    score, improved_schedule = analysis.improve_schedule_fairness(schedule, random.Random(0), max_swaps=500)
+    assert sorted(improved_schedule) == sorted(schedule)
+    assert score == analysis.get_fairness_score(improved_schedule) <= analysis.get_fairness_score(schedule)
+    assert analysis.is_within_spreads(analysis.get_priority_spreads(improved_schedule),
+                                      analysis.get_priority_spreads(schedule))
+
+
+@pytest.mark.parametrize('num_players, games_per_player', [(6, 10), (12, 9)])
+def test_fair_schedule_search_is_no_worse_than_deterministic_schedule(num_players, games_per_player):
+    player_ids = list(range(1, num_players + 1))
+    deterministic_schedule = analysis.generate_new_schedule(games_per_player, player_ids)
+    schedule = analysis.search_fair_schedule(games_per_player, player_ids, 0.5, num_workers=2)
+    assert all(sum(player in game for game in schedule) >= games_per_player for player in player_ids)
+    assert analysis.get_fairness_score(schedule) <= analysis.get_fairness_score(deterministic_schedule)
+    assert analysis.is_within_spreads(analysis.get_priority_spreads(schedule),
+                                      analysis.get_priority_spreads(deterministic_schedule))
@@ -0,0 +1,93 @@
+import datetime
+from database import EXPORT_TABLE_COLUMNS, Table
+from conftest import LEAGUE_PLAYER_NAMES, LEAGUE_SEASONS
+
+SEASON = datetime.date(2020, 1, 1)
+
+
+def test_lookup_is_cached_until_its_table_changes(db, reports):
+    assert db.get_role_names() == []
+    assert not db.is_role_in_db('captain')
+    run_count = db.get_query_execution_counts()['get_role_names']
+    assert db.get_role_names() == []
+    assert db.get_query_execution_counts()['get_role_names'] == run_count
+    db.insert_role('Captain')
+    assert db.get_role_names() == ['captain']
+    assert db.is_role_in_db('captain')
+    assert reports == []
+
+
+def test_lookup_is_not_cached_after_rollback(db, reports):
+    assert db.insert_season(SEASON, 1, b_commit=False)
+    # Lookups inside the transaction see the uncommitted season
+    assert db.get_season_start_dates() == [SEASON]
+    db.rollback()
+    assert db.get_season_start_dates() == []
+    assert reports == []
+
+
+def test_lookup_running_during_invalidation_is_not_cached(db, monkeypatch):
+    execute_query = db._execute_query
+
+    def execute_query_then_invalidate(name, params=()):
+        cursor = execute_query(name, params)
+        db.invalidate_lookup_cache(Table.PLAYER)
+        return cursor
+    monkeypatch.setattr(db, '_execute_query', execute_query_then_invalidate)
+    assert db.get_player_names() == []
+    assert db.lookup_cache == {}
+
+
+def test_non_ascii_names_compare_ignoring_case(db, reports):
+    db.insert_role('Élan')
+    assert db.is_role_in_db('élan')
+    assert db.is_role_in_db('ÉLAN')
+    assert not db.is_role_in_db('elan')
+    assert reports == []
+
+
+def test_player_without_images_is_inserted(db, reports):
+    assert db.insert_player('ann')
+    assert db.get_player_names() == ['ann']
+    assert reports == []
+
+
+def get_league_state(db):
+    """
+    :return: Every row of league data, with the standings and ratings made from it
+    """
+    return ({table_name: [row for rows in db.export_table_rows(table_name, 100) for row in rows]
+             for table_name in EXPORT_TABLE_COLUMNS},
+            {season: db.get_standings(season) for season in LEAGUE_SEASONS},
+            db.get_player_ratings(),
+            [db.get_player_rating_history(player_id) for player_id in range(1, len(LEAGUE_PLAYER_NAMES) + 1)])
+
+
+def get_game_result(home_differential, footwear='boots'):
+    return [{'footwear': footwear, 'differential': str(differential), 'knockovers': 0, 'own_cups': 0, 'aces': 0,
+             'serve_breaks': 0, 'penalty_shots_made': 0, 'penalty_shots_attempted': 0, 'penalties_committed': 0}
+            for differential in (home_differential, -home_differential)]
+
+
+def test_failed_game_result_is_rolled_back_after_duplicate_player_game(league, reports):
+    game_id = league.get_next_unplayed_game_details()[0]
+    assert league.insert_game_result(game_id, *get_game_result(1))
+    state = get_league_state(league)
+    # Game was already recorded, so its player games fail after the new footwear is inserted
+    assert not league.insert_game_result(game_id, *get_game_result(2, 'sandals'))
+    assert len(reports) == 1
+    assert get_league_state(league) == state
+    assert 'sandals' not in league.get_footwear_names()
+
+
+def test_failed_game_result_is_rolled_back_after_standings_are_updated(league, reports, monkeypatch):
+    game_id = league.get_next_unplayed_game_details()[0]
+    state = get_league_state(league)
+
+    def fail_to_rate(*_):
+        raise RuntimeError('rating failed')
+    monkeypatch.setattr(league, '_update_ratings', fail_to_rate)
+    assert not league.insert_game_result(game_id, *get_game_result(1))
+    assert len(reports) == 1
+    assert get_league_state(league) == state
+    assert league.get_next_unplayed_game_details()[0] == game_id
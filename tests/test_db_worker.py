@@ -0,0 +1,103 @@
+import queue
+import threading
+import error_reporting
+from db_worker import DatabaseWorker
+
+
+class FakeWidget:
+    """
+    Stands in for a Tk widget, keeping functions passed to after() until a test calls them
+    """
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, _, function):
+        self.scheduled.append(function)
+
+    def run_scheduled(self):
+        scheduled, self.scheduled = self.scheduled, []
+        for function in scheduled:
+            function()
+
+
+def run_to_completion(worker):
+    """
+    Wait for all submitted work, then poll for its results on this thread like the GUI does
+    """
+    worker.stop()
+    worker.widget.run_scheduled()
+
+
+def test_work_runs_in_order_and_results_reach_main_thread(db):
+    worker = DatabaseWorker(db, FakeWidget())
+    work_threads = []
+    results = []
+
+    def work(number):
+        work_threads.append(threading.current_thread())
+        return number
+
+    def on_done(result):
+        results.append((result, threading.current_thread()))
+    for number in range(5):
+        worker.submit(lambda _, number=number: work(number), on_done)
+    worker.submit(lambda database: database.get_player_names(), on_done)
+    run_to_completion(worker)
+    assert all(thread is worker.thread for thread in work_threads)
+    assert [result for result, _ in results] == [0, 1, 2, 3, 4, []]
+    assert all(thread is threading.main_thread() for _, thread in results)
+
+
+def test_failed_work_is_reported_and_passes_none(db, reports):
+    worker = DatabaseWorker(db, FakeWidget())
+    results = []
+
+    def fail(_):
+        raise ValueError('Work failed')
+    worker.submit(fail, results.append)
+    worker.submit(lambda _: 'next', results.append)
+    run_to_completion(worker)
+    assert results == [None, 'next']
+    assert len(reports) == 1
+    assert 'Work failed' in reports[0]
+
+
+def test_polling_continues_after_failed_callback(db, reports):
+    widget = FakeWidget()
+    worker = DatabaseWorker(db, widget)
+    results = []
+
+    def fail(_):
+        raise ValueError('Callback failed')
+    worker.submit(lambda _: 'first', fail)
+    worker.submit(lambda _: 'second', results.append)
+    run_to_completion(worker)
+    assert results == ['second']
+    assert len(reports) == 1
+    # Polling is scheduled again even though a callback failed
+    assert len(widget.scheduled) == 1
+
+
+def test_calls_from_worker_thread_wait_for_main_thread(db):
+    worker = DatabaseWorker(db, FakeWidget())
+    calls = []
+    wrapper = worker.call_on_main_thread(lambda: calls.append(threading.current_thread()))
+    wrapper()
+    assert calls == [threading.main_thread()]
+    worker.submit(lambda _: wrapper())
+    run_to_completion(worker)
+    assert calls == [threading.main_thread()] * 2
+
+
+def test_reports_from_worker_thread_are_shown_on_main_thread(db, monkeypatch):
+    monkeypatch.setattr(error_reporting, 'pending_reports', queue.Queue())
+    worker = DatabaseWorker(db, FakeWidget())
+    shown = []
+
+    def show(title, message):
+        shown.append((title, message, threading.current_thread()))
+    worker.submit(lambda _: error_reporting.show_report(show, 'Problem', 'Database error'))
+    worker.stop()
+    assert shown == []
+    worker.widget.run_scheduled()
+    assert shown == [('Problem', 'Database error', threading.main_thread())]
@@ -0,0 +1,60 @@
+from database import Table
+from event_bus import ChangeEventBus
+
+
+def subscribe_recorder(event_bus, tables):
+    """
+    :return: List that each set of changed tables the listener is notified of is appended to
+    """
+    events = []
+    event_bus.subscribe(tables, events.append)
+    return events
+
+
+def test_listeners_are_notified_right_away_without_scheduler():
+    event_bus = ChangeEventBus()
+    game_events = subscribe_recorder(event_bus, [Table.GAME])
+    player_events = subscribe_recorder(event_bus, [Table.PLAYER, Table.PLAYER_GAME])
+    event_bus.publish([Table.GAME])
+    event_bus.publish([Table.GAME, Table.PLAYER_GAME])
+    assert game_events == [{Table.GAME}, {Table.GAME, Table.PLAYER_GAME}]
+    # Listeners are only notified of events that include their tables
+    assert player_events == [{Table.GAME, Table.PLAYER_GAME}]
+
+
+def test_changes_published_before_scheduled_flush_are_gathered():
+    event_bus = ChangeEventBus()
+    scheduled = []
+    event_bus.set_scheduler(scheduled.append)
+    game_events = subscribe_recorder(event_bus, [Table.GAME])
+    season_events = subscribe_recorder(event_bus, [Table.SEASON])
+    event_bus.publish([Table.SEASON])
+    event_bus.publish([Table.GAME])
+    event_bus.publish([Table.GAME, Table.STANDING])
+    # Only one flush is scheduled however many changes are published before it
+    assert len(scheduled) == 1
+    assert game_events == season_events == []
+    scheduled.pop()()
+    assert game_events == season_events == [{Table.SEASON, Table.GAME, Table.STANDING}]
+    # Flushing again without new changes notifies no one, and the next change schedules another flush
+    event_bus.flush()
+    assert len(game_events) == 1
+    event_bus.publish([Table.GAME])
+    assert len(scheduled) == 1
+    scheduled.pop()()
+    assert game_events[1:] == [{Table.GAME}]
+    assert len(season_events) == 1
+
+
+def test_database_changes_call_insert_callbacks_once_per_flush(league):
+    scheduled = []
+    league.change_events.set_scheduler(scheduled.append)
+    calls = []
+    league.register_insert_callback(Table.FOOTWEAR, lambda: calls.append(Table.FOOTWEAR))
+    league.register_insert_callback(Table.SEASON, lambda: calls.append(Table.SEASON))
+    league.insert_footwear('boots')
+    league.insert_footwear('sandals')
+    assert calls == []
+    assert len(scheduled) == 1
+    scheduled.pop()()
+    assert calls == [Table.FOOTWEAR]
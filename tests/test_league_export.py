@@ -0,0 +1,77 @@
+import sys
+import pytest
+import error_reporting
+import league_export
+from database import PPPLDatabase, EXPORT_TABLE_COLUMNS
+from conftest import LEAGUE_SEASONS
+
+
+def get_all_rows(db):
+    return {table_name: [row for rows in db.export_table_rows(table_name, 100) for row in rows]
+            for table_name in EXPORT_TABLE_COLUMNS}
+
+
+@pytest.mark.parametrize('file_format', league_export.FILE_FORMATS)
+def test_imported_league_matches_exported_league(league, reports, tmp_path, file_format):
+    export_directory = str(tmp_path / 'export')
+    row_counts = league_export.export_league(league, export_directory, file_format, batch_size=7)
+    exported_rows = get_all_rows(league)
+    assert row_counts == {table_name: len(rows) for table_name, rows in exported_rows.items()}
+    imported_db = PPPLDatabase()
+    imported_db.connect_file(str(tmp_path / 'imported.sqlite3'))
+    try:
+        assert league_export.import_league(imported_db, export_directory, file_format, batch_size=7) == row_counts
+        assert get_all_rows(imported_db) == exported_rows
+        # Standings and ratings aren't exported, so they're made again from the imported games
+        for season in LEAGUE_SEASONS:
+            assert imported_db.get_standings(season) == league.get_standings(season)
+        assert [rating[::2] for rating in imported_db.get_player_ratings()] == \
+            [rating[::2] for rating in league.get_player_ratings()]
+        assert [rating[1] for rating in imported_db.get_player_ratings()] == \
+            pytest.approx([rating[1] for rating in league.get_player_ratings()])
+    finally:
+        imported_db.disconnect_server()
+    assert reports == []
+
+
+def test_import_keeps_existing_league_unless_replacing(league, reports, tmp_path):
+    export_directory = str(tmp_path / 'export')
+    assert league_export.export_league(league, export_directory)
+    rows = get_all_rows(league)
+    assert league_export.import_league(league, export_directory) is None
+    assert len(reports) == 1
+    assert get_all_rows(league) == rows
+    assert league_export.import_league(league, export_directory, b_replace=True) is not None
+    assert get_all_rows(league) == rows
+
+
+def test_export_reads_every_table_from_one_snapshot(league, tmp_path, monkeypatch):
+    other_db = PPPLDatabase()
+    other_db.connect_file(league.backend.path)
+    export_table_rows = league.export_table_rows
+
+    def export_table_rows_then_write(table_name, batch_size):
+        yield from export_table_rows(table_name, batch_size)
+        # Written by the app while the export is still reading tables
+        if table_name == 'role':
+            other_db.insert_footwear('slippers')
+    monkeypatch.setattr(league, 'export_table_rows', export_table_rows_then_write)
+    try:
+        row_counts = league_export.export_league(league, str(tmp_path / 'export'))
+    finally:
+        other_db.disconnect_server()
+    assert row_counts['footwear'] == 1
+    assert 'slippers' in league.get_footwear_names()
+
+
+def test_command_line_import_needs_force_to_replace_league(league, tmp_path, monkeypatch):
+    monkeypatch.setattr(error_reporting, 'console_stream', None)
+    export_directory = str(tmp_path / 'export')
+    database_file = league.backend.path
+    league.disconnect_server()
+    monkeypatch.setattr(sys, 'argv', ['league_export.py', 'export', export_directory, '--file', database_file])
+    assert league_export.main() == 0
+    monkeypatch.setattr(sys, 'argv', ['league_export.py', 'import', export_directory, '--file', database_file])
+    assert league_export.main() == 1
+    monkeypatch.setattr(sys, 'argv', sys.argv + ['--force'])
+    assert league_export.main() == 0
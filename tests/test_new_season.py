@@ -0,0 +1,83 @@
+import datetime
+import queue
+import threading
+import gui
+from schedule_cache import ScheduleCache
+from conftest import LEAGUE_PLAYER_NAMES
+
+SEASON = datetime.date(2022, 1, 1)
+GAMES_PER_PLAYER = 5
+PLAYER_IDS = [1, 2, 3, 4, 5]
+
+
+def create_season(db, schedule_cache):
+    """
+    Create a season the way NewSeasonWindow does, with the database worker's side run on this thread
+    :return: Result of the last call to save_schedule_batches and whether the generator thread finished
+    """
+    players = LEAGUE_PLAYER_NAMES[:len(PLAYER_IDS)]
+    assert gui.NewSeasonWindow.start_new_season(db, SEASON, players) == PLAYER_IDS
+    batches = queue.Queue(gui.SCHEDULE_QUEUE_BATCHES)
+    stop = threading.Event()
+    thread = threading.Thread(target=gui.NewSeasonWindow.generate_schedule_batches,
+                              args=(schedule_cache, GAMES_PER_PLAYER, PLAYER_IDS, batches, stop), daemon=True)
+    thread.start()
+    num_games = 0
+    progress = (False, 0)
+    while progress is not None and not progress[0]:
+        assert progress[1] >= num_games
+        num_games = progress[1]
+        progress = gui.NewSeasonWindow.save_schedule_batches(db, SEASON, batches, stop, num_games)
+    thread.join(5)
+    return progress, not thread.is_alive()
+
+
+def get_season_games(db):
+    games = sorted(game for games in db.export_table_rows('game', 100) for game in games if game[1] == SEASON)
+    return [(game[3], game[4]) for game in games]
+
+
+def test_generated_batches_are_saved_as_one_season(league, tmp_path, monkeypatch, reports):
+    # Small batches so the season is saved over several calls
+    monkeypatch.setattr(gui, 'SCHEDULE_BATCH_SIZE', 2)
+    expected_games = list(ScheduleCache(str(tmp_path / 'expected')).generate_schedule_games(GAMES_PER_PLAYER,
+                                                                                              PLAYER_IDS))
+    progress, b_generator_finished = create_season(league, ScheduleCache(str(tmp_path / 'cache')))
+    assert progress == (True, len(expected_games))
+    assert b_generator_finished
+    assert get_season_games(league) == expected_games
+    assert league.get_season_game_number_range(SEASON)[1] == len(expected_games)
+    assert reports == []
+
+
+def test_season_is_removed_if_schedule_fails_to_generate(league, tmp_path, monkeypatch, reports):
+    monkeypatch.setattr(gui, 'SCHEDULE_BATCH_SIZE', 2)
+
+    def generate_schedule_games(games_per_player, player_ids, round_robin=False):
+        yield from [(1, 2), (3, 4), (5, 1)]
+        raise ValueError('Schedule generation failed')
+    schedule_cache = ScheduleCache(str(tmp_path))
+    monkeypatch.setattr(schedule_cache, 'generate_schedule_games', generate_schedule_games)
+    progress, b_generator_finished = create_season(league, schedule_cache)
+    assert progress is None
+    assert b_generator_finished
+    assert SEASON not in league.get_season_start_dates()
+    assert get_season_games(league) == []
+    assert len(reports) == 1
+
+
+def test_generation_stops_once_batches_are_no_longer_saved(tmp_path, monkeypatch):
+    monkeypatch.setattr(gui, 'SCHEDULE_BATCH_SIZE', 1)
+    batches = queue.Queue(1)
+    stop = threading.Event()
+    thread = threading.Thread(target=gui.NewSeasonWindow.generate_schedule_batches,
+                              args=(ScheduleCache(str(tmp_path)), GAMES_PER_PLAYER, PLAYER_IDS, batches, stop),
+                              daemon=True)
+    thread.start()
+    # Generator waits for room in the full queue until it's stopped
+    thread.join(0.2)
+    assert thread.is_alive()
+    stop.set()
+    thread.join(5)
+    assert not thread.is_alive()
+    assert batches.qsize() == 1
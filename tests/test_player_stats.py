@@ -0,0 +1,75 @@
+import itertools
+from conftest import LEAGUE_SEASONS
+from player_stats import PlayerStatsEngine
+
+
+def read_table(db, table_name):
+    return [row for rows in db.export_table_rows(table_name, 100) for row in rows]
+
+
+def get_player_stats_per_game(db, season=None, b_home=None, footwear=None):
+    """
+    Calculate player stats one player game at a time, the way they were before the grouped query
+    """
+    player_names = {player_id: name for player_id, name, *_ in read_table(db, 'player')}
+    footwear_names = {footwear_id: name.lower() for footwear_id, name in read_table(db, 'footwear')}
+    games = {game_id: (game_season, home_player_id) for game_id, game_season, _, home_player_id, *_ in
+             read_table(db, 'game')}
+    totals = {}
+    for player_id, game_id, footwear_id, *stats in read_table(db, 'player_game'):
+        differential, knockovers, own_cups, aces, serve_breaks, penalty_shots_made, penalty_shots_attempted, \
+            penalties_committed = stats
+        game_season, home_player_id = games[game_id]
+        if season is not None and game_season != season:
+            continue
+        if b_home is not None and (player_id == home_player_id) != b_home:
+            continue
+        if footwear is not None and footwear_names[footwear_id] != footwear.lower():
+            continue
+        player_totals = totals.setdefault(player_names[player_id], [0] * 9)
+        for column, value in enumerate((1, differential, knockovers, own_cups, aces, serve_breaks, penalty_shots_made,
+                                        penalty_shots_attempted, penalties_committed)):
+            player_totals[column] += value
+    stats = []
+    for name in sorted(totals, key=str.lower):
+        games_played, differential, knockovers, own_cups, aces, serve_breaks, penalty_shots_made, \
+            penalty_shots_attempted, penalties_committed = totals[name]
+        stats.append((name, games_played, differential, differential / games_played, knockovers,
+                      knockovers / games_played, own_cups, aces, aces / games_played, serve_breaks, penalty_shots_made,
+                      penalty_shots_attempted,
+                      100 * penalty_shots_made / penalty_shots_attempted if penalty_shots_attempted > 0 else None,
+                      penalties_committed))
+    return stats
+
+
+def record_game_in_boots(db):
+    game_id = db.get_next_unplayed_game_details()[0]
+    player_games = [{'footwear': 'Boots', 'differential': str(differential), 'knockovers': 1, 'own_cups': 0,
+                     'aces': 2, 'serve_breaks': 1, 'penalty_shots_made': 1, 'penalty_shots_attempted': 2,
+                     'penalties_committed': 0} for differential in (3, -3)]
+    assert db.insert_game_result(game_id, *player_games)
+
+
+def test_stats_match_stats_calculated_per_game(league, reports):
+    record_game_in_boots(league)
+    engine = PlayerStatsEngine(league)
+    for season, b_home, footwear in itertools.product([None] + LEAGUE_SEASONS, [None, True, False],
+                                                      [None, 'sneakers', 'BOOTS', 'sandals']):
+        expected_stats = get_player_stats_per_game(league, season, b_home, footwear)
+        assert engine.get_player_stats(season, b_home, footwear) == expected_stats
+    # Filters both match and exclude games
+    assert len(engine.get_player_stats(LEAGUE_SEASONS[-1], footwear='boots')) == 2
+    assert engine.get_player_stats(footwear='sandals') == []
+    assert reports == []
+
+
+def test_stats_are_calculated_again_after_player_games_change(league):
+    engine = PlayerStatsEngine(league)
+    stats = engine.get_player_stats(footwear='boots')
+    assert stats == []
+    # Stats are kept until player games change
+    assert engine.get_player_stats(footwear='boots') is stats
+    record_game_in_boots(league)
+    stats = engine.get_player_stats(footwear='boots')
+    assert len(stats) == 2
+    assert stats == get_player_stats_per_game(league, footwear='boots')
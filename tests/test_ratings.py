@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+import ratings
+from conftest import LEAGUE_PLAYER_NAMES
+
+
+def get_all_ratings(db):
+    return db.get_player_ratings(), [db.get_player_rating_history(player_id)
+                                     for player_id in range(1, len(LEAGUE_PLAYER_NAMES) + 1)]
+
+
+def test_replayed_ratings_match_incremental_ratings(league, reports):
+    incremental_ratings, incremental_histories = get_all_ratings(league)
+    assert all(len(history) > 0 for history in incremental_histories)
+    assert league.replay_ratings()
+    replayed_ratings, replayed_histories = get_all_ratings(league)
+    assert [(name, games) for name, _, games in replayed_ratings] == \
+        [(name, games) for name, _, games in incremental_ratings]
+    assert [rating for _, rating, _ in replayed_ratings] == \
+        pytest.approx([rating for _, rating, _ in incremental_ratings])
+    for replayed_history, incremental_history in zip(replayed_histories, incremental_histories):
+        assert [game[:2] for game in replayed_history] == [game[:2] for game in incremental_history]
+        assert [game[2:] for game in replayed_history] == pytest.approx([game[2:] for game in incremental_history])
+    assert reports == []
+
+
+def test_replayed_games_match_games_rated_in_order():
+    rng = np.random.default_rng(0)
+    home_indexes = rng.integers(0, 5, 200)
+    away_indexes = (home_indexes + rng.integers(1, 5, 200)) % 5
+    home_differentials = rng.integers(-3, 4, 200)
+    player_ratings = [ratings.INITIAL_RATING] * 5
+    for home, away, differential in zip(home_indexes, away_indexes, home_differentials):
+        player_ratings[home], player_ratings[away] = ratings.rate_game(player_ratings[home], player_ratings[away],
+                                                                       differential)
+    replayed_ratings = ratings.replay_games(home_indexes, away_indexes, home_differentials, 5)[0]
+    assert replayed_ratings.tolist() == pytest.approx(player_ratings)
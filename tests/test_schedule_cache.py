@@ -0,0 +1,75 @@
+import os
+import analysis
+import schedule_cache
+from schedule_cache import ScheduleCache
+
+GAMES_PER_PLAYER = 5
+PLAYER_IDS = [10, 20, 30, 40, 50]
+
+
+def set_last_used(cache, num_players, games_per_player, seconds):
+    os.utime(cache._get_path(num_players, games_per_player), (seconds, seconds))
+
+
+def test_cached_schedule_is_relabeled_for_any_player_order(tmp_path, monkeypatch):
+    player_orders = [PLAYER_IDS, PLAYER_IDS[::-1], [30, 10, 40, 50, 20]]
+    expected_schedules = [analysis.generate_new_schedule(GAMES_PER_PLAYER, player_ids) for player_ids in player_orders]
+    cache = ScheduleCache(str(tmp_path))
+    assert cache.get_schedule(GAMES_PER_PLAYER, player_orders[0]) == expected_schedules[0]
+
+    def generate_new_schedule_games(games_per_player, player_ids):
+        raise AssertionError('Cached schedule was generated again')
+    monkeypatch.setattr(schedule_cache.analysis, 'generate_new_schedule_games', generate_new_schedule_games)
+    for player_ids, expected_schedule in zip(player_orders[1:], expected_schedules[1:]):
+        assert cache.get_schedule(GAMES_PER_PLAYER, player_ids) == expected_schedule
+
+
+def test_least_recently_used_schedule_is_evicted(tmp_path):
+    index_schedule = [(0, 1), (1, 0)]
+    cache = ScheduleCache(str(tmp_path))
+    cache.store(2, 1, index_schedule)
+    cache.store(2, 2, index_schedule)
+    set_last_used(cache, 2, 1, 1000)
+    set_last_used(cache, 2, 2, 2000)
+    # Loading a schedule marks it as used, so the other one is evicted first
+    assert cache.load(2, 1) == index_schedule
+    # Room for two schedules of the same size, so storing a third evicts one
+    cache.max_bytes = 2 * os.path.getsize(cache._get_path(2, 1))
+    cache.store(2, 3, index_schedule)
+    assert cache.load(2, 2) is None
+    assert cache.load(2, 1) == index_schedule
+    assert cache.load(2, 3) == index_schedule
+
+
+def test_schedule_over_maximum_size_is_not_kept(tmp_path):
+    cache = ScheduleCache(str(tmp_path), max_bytes=1)
+    cache.store(2, 1, [(0, 1), (1, 0)])
+    assert cache.load(2, 1) is None
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_schedules_from_other_algorithm_versions_are_invalidated(tmp_path):
+    index_schedule = [(0, 1), (1, 0)]
+    old_cache = ScheduleCache(str(tmp_path), algorithm_version=1)
+    old_cache.store(2, 1, index_schedule)
+    # Creating a cache for a new algorithm version removes stale schedules
+    cache = ScheduleCache(str(tmp_path), algorithm_version=2)
+    assert cache.load(2, 1) is None
+    assert old_cache.load(2, 1) is None
+    cache.store(2, 1, index_schedule)
+    cache.invalidate()
+    assert cache.load(2, 1) == index_schedule
+    cache.invalidate(b_all_versions=True)
+    assert cache.load(2, 1) is None
+
+
+def test_corrupt_schedule_is_generated_again(tmp_path):
+    cache = ScheduleCache(str(tmp_path))
+    with open(cache._get_path(len(PLAYER_IDS), GAMES_PER_PLAYER), 'w') as file:
+        file.write('[[0, 1], [1')
+    assert cache.load(len(PLAYER_IDS), GAMES_PER_PLAYER) is None
+    expected_schedule = analysis.generate_new_schedule(GAMES_PER_PLAYER, PLAYER_IDS)
+    assert cache.get_schedule(GAMES_PER_PLAYER, PLAYER_IDS) == expected_schedule
+    # Generated schedule replaces the corrupt one
+    assert cache.load(len(PLAYER_IDS), GAMES_PER_PLAYER) == analysis.generate_new_schedule(
+        GAMES_PER_PLAYER, list(range(len(PLAYER_IDS))))
@@ -0,0 +1,102 @@
+from conftest import LEAGUE_SEASONS
+from schedule_pages import SchedulePageCache
+
+SEASON = LEAGUE_SEASONS[-1]
+PAGE_SIZE = 4
+
+
+class FakeDatabaseWorker:
+    """
+    Runs submitted work on the calling thread only when asked, so tests control when pages are read
+    """
+    def __init__(self, db):
+        self.db = db
+        self.work = []
+
+    def submit(self, work, on_done=None):
+        self.work.append((work, on_done))
+
+    def run(self):
+        work, self.work = self.work, []
+        for work, on_done in work:
+            on_done(work(self.db))
+
+
+class PageCacheTest:
+    def __init__(self, db, max_pages=6):
+        self.db_worker = FakeDatabaseWorker(db)
+        self.num_pages_loaded = 0
+        self.cache = SchedulePageCache(self.db_worker, SEASON, 1, self.on_page_loaded, PAGE_SIZE, max_pages)
+
+    def on_page_loaded(self):
+        self.num_pages_loaded += 1
+
+
+def test_pages_and_their_neighbours_are_read_once(league):
+    test = PageCacheTest(league)
+    assert test.cache.get_rows(5, 4) == [None] * 4
+    # Page on screen and the pages either side of it are read once each
+    assert test.cache.get_rows(5, 4) == [None] * 4
+    assert len(test.db_worker.work) == 3
+    test.db_worker.run()
+    assert test.num_pages_loaded == 3
+    assert test.cache.get_rows(1, 12) == league.get_schedule_page(SEASON, 0, 12)
+    # Only the page after the last kept page is read next
+    assert len(test.db_worker.work) == 1
+    test.db_worker.run()
+    last_game_number = league.get_season_game_number_range(SEASON)[1]
+    test.cache.get_rows(last_game_number - 1, 4)
+    test.db_worker.run()
+    rows = test.cache.get_rows(last_game_number - 1, 4)
+    assert rows[:2] == league.get_schedule_page(SEASON, last_game_number - 2, last_game_number)
+    # Game numbers past the end of the season have no game
+    assert rows[2:] == [None, None]
+
+
+def test_least_recently_used_pages_are_removed(league):
+    test = PageCacheTest(league, max_pages=3)
+    test.cache.get_rows(1, 4)
+    test.db_worker.run()
+    assert list(test.cache.pages) == [0, 1]
+    test.cache.get_rows(9, 4)
+    test.db_worker.run()
+    assert list(test.cache.pages) == [1, 2, 3]
+    # Showing a page marks it as used, so the page before it is the least recently used
+    assert test.cache.get_rows(9, 4) == league.get_schedule_page(SEASON, 8, 12)
+    test.cache.get_rows(13, 4)
+    test.db_worker.run()
+    assert list(test.cache.pages) == [2, 3, 4]
+
+
+def test_pages_read_before_invalidation_are_not_kept(league):
+    test = PageCacheTest(league)
+    test.cache.get_rows(9, 4)
+    test.db_worker.run()
+    game_id, _, game_number = league.get_next_unplayed_game_details()[:3]
+    unplayed_row = test.cache.get_rows(game_number, 1)[0]
+    assert not unplayed_row[3]
+    player_games = [{'footwear': 'sneakers', 'differential': str(differential), 'knockovers': 0, 'own_cups': 0,
+                     'aces': 0, 'serve_breaks': 0, 'penalty_shots_made': 0, 'penalty_shots_attempted': 0,
+                     'penalties_committed': 0} for differential in (1, -1)]
+    assert league.insert_game_result(game_id, *player_games)
+    test.cache.get_rows(1, 4)
+    test.cache.invalidate()
+    test.db_worker.run()
+    assert test.cache.pages == {}
+    assert test.num_pages_loaded == 3
+    assert test.cache.get_rows(game_number, 1) == [None]
+    test.db_worker.run()
+    assert test.cache.get_rows(game_number, 1)[0][3]
+
+
+def test_pages_that_fail_to_read_are_read_again(league, monkeypatch):
+    test = PageCacheTest(league)
+    # Database worker passes None to callbacks of work that failed
+    monkeypatch.setattr(league, 'get_schedule_page', lambda *args: None)
+    test.cache.get_rows(1, 4)
+    test.db_worker.run()
+    assert test.num_pages_loaded == 0
+    monkeypatch.undo()
+    assert test.cache.get_rows(1, 4) == [None] * 4
+    test.db_worker.run()
+    assert test.cache.get_rows(1, 4) == league.get_schedule_page(SEASON, 0, 4)
@@ -0,0 +1,40 @@
+import datetime
+from conftest import LEAGUE_SEASONS
+
+
+def get_all_standings(db):
+    return {season: db.get_standings(season) for season in LEAGUE_SEASONS}
+
+
+def test_rebuilt_standings_match_incremental_standings(league, reports):
+    incremental_standings = get_all_standings(league)
+    assert all(len(standings) > 0 for standings in incremental_standings.values())
+    assert league.rebuild_standings()
+    assert get_all_standings(league) == incremental_standings
+    assert reports == []
+
+
+def test_standings_count_every_recorded_game(league):
+    for season in LEAGUE_SEASONS:
+        first_game_number, last_game_number = league.get_season_game_number_range(season)
+        games = league.get_schedule_page(season, first_game_number - 1, last_game_number)
+        standings = league.get_standings(season)
+        # Each recorded game adds to the standings of both of its players
+        assert sum(standing[1] for standing in standings) == 2 * sum(1 for game in games if game[3])
+        for standing in standings:
+            games_played, wins, losses, ties = standing[1:5]
+            assert wins + losses + ties == games_played == sum(standing[6:12])
+        assert sum(standing[2] for standing in standings) == sum(standing[3] for standing in standings)
+
+
+def test_rebuilt_standings_match_after_one_player_is_recorded(league, reports):
+    season = datetime.date(2022, 1, 1)
+    assert league.insert_season_schedule(season, [(1, 2), (2, 1)])
+    game_id = [game[0] for games in league.export_table_rows('game', 100) for game in games if game[1] == season][0]
+    league.insert_player_game(1, game_id, league.get_footwear_id('sneakers'), '2', 0, 0, 0, 0, 0, 0, 0)
+    incremental_standings = league.get_standings(season)
+    # Away player isn't recorded yet, so only the home player has a standing
+    assert [standing[:2] for standing in incremental_standings] == [('ann', 1)]
+    assert league.rebuild_standings()
+    assert league.get_standings(season) == incremental_standings
+    assert reports == []